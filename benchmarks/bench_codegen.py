@@ -0,0 +1,68 @@
+"""Compare building a config and reading it from the environment against a
+module generated with to_module. The module is byte-compiled first, as an
+installed module would be, so compiling it is not counted.
+
+    uv run python benchmarks/bench_codegen.py [n_keys]
+"""
+import importlib.machinery
+import importlib.util
+import os
+import py_compile
+import sys
+import tempfile
+import timeit
+
+from ffurf import FfurfConfig
+
+
+def build_schema(n):
+    ffurf = FfurfConfig()
+    for i in range(n):
+        if i % 3 == 0:
+            ffurf.add_config_key("key-%d" % i, key_type=int)
+        elif i % 3 == 1:
+            ffurf.add_config_key("key-%d" % i, key_type=list[str])
+        else:
+            ffurf.add_config_key("key-%d" % i)
+    return ffurf
+
+
+def main(n):
+    environ = {}
+    for i in range(n):
+        environ["KEY_%d" % i] = [str(i), "a,b", "hoot"][i % 3]
+    os.environ.update(environ)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        module_fp = os.path.join(tmp, "bench_settings.py")
+        build_schema(n).to_module(class_name="Settings", fp=module_fp)
+        pyc_fp = py_compile.compile(module_fp, cfile=module_fp + "c")
+
+        def dynamic():
+            ffurf = build_schema(n)
+            ffurf.from_env()
+            ffurf.is_valid()
+            for i in range(n):
+                ffurf["key-%d" % i]
+
+        def generated():
+            loader = importlib.machinery.SourcelessFileLoader("bench_settings", pyc_fp)
+            spec = importlib.util.spec_from_loader("bench_settings", loader)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            settings = module.Settings.from_env(environ)
+            settings.is_valid()
+            for i in range(n):
+                settings["key-%d" % i]
+
+        repeat = 5
+        t_dynamic = min(timeit.repeat(dynamic, number=1, repeat=repeat))
+        t_generated = min(timeit.repeat(generated, number=1, repeat=repeat))
+
+    print("keys:      %d" % n)
+    print("dynamic:   %.2f ms" % (t_dynamic * 1000))
+    print("generated: %.2f ms (%.1fx)" % (t_generated * 1000, t_dynamic / t_generated))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
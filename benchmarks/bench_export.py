@@ -0,0 +1,39 @@
+"""Measure export throughput for every registered format.
+
+    uv run python benchmarks/bench_export.py [n_keys]
+"""
+import sys
+import timeit
+
+from ffurf import FfurfConfig
+from ffurf.exporters import _exporters
+
+
+def build_config(n):
+    ffurf = FfurfConfig()
+    for i in range(n):
+        if i % 5 == 0:
+            ffurf.add_config_key("key-%d" % i, key_type=int, default_value=i)
+        elif i % 5 == 1:
+            ffurf.add_config_key("key-%d" % i, key_type=list[str], default_value="a,b")
+        elif i % 5 == 2:
+            ffurf.add_config_key("key-%d" % i, key_type=bool, default_value=True)
+        elif i % 5 == 3:
+            ffurf.add_config_key(
+                "key-%d" % i, key_type=list[float], compact=True, default_value="1.5,2"
+            )
+        else:
+            ffurf.add_config_key("key-%d" % i, default_value="hoot")
+    return ffurf
+
+
+def main(n):
+    ffurf = build_config(n)
+    print("keys: %d" % n)
+    for fmt in sorted(_exporters):
+        t = min(timeit.repeat(lambda: ffurf.export(fmt), number=1, repeat=3))
+        print("%-8s %8.1f ms %10.0f keys/s" % (fmt, t * 1000, n / t))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,65 @@
+"""Compare loading a few keys from a large json document with and without
+`selective`, in time and peak traced memory.
+
+    uv run python benchmarks/bench_selective.py [n_rows]
+"""
+import json
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+from ffurf import FfurfConfig
+
+
+def build_schema():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("service.host")
+    ffurf.add_config_key("service.port", key_type=int)
+    ffurf.add_config_key("service.tags", key_type=list[str])
+    return ffurf
+
+
+def main(n):
+    # the service's table, among other teams' tables of many small objects
+    doc = {"service": {"host": "localhost", "port": 8080, "tags": ["a", "b"]}}
+    for t in range(20):
+        doc["team-%d" % t] = {
+            "rows": [{"id": i, "name": "row-%d" % i, "on": True} for i in range(n)]
+        }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_fp = os.path.join(tmp, "bench.json")
+        with open(json_fp, "w") as fh:
+            json.dump(doc, fh)
+        del doc
+        size = os.path.getsize(json_fp)
+
+        def load(selective):
+            ffurf = build_schema()
+            ffurf.from_json(json_fp, selective=selective)
+            assert ffurf["service.port"] == 8080
+
+        def peak(selective):
+            tracemalloc.start()
+            load(selective)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return peak
+
+        repeat = 3
+        t_full = min(timeit.repeat(lambda: load(False), number=1, repeat=repeat))
+        t_sel = min(timeit.repeat(lambda: load(True), number=1, repeat=repeat))
+        m_full = peak(False)
+        m_sel = peak(True)
+
+    print("document:  %.1f MB" % (size / 1e6))
+    print("full:      %.2f s, %.1f MB peak" % (t_full, m_full / 1e6))
+    print(
+        "selective: %.2f s (%.1fx), %.1f MB peak" % (t_sel, t_full / t_sel, m_sel / 1e6)
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
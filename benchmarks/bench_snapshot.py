@@ -0,0 +1,60 @@
+"""Compare bootstrapping a config from toml against loading a snapshot.
+
+    uv run python benchmarks/bench_snapshot.py [n_keys]
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+import toml
+
+from ffurf import FfurfConfig
+
+
+def build_schema(n):
+    ffurf = FfurfConfig()
+    for i in range(n):
+        if i % 3 == 0:
+            ffurf.add_config_key("key-%d" % i, key_type=int)
+        elif i % 3 == 1:
+            ffurf.add_config_key("key-%d" % i, key_type=list[str])
+        else:
+            ffurf.add_config_key("key-%d" % i)
+    return ffurf
+
+
+def main(n):
+    values = {}
+    for i in range(n):
+        values["key-%d" % i] = [i, ["a", "b"], "hoot"][i % 3]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        toml_fp = os.path.join(tmp, "bench.toml")
+        with open(toml_fp, "w") as fh:
+            toml.dump(values, fh)
+
+        def from_toml():
+            ffurf = build_schema(n)
+            ffurf.from_toml(toml_fp)
+            ffurf.is_valid()
+
+        ffurf = build_schema(n)
+        ffurf.from_toml(toml_fp)
+        blob = ffurf.dump_snapshot()
+
+        def from_snapshot():
+            FfurfConfig.load_snapshot(blob).is_valid()
+
+        repeat = 5
+        t_toml = min(timeit.repeat(from_toml, number=1, repeat=repeat))
+        t_snap = min(timeit.repeat(from_snapshot, number=1, repeat=repeat))
+
+    print("keys:          %d" % n)
+    print("snapshot size: %d bytes" % len(blob))
+    print("from_toml:     %.2f ms" % (t_toml * 1000))
+    print("load_snapshot: %.2f ms (%.1fx)" % (t_snap * 1000, t_toml / t_snap))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -1,9 +1,22 @@
 import argparse
+import array
+import contextlib
+import contextvars
+import itertools
+import marshal
+import math
+import random
+import re
+import struct
+import threading
+import time
+import zlib
 import toml
 import json
 import sys
 import os
 
+from collections import ChainMap, OrderedDict, deque
 from importlib.metadata import version, PackageNotFoundError
 from inspect import currentframe, getframeinfo
 from typing import get_args, get_origin
@@ -25,11 +38,38 @@ def list_elem_type(key_type):
     return False, None
 
 
-def coerce_value(key_type, value, separator=","):
+def value_kind(keyconf):
+    # Which of an exporter's formatters writes this key's values
+    is_list, _ = list_elem_type(keyconf["type"])
+    if is_list:
+        return "array" if keyconf["compact"] else "list"
+    if keyconf["type"] in (str, int, float, bool):
+        return keyconf["type"].__name__
+    return "other"
+
+
+# array.array typecodes used to hold compact numeric lists
+COMPACT_TYPECODES = {int: "q", float: "d"}
+
+# Marks options that from_argparse was not given
+_UNSET = object()
+
+
+def coerce_value(key_type, value, separator=",", compact=False):
     is_list, elem_type = list_elem_type(key_type)
     if not is_list:
         return key_type(value)
 
+    if compact:
+        # parse straight into the array, without building a list of boxed
+        # elements first; int() and float() tolerate surrounding whitespace
+        typecode = COMPACT_TYPECODES[elem_type]
+        if isinstance(value, str):
+            value = value.split(separator) if value.strip() else ()
+        elif not isinstance(value, (list, tuple, array.array)):
+            value = (value,)
+        return array.array(typecode, map(elem_type, value))
+
     if isinstance(value, str):
         # env vars and scalar strings arrive as one separated string
         value = [v.strip() for v in value.split(separator)] if value.strip() else []
@@ -44,10 +84,518 @@ def coerce_value(key_type, value, separator=","):
     return value
 
 
+def is_blank(value):
+    # Empty strings, lists and compact arrays all count as blank
+    if isinstance(value, array.array):
+        return len(value) == 0
+    return value in ("", [])
+
+
+def join_list(value, separator):
+    # Join a list or compact array back into a separated string
+    return separator.join(map(str, value))
+
+
+def _json_float(f):
+    # Match json.dumps for non-finite floats
+    return repr(f) if math.isfinite(f) else json.dumps(f)
+
+
+def dump_json_value(value):
+    # json.dumps a single value, writing compact arrays element by element
+    # rather than converting them to a list first
+    if isinstance(value, array.array):
+        items = map(_json_float, value) if value.typecode == "d" else map(str, value)
+        return "[%s]" % ", ".join(items)
+    return json.dumps(value)
+
+
+# ${key} references, and $$ for a literal $
+_INTERPOLATION = re.compile(r"\$(?:\$|\{([^{}]*)\})")
+
+
+def is_template(value):
+    return isinstance(value, str) and _INTERPOLATION.search(value) is not None
+
+
+def template_inputs(template):
+    # Keys referenced by a template, in order and without repeats
+    return tuple(
+        dict.fromkeys(
+            m.group(1).strip()
+            for m in _INTERPOLATION.finditer(template)
+            if m.group(1) is not None
+        )
+    )
+
+
+def render_template(template, lookup):
+    # Substitute each ${key} with lookup(key), or return None if any is None
+    parts = []
+    pos = 0
+    for m in _INTERPOLATION.finditer(template):
+        parts.append(template[pos : m.start()])
+        if m.group(1) is None:
+            parts.append("$")
+        else:
+            v = lookup(m.group(1).strip())
+            if v is None:
+                return None
+            parts.append(v)
+        pos = m.end()
+    parts.append(template[pos:])
+    return "".join(parts)
+
+
+# Every write to any config is stamped from one counter, so two keyconfs
+# carrying the same stamp were filled by the same write and hold equal values
+_version_stamps = itertools.count(1)
+
+
+def clean_value(keyconf, v):
+    # Render a value as a string with secrets and partial secrets masked
+    if v is None:
+        return ""
+
+    if keyconf["secret"]:
+        return "********"
+
+    if keyconf.get("masked") is not None:
+        # interpolated from a secret, rendered with the secret masked
+        return keyconf["masked"]
+
+    if isinstance(v, (list, array.array)):
+        v = join_list(v, keyconf["separator"])
+    else:
+        v = str(v)
+
+    if keyconf["partial_secret"]:
+        return "********" + v[-keyconf["partial_secret"] :]
+    return v
+
+
+# dump_snapshot header: magic, format version, payload length and crc32
+SNAPSHOT_MAGIC = b"FFRF"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct(">4sHII")
+# marshal's own format is pinned so snapshots are readable across pythons
+SNAPSHOT_MARSHAL_VERSION = 4
+# keyconf fields rebuilt on load rather than written to a snapshot
+SNAPSHOT_SKIP_FIELDS = ("name", "type", "version", "envkey")
+
+_SNAPSHOT_TYPES = {t.__name__: t for t in (str, int, float, bool, list, dict)}
+
+
+def type_to_spec(key_type):
+    # Name a key type for a snapshot, as "int" or "list[int]"
+    is_list, elem_type = list_elem_type(key_type)
+    if is_list and elem_type is not None:
+        return "list[%s]" % type_to_spec(elem_type)
+    if is_list:
+        return "list"
+    if _SNAPSHOT_TYPES.get(getattr(key_type, "__name__", None)) is not key_type:
+        raise ValueError("Cannot snapshot key type %s" % key_type)
+    return key_type.__name__
+
+
+def spec_to_type(spec):
+    if spec.startswith("list[") and spec.endswith("]"):
+        return list[spec_to_type(spec[5:-1])]
+    try:
+        return _SNAPSHOT_TYPES[spec]
+    except KeyError:
+        raise ValueError("Unknown key type in snapshot: %s" % spec) from None
+
+
+_DOTENV_ESCAPES = {
+    "n": "\n",
+    "t": "\t",
+    "r": "\r",
+    "\\": "\\",
+    '"': '"',
+    "$": "$",
+    "`": "`",
+}
+_DOTENV_ESCAPE_RE = re.compile(r"\\(.)", re.S)
+
+
+def escape_env_value(v):
+    # Escape a value for writing between double quotes in a dotenv file, or
+    # a shell, which would otherwise expand $ and backticks
+    return (
+        v.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("$", "\\$")
+        .replace("`", "\\`")
+    )
+
+
+def _unescape_env_value(v):
+    return _DOTENV_ESCAPE_RE.sub(
+        lambda m: _DOTENV_ESCAPES.get(m.group(1), m.group(0)), v
+    )
+
+
+def _find_closing_quote(s, quote):
+    # Index of the first unescaped quote in s, or -1
+    i = 0
+    while True:
+        i = s.find(quote, i)
+        if i < 0 or quote == "'":
+            return i
+        j = i
+        while j and s[j - 1] == "\\":
+            j -= 1
+        if not (i - j) % 2:
+            return i
+        i += 1
+
+
+def iter_dotenv(fh, wanted=None):
+    """Yield (name, value) pairs from a dotenv file handle, line by line.
+
+    Handles comments, `export` prefixes, single quotes (literal), double
+    quotes (with backslash escapes, over multiple lines) and inline comments
+    on unquoted values. Values for names not in `wanted` are skipped over
+    without being unescaped.
+    """
+    lines = iter(fh)
+    for line in lines:
+        # trailing whitespace may be part of a quoted value running over lines
+        line = line.rstrip("\r\n").lstrip()
+        if not line.strip() or line.startswith("#"):
+            continue
+        if line.startswith("export "):
+            line = line[7:]
+        name, sep, rest = line.partition("=")
+        if not sep:
+            continue
+        name = name.strip()
+        rest = rest.lstrip()
+
+        quote = rest[:1]
+        if quote in ('"', "'"):
+            rest = rest[1:]
+            end = _find_closing_quote(rest, quote)
+            while end < 0:
+                # a quoted value can run over several lines
+                more = next(lines, None)
+                if more is None:
+                    raise ValueError("Unterminated quoted value for %s" % name)
+                rest += "\n" + more.rstrip("\r\n")
+                end = _find_closing_quote(rest, quote)
+            if wanted is not None and name not in wanted:
+                continue
+            value = rest[:end]
+            if quote == '"':
+                value = _unescape_env_value(value)
+        else:
+            if wanted is not None and name not in wanted:
+                continue
+            value = rest.split(" #", 1)[0].strip()
+        yield name, value
+
+
+def read_json(json_fp):
+    with open(json_fp) as json_fh:
+        return json.load(json_fh)
+
+
+def read_secret_file(path):
+    # Secret files usually end with a newline that isn't part of the secret
+    with open(path) as fh:
+        return fh.read().rstrip("\r\n")
+
+
+def read_secret_env(name):
+    try:
+        return os.environ[name]
+    except KeyError:
+        raise KeyError("Secret references unset environment variable %s" % name)
+
+
+class FfurfSecretResolver:
+    """Dereferences secret values that point somewhere else.
+
+    A secret key holding `file:/run/secrets/db` is read from that file, and
+    one holding `env:OTHER_VAR` from that environment variable. Anything else
+    is taken to be the secret itself. Results are cached for `ttl` seconds,
+    keeping the `max_entries` most recently used, and are re-read in the
+    background when read within `refresh_ahead` seconds of expiring.
+    """
+
+    def __init__(self, ttl=300, max_entries=128, refresh_ahead=None, clock=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.refresh_ahead = ttl / 10 if refresh_ahead is None else refresh_ahead
+        self.clock = clock or time.monotonic
+        self.schemes = {"file": read_secret_file, "env": read_secret_env}
+        self.cache = OrderedDict()
+        self.refreshing = set()
+        self.lock = threading.Lock()
+
+    def is_reference(self, value):
+        if not isinstance(value, str):
+            return False
+        scheme, sep, _ = value.partition(":")
+        return bool(sep) and scheme in self.schemes
+
+    def resolve(self, ref):
+        if not self.is_reference(ref):
+            return ref
+
+        now = self.clock()
+        with self.lock:
+            entry = self.cache.get(ref)
+            if entry is not None and now < entry[1]:
+                self.cache.move_to_end(ref)
+                if now >= entry[1] - self.refresh_ahead and ref not in self.refreshing:
+                    self.refreshing.add(ref)
+                    threading.Thread(
+                        target=self._refresh, args=(ref,), daemon=True
+                    ).start()
+                return entry[0]
+
+        value = self._fetch(ref)
+        self._store(ref, value)
+        return value
+
+    def invalidate(self, ref=None):
+        with self.lock:
+            if ref is None:
+                self.cache.clear()
+            else:
+                self.cache.pop(ref, None)
+
+    def _fetch(self, ref):
+        scheme, _, target = ref.partition(":")
+        return self.schemes[scheme](target)
+
+    def _store(self, ref, value):
+        with self.lock:
+            self.cache[ref] = (value, self.clock() + self.ttl)
+            self.cache.move_to_end(ref)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+
+    def _refresh(self, ref):
+        try:
+            self._store(ref, self._fetch(ref))
+        except Exception:
+            # keep serving the cached value, it will be re-read on expiry
+            pass
+        finally:
+            with self.lock:
+                self.refreshing.discard(ref)
+
+
+def compile_checks(keyconf):
+    """Compile a key's constraints into a list of (predicate, message).
+
+    Bounds, patterns and choices apply to each element of a list key, while
+    a custom `check` is given the whole value.
+    """
+    checks = []
+    if keyconf.get("min_value") is not None:
+        low = keyconf["min_value"]
+        checks.append((lambda v: v >= low, "must be at least %s" % low))
+    if keyconf.get("max_value") is not None:
+        high = keyconf["max_value"]
+        checks.append((lambda v: v <= high, "must be at most %s" % high))
+    if keyconf.get("pattern") is not None:
+        regex = re.compile(keyconf["pattern"])
+        checks.append(
+            (
+                lambda v: regex.fullmatch(str(v)) is not None,
+                "must match %s" % regex.pattern,
+            )
+        )
+    if keyconf.get("choices") is not None:
+        choices = tuple(keyconf["choices"])
+        try:
+            choices = frozenset(choices)
+        except TypeError:
+            pass
+        checks.append(
+            (
+                lambda v: v in choices,
+                "must be one of %s" % ", ".join(map(str, keyconf["choices"])),
+            )
+        )
+
+    is_list, _ = list_elem_type(keyconf["type"])
+    if is_list:
+        checks = [
+            (lambda value, fn=fn: all(fn(v) for v in value), message)
+            for fn, message in checks
+        ]
+
+    if keyconf.get("check") is not None:
+        check = keyconf["check"]
+        checks.append((check, "failed %s" % getattr(check, "__name__", "check")))
+    return checks
+
+
+def run_checks(checks, keyconf, secret_resolver=None):
+    # Messages for each check the keyconf's value fails. Unset values, and
+    # secret references that haven't been resolved, are not checked.
+    v = keyconf["value"]
+    if not checks or v is None:
+        return []
+    if keyconf["secret"] and secret_resolver and secret_resolver.is_reference(v):
+        return []
+    errors = []
+    for fn, message in checks:
+        try:
+            ok = fn(v)
+        except Exception as e:
+            ok = False
+            message = "%s (%s)" % (message, e)
+        if not ok:
+            errors.append(message)
+    return errors
+
+
+# Layers of keyconfs set by FfurfConfig.override, as {config: {key: keyconf}}.
+# Being a ContextVar, each thread and asyncio task sees its own overrides.
+_override_layers = contextvars.ContextVar("ffurf_override_layers", default=None)
+
+
+def truncate(cell, width):
+    cell = str(cell)
+    if len(cell) <= width:
+        return cell
+    return cell[: width - 3] + "..." if width > 3 else cell[:width]
+
+
+def print_rows(headers, rows, file=None, widths=None):
+    # Plain text table, for when rich isn't around. Given column widths,
+    # rows are truncated to fit and written as they come; otherwise they are
+    # gathered first, sizing the columns as they go.
+    if widths is None:
+        widths = [len(h) for h in headers]
+        gathered = []
+        for row in rows:
+            row = [str(cell) for cell in row]
+            for col, cell in enumerate(row):
+                if len(cell) > widths[col]:
+                    widths[col] = len(cell)
+            gathered.append(row)
+        rows = gathered
+    else:
+        rows = (
+            [truncate(cell, widths[i]) for i, cell in enumerate(row)] for row in rows
+        )
+
+    header_row = "  ".join(h.ljust(widths[i]) for i, h in enumerate(headers))
+    print(header_row.strip(), file=file)
+    print("  ".join("=" * widths[i] for i in range(len(headers))), file=file)
+    for row in rows:
+        cells = [cell.ljust(widths[i]) for i, cell in enumerate(row)]
+        print("  ".join(cells).strip(), file=file)
+
+
+def new_prefix_node():
+    # A node in the prefix index over dotted key names. "key" is set if a
+    # config key ends at this node, and "size" counts the keys beneath it.
+    return {"children": {}, "key": None, "size": 0}
+
+
+class FfurfNamespace:
+    """A read-only view over the keys beneath a dotted prefix.
+
+    Keys are addressed relative to the prefix, and values are read from the
+    underlying configuration rather than copied.
+    """
+
+    def __init__(self, config, prefix, node):
+        self.config = config
+        self.prefix = prefix
+        self.node = node
+
+    def __repr__(self):
+        return "FfurfNamespace(%r, %s)" % (self.prefix, self)
+
+    def __str__(self):
+        return str({k: self.config._get_clean(self._key(k)) for k in self})
+
+    def _key(self, k):
+        return "%s.%s" % (self.prefix, k)
+
+    def __getitem__(self, k):
+        return self.config[self._key(k)]
+
+    def __contains__(self, k):
+        return self._key(k) in self.config
+
+    def __len__(self):
+        # the prefix's own key is not in the namespace
+        if self.node["key"] is not None:
+            return self.node["size"] - 1
+        return self.node["size"]
+
+    def __iter__(self):
+        start = len(self.prefix) + 1
+        for k in self.full_keys():
+            yield k[start:]
+
+    def full_keys(self):
+        # Walk the subtree to collect its full key names
+        keys = []
+        stack = [self.node]
+        while stack:
+            node = stack.pop()
+            if node["key"] is not None and node is not self.node:
+                keys.append(node["key"])
+            stack.extend(node["children"].values())
+        return sorted(keys)
+
+    def get(self, k, default=None):
+        return self.config.get(self._key(k), default)
+
+    def get_source(self, k):
+        return self.config.get_source(self._key(k))
+
+    def get_clean(self, k):
+        return self.config.get_clean(self._key(k))
+
+    def namespace(self, prefix):
+        return self.config.namespace(self._key(prefix))
+
+    def to_json(self, default=""):
+        start = len(self.prefix) + 1
+        return self.config.export("json", ((k[start:], k) for k in self.full_keys()))
+
+    def to_env(self, default=""):
+        # Variables keep their full names, so they can be read by from_env
+        return self.config.export("env", ((k, k) for k in self.full_keys()))
+
+
 class FfurfConfig:
-    def __init__(self):
+    def __init__(self, secret_resolver=None):
         self.config = {}
         self.config_keys = set([])
+        self.key_order = []
+        self.key_tree = new_prefix_node()
+        self.env_keys = {}
+        self.version = 0
+        self.secret_resolver = secret_resolver
+        self.url_state = {}
+        self.documents = {}
+        self.argparse_cache = None
+        self.checks = {}
+        self.kinds = {}
+        self.key_errors = {}
+        self.rules = []
+        self.rules_by_key = {}
+        self.rule_errors = {}
+        self.dependents = {}
+        self.subscribers = {}
+        self.prefix_subscribers = {}
+        self.pending = None
+        self.access = None
+        self.journal = None
+        self.env_cache = None
 
     def add_config_key(
         self,
@@ -58,37 +606,217 @@ class FfurfConfig:
         partial_secret=None,
         optional=False,
         separator=",",
+        compact=False,
+        min_value=None,
+        max_value=None,
+        pattern=None,
+        choices=None,
+        check=None,
+        interpolate=False,
     ):
-        is_list, _ = list_elem_type(key_type)
+        is_list, elem_type = list_elem_type(key_type)
         if separator != "," and not is_list:
             raise ValueError(
                 "%s: separator is only meaningful for list keys, not %s"
                 % (key, key_type)
             )
+        if compact and elem_type not in COMPACT_TYPECODES:
+            raise ValueError(
+                "%s: compact is only meaningful for list[int] and list[float] keys, not %s"
+                % (key, key_type)
+            )
 
         self.config[key] = {
             "name": key,
             "type": key_type,
-            "value": coerce_value(key_type, default_value, separator)
-            if default_value is not None
-            else None,
+            "value": default_value
+            if default_value is None
+            or self._is_secret_reference(secret, default_value)
+            or (interpolate and is_template(default_value))
+            else coerce_value(key_type, default_value, separator, compact),
             "source": "ffurf:default" if default_value is not None else None,
             "secret": secret,
             "partial_secret": partial_secret if not secret else None,
             "optional": optional,
             "separator": separator,
+            "compact": compact,
+            "min_value": min_value,
+            "max_value": max_value,
+            "pattern": pattern,
+            "choices": choices,
+            "check": check,
+            "interpolate": interpolate,
+            "template": None,
+            "inputs": (),
+            "masked": None,
+            "version": self._next_version(),
         }
+        self._install_keyconf(key, self.config[key])
+        if interpolate and is_template(default_value):
+            self._commit(key, default_value, "ffurf:default")
+
+    def _install_keyconf(self, key, keyconf):
+        self.config[key] = keyconf
+        keyconf["envkey"] = self.key_to_envkey(key)
+        if key not in self.config_keys:
+            self._index_key(key)
+            self.env_keys.setdefault(keyconf["envkey"], []).append(key)
         self.config_keys.add(key)
+        self.checks[key] = compile_checks(keyconf)
+        self.kinds[key] = value_kind(keyconf)
+        for ref in keyconf.get("inputs") or ():
+            self.dependents.setdefault(ref, set()).add(key)
+        self._evaluate(key)
+        if key in self.dependents:
+            # templates that referenced this key before it existed
+            self._cascade((key,))
+
+    def add_constraint(self, keys, predicate, message=None):
+        """Add a rule across several keys.
+
+        `predicate` is called with the values of `keys`, in order, and
+        should return True if they are acceptable together. Rules are not
+        checked while any of their keys are unset.
+        """
+        keys = tuple(keys)
+        for k in keys:
+            if k not in self.config_keys:
+                raise KeyError(k)
+        if message is None:
+            message = "failed %s" % getattr(predicate, "__name__", "constraint")
+
+        i = len(self.rules)
+        self.rules.append((keys, predicate, message))
+        for k in keys:
+            self.rules_by_key.setdefault(k, []).append(i)
+        self.rule_errors[i] = self._run_rule(i, self.config.get)
+
+    def _evaluate(self, key):
+        # Re-run the checks for a key, and the rules it takes part in
+        self.key_errors[key] = run_checks(
+            self.checks[key], self.config[key], self.secret_resolver
+        )
+        for i in self.rules_by_key.get(key, ()):
+            self.rule_errors[i] = self._run_rule(i, self.config.get)
+
+    def _run_rule(self, i, get_keyconf):
+        keys, predicate, message = self.rules[i]
+        values = [get_keyconf(k)["value"] for k in keys]
+        if any(v is None for v in values):
+            return None
+        try:
+            ok = predicate(*values)
+        except Exception as e:
+            return "%s (%s)" % (message, e)
+        return None if ok else message
+
+    def _overridden(self, keys):
+        layers = _override_layers.get()
+        layer = layers.get(self) if layers is not None else None
+        return layer is not None and any(k in layer for k in keys)
+
+    def _key_errors(self, k):
+        # Constraint failures for a key, including the rules it is part of
+        if self._overridden((k,)):
+            errors = run_checks(self.checks[k], self._keyconf(k), self.secret_resolver)
+        else:
+            errors = list(self.key_errors.get(k) or ())
+        for i in self.rules_by_key.get(k, ()):
+            keys = self.rules[i][0]
+            if self._overridden(keys):
+                error = self._run_rule(i, self._keyconf)
+            else:
+                error = self.rule_errors.get(i)
+            if error:
+                errors.append(error)
+        return errors
+
+    def _next_version(self):
+        self.version = next(_version_stamps)
+        return self.version
+
+    def _index_key(self, key):
+        node = self.key_tree
+        node["size"] += 1
+        for part in key.split("."):
+            node = node["children"].setdefault(part, new_prefix_node())
+            node["size"] += 1
+        node["key"] = key
+
+    def _find_node(self, prefix):
+        node = self.key_tree
+        for part in prefix.split("."):
+            node = node["children"].get(part)
+            if node is None:
+                return None
+        return node
+
+    def namespace(self, prefix):
+        node = self._find_node(prefix)
+        if node is None or node["size"] == (1 if node["key"] else 0):
+            raise KeyError(prefix)
+        return FfurfNamespace(self, prefix, node)
 
     def __repr__(self):
         # TODO String for making the Ffurf class
-        return str({k: self.get_clean(k) for k in self})
+        return str({k: self._get_clean(k) for k in self})
 
     def __str__(self):
-        return str({k: self.get_clean(k) for k in self})
+        return str({k: self._get_clean(k) for k in self})
+
+    def table_rows(self, invalid=False, prefix=None, source=None, offset=0, limit=None):
+        """Yield a (key, value, source, valid) row for each key, as shown by
+        `print_table`, reading each key once.
+
+        Rows can be limited to `invalid` keys, keys under a dotted `prefix`,
+        or keys whose source starts with `source`, then paged with `offset`
+        and `limit`. Values are masked with `clean_value`.
+        """
+        rows = (row[:4] for row in self._table_rows(invalid, prefix, source))
+        stop = None if limit is None else offset + limit
+        return itertools.islice(rows, offset, stop)
+
+    def _table_rows(self, invalid=False, prefix=None, source=None):
+        # As table_rows, with a fifth column of "unset" or "blank" for
+        # required keys that are missing a value
+        if prefix:
+            node = self._find_node(prefix)
+            if node is None:
+                return
+            keys = FfurfNamespace(self, prefix, node).full_keys()
+            if node["key"] is not None:
+                keys.insert(0, node["key"])
+        else:
+            keys = self
+
+        for k in keys:
+            keyconf = self._keyconf(k)
+            key_source = str(keyconf["source"])
+            if source is not None and not key_source.startswith(source):
+                continue
+            valid = self._keyconf_is_valid(k, keyconf)
+            if invalid and valid:
+                continue
+
+            v = keyconf["value"]
+            problem = None
+            if not keyconf["optional"]:
+                if v is None:
+                    problem = "unset"
+                elif is_blank(v):
+                    problem = "blank"
+
+            if problem is None:
+                value = str(clean_value(keyconf, v))
+            else:
+                value = "--------"
+                key_source = (
+                    "unset" if problem == "unset" else "%s (blank)" % key_source
+                )
+            yield k, value, key_source, "O" if valid else "X", problem
 
-    # TODO test
-    def __rich_console__(self, console, options):
+    def rich_table(self, invalid=False, prefix=None, source=None, offset=0, limit=None):
+        """Return a rich `Table` of the keys, filtered as for `table_rows`."""
         try:
             from rich.table import Table
         except ImportError:
@@ -100,52 +828,45 @@ class FfurfConfig:
         table.add_column("Source")
         table.add_column("Valid")
 
-        for k in self:
-
-            v = self.get_clean(k)
-            source = self.get_source(k)
-
-            if not self.config[k]["optional"] and self[k] is None:
+        rows = self._table_rows(invalid, prefix, source)
+        stop = None if limit is None else offset + limit
+        for k, v, key_source, valid, problem in itertools.islice(rows, offset, stop):
+            if problem == "unset":
                 v = "[b red]--------[/]"
-                source = "[b red]unset[/]"
-            elif not self.config[k]["optional"] and self[k] in ("", []):
+                key_source = "[b red]unset[/]"
+            elif problem == "blank":
                 v = "[b red]--------[/]"
-                source = "%s [b red](blank)[/]" % source
+                key_source = "%s [b red](blank)[/]" % key_source[: -len(" (blank)")]
 
-            valid = "[green]O[/]" if self.key_is_valid(k) else "[red]X[/]"
-            table.add_row(k, v, source, valid)
+            valid = "[green]O[/]" if valid == "O" else "[red]X[/]"
+            table.add_row(k, v, key_source, valid)
+        return table
 
-        yield table
+    def __rich_console__(self, console, options):
+        yield self.rich_table()
 
-    def print_table(self):
-        rows = []
-        for k in self:
-            v = self.get_clean(k)
-            source = self.get_source(k)
-            if not self.config[k]["optional"] and self[k] is None:
-                v = "--------"
-                source = "unset"
-            elif not self.config[k]["optional"] and self[k] in ("", []):
-                v = "--------"
-                source = f"{source} (blank)"
-            valid = "O" if self.key_is_valid(k) else "X"
-            rows.append((k, v, source, valid))
+    def print_table(
+        self,
+        file=None,
+        invalid=False,
+        prefix=None,
+        source=None,
+        offset=0,
+        limit=None,
+        max_width=None,
+    ):
+        """Print the keys as a plain text table, to stdout or `file`.
 
+        Rows are filtered and paged as for `table_rows`. With `max_width`,
+        cells are truncated to fit and rows are written as they are read,
+        rather than after sizing the columns to the widest cell.
+        """
         headers = ("Key", "Value", "Source", "Valid")
-
-        col_widths = [len(h) for h in headers]
-        for row in rows:
-            for col, cell in enumerate(row):
-                l = len(str(cell))
-                if l > col_widths[col]:
-                    col_widths[col] = l
-
-        header_row = "  ".join(h.ljust(col_widths[i]) for i, h in enumerate(headers))
-        print(header_row.strip())
-        print("  ".join("=" * col_widths[i] for i in range(len(headers))))
-        for row in rows:
-            cells = [str(cell).ljust(col_widths[i]) for i, cell in enumerate(row)]
-            print("  ".join(cells).strip())
+        widths = None
+        if max_width is not None:
+            widths = [max(max_width, len(h)) for h in headers[:3]] + [len(headers[3])]
+        rows = self.table_rows(invalid, prefix, source, offset, limit)
+        print_rows(headers, rows, file=file, widths=widths)
 
     def __getitem__(self, k):
         if k not in self.config_keys:
@@ -158,8 +879,10 @@ class FfurfConfig:
         return self.set_config_key(k, v, source)
 
     def __iter__(self):
-        for k in sorted(self.config_keys):
-            yield k
+        # keys are never removed, so the sorted keys are kept until one is added
+        if len(self.key_order) != len(self.config_keys):
+            self.key_order = sorted(self.config_keys)
+        yield from self.key_order
 
     def __len__(self):
         return len(self.config_keys)
@@ -168,10 +891,122 @@ class FfurfConfig:
         return k in self.config_keys
 
     def get(self, k, default=None):
-        v = self.config.get(k, {"value": default})["value"]
-        if v is None:
+        if self.access is not None and k in self.config_keys:
+            self._record_access(k)
+        return self._get(k, default)
+
+    def _get(self, k, default=None):
+        # get, without counting as a read for track_access
+        keyconf = self._keyconf(k)
+        if keyconf is None or keyconf["value"] is None:
             return default
-        return v
+        return self._value(keyconf)
+
+    def track_access(self, sample_rate=1.0):
+        """Start counting reads of each key by `get`, `get_clean` and `[]`.
+
+        With a `sample_rate` below 1, only that fraction of reads (chosen at
+        random intervals) are recorded, and counts are scaled up to estimate
+        the total, so tracking can be left on for busy processes. Exports
+        such as `to_json` and `print_table` are not counted as reads.
+        """
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1], not %s" % sample_rate)
+        self.access = {}
+        self.access_rate = sample_rate
+        self.access_countdown = self._next_sample()
+
+    def stop_tracking_access(self):
+        self.access = None
+
+    def _next_sample(self):
+        # Reads until the next sample, drawn from a geometric distribution
+        # so that reads repeating in a fixed order are still all sampled
+        if self.access_rate >= 1:
+            return 1
+        return int(math.log(1.0 - random.random()) / math.log1p(-self.access_rate)) + 1
+
+    def _record_access(self, k):
+        self.access_countdown -= 1
+        if self.access_countdown > 0:
+            return
+        self.access_countdown = self._next_sample()
+        now = time.time()
+        entry = self.access.get(k)
+        if entry is None:
+            self.access[k] = [1, now, now]
+        else:
+            entry[0] += 1
+            entry[2] = now
+
+    def access_report(self):
+        """Return the reads recorded since `track_access`.
+
+        "keys" holds each read key's (estimated) count, and the time of its
+        first and last recorded read. "unread" lists keys that were never
+        read, and "set_unread" those of them that were set by something
+        other than their default. With sampling, rarely read keys may be
+        listed as unread.
+        """
+        if self.access is None:
+            raise ValueError("Access is not being tracked, call track_access first")
+        keys = {
+            k: {"count": round(count / self.access_rate), "first": first, "last": last}
+            for k, (count, first, last) in self.access.items()
+        }
+        unread = [k for k in self if k not in self.access]
+        set_unread = [
+            k for k in unread if self.config[k]["source"] not in (None, "ffurf:default")
+        ]
+        return {"keys": keys, "unread": unread, "set_unread": set_unread}
+
+    def _value(self, keyconf):
+        # A keyconf's value, with any secret reference resolved
+        if (
+            keyconf["secret"]
+            and self.secret_resolver is not None
+            and keyconf["value"] is not None
+        ):
+            return self._resolve_secret(keyconf)
+        return keyconf["value"]
+
+    def _is_secret_reference(self, secret, value):
+        return (
+            secret
+            and self.secret_resolver is not None
+            and self.secret_resolver.is_reference(value)
+        )
+
+    def _resolve_secret(self, keyconf):
+        v = keyconf["value"]
+        if not self.secret_resolver.is_reference(v):
+            return v
+        try:
+            return coerce_value(
+                keyconf["type"],
+                self.secret_resolver.resolve(v),
+                keyconf["separator"],
+                keyconf["compact"],
+            )
+        except (TypeError, ValueError, OverflowError) as e:
+            raise TypeError(keyconf["name"]) from e
+
+    def _keyconf(self, k):
+        # The keyconf in effect for k, taking overrides into account
+        layers = _override_layers.get()
+        if layers is not None:
+            layer = layers.get(self)
+            if layer is not None and k in layer:
+                return layer[k]
+        return self.config.get(k)
+
+    def _keyconf_getter(self):
+        # _keyconf, with overrides looked up once, for reading many keys
+        layers = _override_layers.get()
+        layer = layers.get(self) if layers is not None else None
+        if not layer:
+            return self.config.__getitem__
+        return lambda k: layer[k] if k in layer else self.config[k]
 
     def get_keyconf(self, k):
         if k not in self.config_keys:
@@ -181,39 +1016,36 @@ class FfurfConfig:
     def get_source(self, k):
         if k not in self.config_keys:
             raise KeyError(k)
-        return str(self.config[k]["source"])
+        return str(self._keyconf(k)["source"])
 
     def get_clean(self, k):
+        if self.access is not None and k in self.config_keys:
+            self._record_access(k)
+        return self._get_clean(k)
+
+    def _get_clean(self, k):
         if k not in self.config_keys:
             raise KeyError(k)
-
-        v = self[k]
-        if v is None:
-            return ""
-
-        if self.config[k]["secret"]:
-            return "********"
-
-        if isinstance(v, list):
-            v = self.config[k]["separator"].join(str(i) for i in v)
-        else:
-            v = str(v)
-
-        if self.config[k]["partial_secret"]:
-            return "********" + v[-self.config[k]["partial_secret"] :]
-        return v
+        keyconf = self._keyconf(k)
+        return clean_value(keyconf, keyconf["value"])
 
     def key_is_valid(self, k):
         if k not in self.config_keys:
             raise KeyError(k)
-        k, v = k, self.config[k]
+        return self._keyconf_is_valid(k, self._keyconf(k))
+
+    def _keyconf_is_valid(self, k, v):
         if v["value"] is None and not v["optional"]:
             return False
         if v["value"] == "" and not v["optional"] and v["type"] is str:
             return False
-        if v["value"] == [] and not v["optional"]:
+        if (
+            isinstance(v["value"], (list, array.array))
+            and not v["value"]
+            and not v["optional"]
+        ):
             return False
-        return True
+        return not self._key_errors(k)
 
     def is_valid(self):
         for k, v in self.config.items():
@@ -221,9 +1053,49 @@ class FfurfConfig:
                 return False
         return True
 
+    def validation_report(self):
+        """Return every validation failure at once.
+
+        Keys that are unset, blank or fail their constraints are listed
+        under "keys" with their (cleaned) value, source and errors. Failed
+        rules from `add_constraint` are listed under "rules".
+        """
+        keys = {}
+        for k in self:
+            keyconf = self._keyconf(k)
+            errors = []
+            if not keyconf["optional"]:
+                if keyconf["value"] is None:
+                    errors.append("unset")
+                elif is_blank(keyconf["value"]):
+                    errors.append("blank")
+            errors.extend(self._key_errors(k))
+            if errors:
+                keys[k] = {
+                    "value": clean_value(keyconf, keyconf["value"]),
+                    "source": keyconf["source"],
+                    "errors": errors,
+                }
+
+        rules = []
+        for i, (rule_keys, _, _) in enumerate(self.rules):
+            if self._overridden(rule_keys):
+                error = self._run_rule(i, self._keyconf)
+            else:
+                error = self.rule_errors.get(i)
+            if error:
+                rules.append({"keys": list(rule_keys), "error": error})
+
+        return {"valid": not keys and not rules, "keys": keys, "rules": rules}
+
     def validate(self):
         if not self.is_valid():
             self.print_table()
+            report = self.validation_report()
+            for k, failure in report["keys"].items():
+                print("%s: %s" % (k, "; ".join(failure["errors"])))
+            for failure in report["rules"]:
+                print("%s: %s" % (", ".join(failure["keys"]), failure["error"]))
             sys.exit(os.EX_CONFIG)
 
     def set_config_key(self, key, value, source=None, append_source=False):
@@ -231,30 +1103,560 @@ class FfurfConfig:
             frameinfo = getframeinfo(currentframe().f_back)
             source = self.frame_to_source(frameinfo)
 
+        if key not in self.config:
+            raise KeyError(key)
+
         if append_source and self.config[key]["source"] is not None:
             source = "%s,%s" % (self.config[key]["source"], source)
 
-        if key not in self.config:
-            raise KeyError(key)
+        self._commit(key, self._coerce(key, value), source)
 
+    def _coerce(self, key, value):
+        keyconf = self.config[key]
         if value is None:
-            if not self.config[key]["optional"]:
+            if not keyconf["optional"]:
                 raise TypeError("%s cannot be None" % key)
+            return None
+        if self._is_secret_reference(keyconf["secret"], value):
+            # kept as given, and coerced when it is resolved
+            return value
+        if keyconf.get("interpolate") and is_template(value):
+            # kept as given, and rendered from its inputs by _commit
+            self._check_cycle(key, template_inputs(value))
+            self._render(key, value, strict=True)
+            return value
+        try:
+            return coerce_value(
+                keyconf["type"], value, keyconf["separator"], keyconf["compact"]
+            )
+        except (TypeError, ValueError, OverflowError) as e:
+            raise TypeError(key) from e
+
+    def _commit(self, key, value, source, cascade=True):
+        keyconf = self.config[key]
+        update = {
+            "value": value,
+            "source": source,
+            "version": self._next_version(),
+        }
+        if keyconf.get("interpolate"):
+            update.update(self._render(key, value))
+            if update["inputs"] != keyconf["inputs"]:
+                # other templates in a batch may have been set since _coerce
+                self._check_cycle(key, update["inputs"])
+            for ref in keyconf["inputs"]:
+                if ref not in update["inputs"]:
+                    self.dependents[ref].discard(key)
+            for ref in update["inputs"]:
+                self.dependents.setdefault(ref, set()).add(key)
+        if self.journal is not None:
+            self._record_change(key, keyconf, update)
+        keyconf.update(update)
+        self._evaluate(key)
+        if cascade and self.dependents.get(key):
+            # subscribers hear about the key and its dependents at once
+            with self._batch():
+                self._notify(key)
+                self._cascade((key,))
+        elif self.subscribers or self.prefix_subscribers:
+            self._notify(key)
+
+    def enable_journal(self, size=1024):
+        """Start recording the last `size` changes to keys, for `rollback`.
+
+        Changes are kept in a ring buffer, so the oldest are dropped once
+        it is full.
+        """
+        self.journal = deque(maxlen=size)
+        # rollback can't go back before this version
+        self.journal_floor = self.version
+
+    def _record_change(self, key, keyconf, update):
+        # Called with the keyconf before update is applied to it
+        if len(self.journal) == self.journal.maxlen:
+            self.journal_floor = self.journal[0][0]
+        new = update.get("template") or update["value"]
+        # interpolated keys are restored from their template, and exported
+        # as rendered (and masked) then, as the template rarely changes
+        old = keyconf.get("template") or keyconf["value"]
+        rendered = None
+        if keyconf.get("interpolate"):
+            rendered = (
+                clean_value(keyconf, keyconf["value"]),
+                clean_value({**keyconf, **update}, update["value"]),
+            )
+        self.journal.append(
+            (
+                update["version"],
+                key,
+                old,
+                new,
+                keyconf["source"],
+                update["source"],
+                time.time(),
+                rendered,
+            )
+        )
+
+    def rollback(self, to_version):
+        """Undo every change made after `to_version` (a past `version`).
+
+        Keys are restored in one batch, and the restores are journaled in
+        turn. Raises `ValueError` if the journal doesn't go back that far.
+        """
+        if self.journal is None:
+            raise ValueError("No journal to roll back, call enable_journal first")
+        if to_version < self.journal_floor:
+            raise ValueError("Journal does not go back to version %d" % to_version)
+
+        restore = {}
+        for version, key, old, _, old_source, _, _, _ in reversed(self.journal):
+            if version <= to_version:
+                break
+            # the earliest change after to_version holds the value to restore
+            restore[key] = (old, old_source)
+
+        # the values were set before, so they are not coerced again
+        with self._batch():
+            for key, (value, source) in restore.items():
+                self._commit(key, value, source, cascade=False)
+            self._cascade(list(restore))
+        return sorted(restore)
+
+    def export_journal(self):
+        """Return the journal as a list of dicts, oldest first, with secrets masked."""
+        entries = []
+        for entry in self.journal or ():
+            version, key, old, new, old_source, source, timestamp, rendered = entry
+            templates = (None, None)
+            if rendered is not None:
+                templates = (
+                    old if is_template(old) else None,
+                    new if is_template(new) else None,
+                )
+                old, new = rendered
+            else:
+                keyconf = self.config.get(key)
+                if keyconf is not None:
+                    # masked is for the current value only
+                    keyconf = {**keyconf, "masked": None}
+                    old, new = clean_value(keyconf, old), clean_value(keyconf, new)
+            entries.append(
+                {
+                    "version": version,
+                    "key": key,
+                    "old": old,
+                    "new": new,
+                    "old_template": templates[0],
+                    "new_template": templates[1],
+                    "old_source": old_source,
+                    "source": source,
+                    "time": timestamp,
+                }
+            )
+        return entries
+
+    def subscribe(self, keys_or_prefix, callback, executor=None):
+        """Call `callback(changes)` when keys are set.
+
+        `keys_or_prefix` is a list of keys, or a dotted prefix to watch the
+        key of that name and every key under it. `changes` maps each key
+        that was set to its new value, and keys set together (by a load,
+        `from_argparse` or interpolation) arrive in a single call. Given an
+        `executor`, such as a `concurrent.futures.ThreadPoolExecutor`,
+        callbacks are submitted to it instead of being called by the writer.
+        Returns a subscription for `unsubscribe`.
+        """
+        subscription = {"callback": callback, "executor": executor}
+        if isinstance(keys_or_prefix, str):
+            if self._find_node(keys_or_prefix) is None:
+                raise KeyError(keys_or_prefix)
+            subscription["prefix"] = keys_or_prefix
+            self.prefix_subscribers.setdefault(keys_or_prefix, []).append(subscription)
+        else:
+            keys = tuple(keys_or_prefix)
+            for k in keys:
+                if k not in self.config_keys:
+                    raise KeyError(k)
+            subscription["keys"] = keys
+            for k in keys:
+                self.subscribers.setdefault(k, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if "prefix" in subscription:
+            index, names = self.prefix_subscribers, (subscription["prefix"],)
         else:
+            index, names = self.subscribers, subscription["keys"]
+        for name in names:
+            subscriptions = index.get(name, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                # an empty index keeps writes on the fast path
+                index.pop(name, None)
+
+    @contextlib.contextmanager
+    def _batch(self):
+        # Gather notifications until the outermost batch is done
+        if self.pending is not None:
+            yield
+            return
+        self.pending = {}
+        try:
+            yield
+        finally:
+            pending, self.pending = self.pending, None
+            self._deliver(pending)
+
+    def _notify(self, key):
+        subscriptions = list(self.subscribers.get(key, ()))
+        if self.prefix_subscribers:
+            parts = key.split(".")
+            for i in range(1, len(parts) + 1):
+                subscriptions.extend(
+                    self.prefix_subscribers.get(".".join(parts[:i]), ())
+                )
+        if not subscriptions:
+            return
+        pending = self.pending if self.pending is not None else {}
+        for subscription in subscriptions:
+            pending.setdefault(id(subscription), (subscription, {}))[1][key] = None
+        if self.pending is None:
+            self._deliver(pending)
+
+    def _deliver(self, pending):
+        for subscription, keys in pending.values():
+            changes = {k: self._value(self.config[k]) for k in keys}
+            if subscription["executor"] is not None:
+                subscription["executor"].submit(subscription["callback"], changes)
+                continue
             try:
-                value = coerce_value(
-                    self.config[key]["type"],
-                    value,
-                    self.config[key]["separator"],
+                subscription["callback"](changes)
+            except Exception as e:
+                # the keys are already set, so other subscribers still hear
+                sys.stderr.write(
+                    "Subscriber %r failed on %s: %r\n"
+                    % (subscription["callback"], ", ".join(changes), e)
                 )
-            except (TypeError, ValueError) as e:
+
+    def _render(self, key, value, strict=False):
+        # The keyconf fields for an interpolated key holding value. Templates
+        # are rendered and coerced now; their value is None while any input
+        # is unset, or (unless strict) if the result can't be coerced.
+        if not is_template(value):
+            return {"template": None, "inputs": (), "value": value, "masked": None}
+        keyconf = self.config[key]
+        update = {
+            "template": value,
+            "inputs": template_inputs(value),
+            "value": None,
+            "masked": None,
+        }
+        rendered = render_template(value, self._input_value)
+        if rendered is None:
+            return update
+        try:
+            update["value"] = coerce_value(
+                keyconf["type"], rendered, keyconf["separator"], keyconf["compact"]
+            )
+        except (TypeError, ValueError, OverflowError) as e:
+            if strict:
                 raise TypeError(key) from e
+            return update
+        masked = render_template(value, self._input_clean)
+        if masked != rendered:
+            update["masked"] = masked
+        return update
+
+    def _input_value(self, ref):
+        # Read from the config itself, as overrides are not interpolated
+        keyconf = self.config.get(ref)
+        if keyconf is None or keyconf["value"] is None:
+            return None
+        v = self._value(keyconf)
+        if isinstance(v, (list, array.array)):
+            return join_list(v, keyconf["separator"])
+        return str(v)
+
+    def _input_clean(self, ref):
+        keyconf = self.config[ref]
+        return clean_value(keyconf, keyconf["value"])
+
+    def _check_cycle(self, key, inputs):
+        # Raise ValueError if key would end up among its own inputs
+        stack = [(ref, (key, ref)) for ref in inputs]
+        seen = set()
+        while stack:
+            ref, path = stack.pop()
+            if ref == key:
+                raise ValueError("Interpolation cycle: %s" % " -> ".join(path))
+            if ref in seen or ref not in self.config:
+                continue
+            seen.add(ref)
+            stack.extend((r, path + (r,)) for r in self.config[ref].get("inputs") or ())
+
+    def _cascade(self, keys):
+        # Re-render the interpolated keys downstream of keys, each one once,
+        # after all of its own inputs
+        order = []
+        seen = set()
+        for key in keys:
+            if key in seen:
+                continue
+            stack = [(key, iter(self.dependents.get(key, ())))]
+            while stack:
+                k, it = stack[-1]
+                d = next(it, None)
+                if d is None:
+                    stack.pop()
+                    if k in seen:
+                        order.append(k)
+                elif d not in seen:
+                    seen.add(d)
+                    stack.append((d, iter(self.dependents.get(d, ()))))
+        for d in reversed(order):
+            keyconf = self.config[d]
+            if keyconf["template"] is not None:
+                self._commit(d, keyconf["template"], keyconf["source"], cascade=False)
+
+    def get_provenance(self, k):
+        """Return where a key's value came from.
+
+        For interpolated keys, this includes the template and the provenance
+        of each key it was built from.
+        """
+        if k not in self.config_keys:
+            raise KeyError(k)
+        keyconf = self._keyconf(k)
+        return {
+            "key": k,
+            "source": keyconf["source"],
+            "template": keyconf.get("template"),
+            "inputs": [
+                self.get_provenance(ref)
+                for ref in keyconf.get("inputs") or ()
+                if ref in self.config_keys
+            ],
+        }
 
-        self.config[key].update(
-            {
-                "value": value,
-                "source": source,
+    def _apply_batch(self, updates):
+        # Apply (key, value, source) updates all or nothing: every value is
+        # coerced before any of them are written
+        coerced = []
+        for key, value, source in updates:
+            if key not in self.config:
+                raise KeyError(key)
+            coerced.append((key, self._coerce(key, value), source))
+        with self._batch():
+            for key, value, source in coerced:
+                self._commit(key, value, source, cascade=False)
+            self._cascade([key for key, _, _ in coerced])
+
+    def _layer(self, overrides, source):
+        # Coerce overrides into copies of their keyconfs, leaving these alone
+        layer = {}
+        for key, value in overrides.items():
+            if key not in self.config:
+                raise KeyError(key)
+            keyconf = dict(self._keyconf(key))
+            keyconf.update(
+                {
+                    "value": self._coerce(key, value),
+                    "source": source,
+                    # stamped without bumping self.version, as the config
+                    # (and any cache of it) is unchanged for everyone else
+                    "version": next(_version_stamps),
+                }
+            )
+            if keyconf.get("interpolate"):
+                # rendered from the config's inputs, not other overrides
+                keyconf.update(self._render(key, keyconf["value"]))
+            layer[key] = keyconf
+        return layer
+
+    def overlay(self, overrides=None, /, **kwargs):
+        """Return a `FfurfOverlay` of this config with some keys overridden.
+
+        Overrides are given as a dict, or as keyword arguments for keys that
+        are valid python names. Only the overridden keys are copied; all
+        other reads fall through to this config.
+        """
+        return FfurfOverlay(self, {**(overrides or {}), **kwargs})
+
+    @contextlib.contextmanager
+    def override(self, overrides=None, /, **kwargs):
+        """Override some keys until the `with` block exits.
+
+        Overrides are held in a `contextvars.ContextVar`, so they are only
+        seen by the thread or asyncio task that made them (and any tasks it
+        starts), while everyone else keeps reading the shared config.
+        """
+        layer = self._layer({**(overrides or {}), **kwargs}, "ffurf:override")
+        layers = _override_layers.get() or {}
+        layer = {**layers.get(self, {}), **layer}
+        token = _override_layers.set({**layers, self: layer})
+        try:
+            yield self
+        finally:
+            _override_layers.reset(token)
+
+    def snapshot(self):
+        """Return a point-in-time copy of each key's configuration, for `diff`."""
+        return {k: dict(v) for k, v in self.config.items()}
+
+    def diff(self, other):
+        """Return the keys that changed between `other` and this config.
+
+        `other` is an earlier `snapshot` or another `FfurfConfig`. Keys whose
+        version stamps match were not written since, and are skipped without
+        comparing their values. Values are masked with `clean_value`.
+        """
+        old = other.config if isinstance(other, FfurfConfig) else other
+        added, removed, changed = {}, {}, {}
+
+        for k, new_conf in self.config.items():
+            old_conf = old.get(k)
+            if old_conf is None:
+                added[k] = {
+                    "value": clean_value(new_conf, new_conf["value"]),
+                    "source": new_conf["source"],
+                }
+            elif old_conf.get("version") == new_conf["version"]:
+                continue
+            elif old_conf["value"] != new_conf["value"]:
+                changed[k] = {
+                    "old": clean_value(old_conf, old_conf["value"]),
+                    "new": clean_value(new_conf, new_conf["value"]),
+                    "old_source": old_conf["source"],
+                    "new_source": new_conf["source"],
+                }
+
+        for k in old.keys() - self.config.keys():
+            removed[k] = {
+                "value": clean_value(old[k], old[k]["value"]),
+                "source": old[k]["source"],
             }
+
+        return {"added": added, "removed": removed, "changed": changed}
+
+    def memory_report(self, load=None, top=10):
+        """Return a `FfurfMemoryReport` of the bytes held by each key.
+
+        If `load` is given, it is called with this config under tracemalloc
+        first (e.g. `lambda c: c.from_toml(path)`), and the `top` places that
+        allocated the most during it are included in the report.
+        """
+        from ffurf.memory import FfurfMemoryReport, profile_allocations
+
+        allocations = None
+        if load is not None:
+            allocations = profile_allocations(load, self, top=top)
+        return FfurfMemoryReport(self, allocations=allocations)
+
+    def to_module(self, class_name="FfurfSettings", fp=None):
+        """Return python source for a `__slots__` class with an attribute per key.
+
+        The class defaults to the current values (but None for secrets and
+        partial secrets), and its `from_env`, `to_env`, `to_json` and
+        `is_valid` have each key's variable name, coercion and constraints
+        written out, so a program can import it rather than building the
+        config at startup. If `fp` is given, the source is also written
+        there. Raises `ValueError` for anything that cannot be written out.
+        """
+        from ffurf.codegen import generate_module
+
+        source = generate_module(self, class_name=class_name)
+        if fp is not None:
+            with open(fp, "w") as module_fh:
+                module_fh.write(source)
+        return source
+
+    def dump_snapshot(self):
+        """Serialise the schema, values and sources into a compact binary blob.
+
+        The blob is read back with `FfurfConfig.load_snapshot`, which skips
+        parsing and coercion entirely. Secrets are written in the clear, and
+        secret references as references, to be resolved by the resolver
+        given to `load_snapshot`. Raises `ValueError` for key types or
+        values that cannot be written.
+        """
+        if self.rules:
+            raise ValueError("Cannot snapshot a config with add_constraint rules")
+        entries = []
+        for k, keyconf in self.config.items():
+            if keyconf["check"] is not None:
+                raise ValueError("Cannot snapshot %s, it has a custom check" % k)
+            entry = {f: v for f, v in keyconf.items() if f not in SNAPSHOT_SKIP_FIELDS}
+            entry["type"] = type_to_spec(keyconf["type"])
+            if isinstance(entry["value"], array.array):
+                entry["value"] = entry["value"].tobytes()
+            entries.append((k, entry))
+
+        payload = marshal.dumps(tuple(entries), SNAPSHOT_MARSHAL_VERSION)
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(payload), zlib.crc32(payload)
+        )
+        return header + payload
+
+    @classmethod
+    def load_snapshot(cls, blob, secret_resolver=None):
+        """Build a config from a `dump_snapshot` blob.
+
+        Pass the `secret_resolver` the snapshotted config was using, if any,
+        to resolve its secret references. Raises `ValueError` if the blob is
+        truncated, corrupt or was written by a different snapshot format
+        version.
+        """
+        blob = memoryview(blob)
+        if len(blob) < SNAPSHOT_HEADER.size:
+            raise ValueError("Snapshot is truncated")
+        magic, version, length, crc = SNAPSHOT_HEADER.unpack_from(blob)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Not an ffurf snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(
+                "Snapshot format version %d is not supported (expected %d)"
+                % (version, SNAPSHOT_VERSION)
+            )
+        payload = blob[SNAPSHOT_HEADER.size :]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            raise ValueError("Snapshot is corrupt")
+
+        ffurf = cls(secret_resolver=secret_resolver)
+        for k, keyconf in marshal.loads(payload):
+            keyconf["name"] = k
+            keyconf["type"] = spec_to_type(keyconf["type"])
+            keyconf["version"] = ffurf._next_version()
+            if keyconf["compact"] and keyconf["value"] is not None:
+                _, elem_type = list_elem_type(keyconf["type"])
+                value = array.array(COMPACT_TYPECODES[elem_type])
+                value.frombytes(keyconf["value"])
+                keyconf["value"] = value
+            ffurf._install_keyconf(k, keyconf)
+        return ffurf
+
+    def publish_shared(self, name=None, size=None):
+        """Publish this config to other processes through shared memory.
+
+        Returns a `ffurf.shared.FfurfSharedConfig` owning the segment. Workers
+        read it with `FfurfConfig.attach_shared(name)`.
+        """
+        from ffurf.shared import FfurfSharedConfig
+
+        return FfurfSharedConfig(self, name=name, size=size)
+
+    @staticmethod
+    def attach_shared(name, auto_refresh=True, secret_resolver=None):
+        """Attach a read-only view of a config published with `publish_shared`.
+
+        Pass a `secret_resolver` if the published config holds secret
+        references, for the view to resolve them.
+        """
+        from ffurf.shared import FfurfSharedView
+
+        return FfurfSharedView(
+            name, auto_refresh=auto_refresh, secret_resolver=secret_resolver
         )
 
     @staticmethod
@@ -268,10 +1670,14 @@ class FfurfConfig:
         elif isinstance(thing, dict):
             self.from_dict(thing, **kwargs)
         elif isinstance(thing, str):
-            if thing.endswith("toml"):
+            if thing.startswith(("http://", "https://")):
+                self.from_url(thing, **kwargs)
+            elif thing.endswith("toml"):
                 self.from_toml(thing, **kwargs)
             elif thing.endswith("json"):
                 self.from_json(thing, **kwargs)
+            elif thing.endswith(".env"):
+                self.from_dotenv(thing, **kwargs)
             else:
                 raise ValueError("Unknown file config type: %s" % thing)
         else:
@@ -284,121 +1690,463 @@ class FfurfConfig:
         return self._from_dict(d, source=source, profile=profile)
 
     def _from_dict(self, d, source="src", profile=None):
+        self._apply_resolved(self._resolve_dict(d, source, profile))
 
-        for k in self.config:
-
-            # Try and get key from the root
-            if k in d:
-                self.set_config_key(k, d[k], "%s" % source)
-
-            # Load key from default config
-            if k in d.get("default", {}):
-                self.set_config_key(k, d["default"][k], "%s:default" % source)
-
-            if profile:
-                # Allow profile to override top level config
-                if k in d.get("profile", {}).get(profile, {}):
-                    self.set_config_key(
-                        k,
-                        d["profile"][profile][k],
-                        "%s:profile.%s" % (source, profile),
+    def _apply_resolved(self, resolved):
+        # Interpolated keys are re-rendered once, after every key is set
+        committed = []
+        with self._batch():
+            try:
+                for k, (v, key_source) in resolved.items():
+                    self._commit(k, self._coerce(k, v), key_source, cascade=False)
+                    committed.append(k)
+            finally:
+                self._cascade(committed)
+
+    def _flatten(self, d, key_source, resolved, prefix="", skip=()):
+        # Map a table onto config keys in one pass over the table, following
+        # nested tables down the prefix index so {"db": {"host": ..}} and
+        # {"db.host": ..} both reach the "db.host" key
+        for name, v in d.items():
+            if not isinstance(name, str) or name in skip:
+                continue
+            k = prefix + name
+            if isinstance(v, dict):
+                node = self._find_node(k)
+                # a table holds the keys below k, unless k is a dict key itself
+                if node is not None and (
+                    node["key"] is None
+                    or (node["children"] and self.config[k]["type"] is not dict)
+                ):
+                    self._flatten(v, key_source, resolved, k + ".")
+                    continue
+            if k in self.config_keys:
+                resolved[k] = (v, key_source)
+
+    def _resolve_dict(self, d, source="src", profile=None):
+        # Returns {key: (value, source)} for the winning value of each key,
+        # where the profile overrides the profiles it extends, which override
+        # default, which overrides the root
+        resolved = {}
+        sections = {"default", "profile"} - self.config_keys
+        self._flatten(d, source, resolved, skip=sections)
+
+        default = d.get("default")
+        if isinstance(default, dict):
+            self._flatten(default, "%s:default" % source, resolved)
+
+        if profile:
+            # Allow profile to override top level config
+            skip = {"extends"} - self.config_keys
+            for name, profile_d in reversed(self._profile_chain(d, profile)):
+                self._flatten(
+                    profile_d, "%s:profile.%s" % (source, name), resolved, skip=skip
+                )
+        return resolved
+
+    def _profile_chain(self, d, profile):
+        # [(name, table), ...] from profile to the furthest profile it extends
+        profiles = d.get("profile")
+        if not isinstance(profiles, dict):
+            return []
+        chain = []
+        names = []
+        name = profile
+        while name and name != "default":
+            if name in names:
+                raise ValueError(
+                    "Profile %s extends itself: %s"
+                    % (name, " -> ".join(names + [name]))
+                )
+            profile_d = profiles.get(name)
+            if not isinstance(profile_d, dict):
+                if names:
+                    raise ValueError(
+                        "Profile %s extends unknown profile %s" % (names[-1], name)
                     )
+                break
+            names.append(name)
+            chain.append((name, profile_d))
+            name = None if "extends" in self.config_keys else profile_d.get("extends")
+        return chain
+
+    def _load_document(self, fp, parse, profile=None):
+        # Parsed documents are kept until the file changes, along with the
+        # maps resolved from them for each profile, so reloading an
+        # unchanged file skips parsing and resolving its profile chain
+        st = os.stat(fp)
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        cached = self.documents.get(fp)
+        if cached is None or cached["stamp"] != stamp:
+            cached = {"stamp": stamp, "document": parse(fp), "resolved": {}}
+            self.documents[fp] = cached
+        if cached.get("schema") != len(self.config_keys):
+            # keys were added since, so the maps may be missing some
+            cached["resolved"].clear()
+            cached["schema"] = len(self.config_keys)
+
+        resolved = cached["resolved"].get(profile)
+        if resolved is None:
+            resolved = self._resolve_dict(cached["document"], fp, profile)
+            cached["resolved"][profile] = resolved
+        return resolved
 
     @staticmethod
     def key_to_envkey(k):
         return "".join([ch if ch.isalnum() else "_" for ch in k]).upper()
 
     def from_env(self):
-        for k in self.config:
-            env_k = self.key_to_envkey(k)
-            env_v = os.getenv(env_k)
-            if env_v:
-                self._from_dict({k: env_v}, "env:%s" % env_k)
+        with self._batch():
+            for env_k, keys in self.env_keys.items():
+                env_v = os.getenv(env_k)
+                if env_v:
+                    for k in keys:
+                        self.set_config_key(k, env_v, "env:%s" % env_k)
+
+    def from_dotenv(self, dotenv_fp):
+        if not os.path.exists(dotenv_fp):
+            sys.stderr.write("Could not open dotenv: %s\n" % dotenv_fp)
+            raise OSError()
+
+        env = {}
+        with open(dotenv_fp) as dotenv_fh:
+            for env_k, env_v in iter_dotenv(dotenv_fh, wanted=self.env_keys):
+                env[env_k] = env_v
+
+        # Like from_env, blank variables are left alone
+        self._apply_batch(
+            (k, env_v, "%s:%s" % (dotenv_fp, env_k))
+            for env_k, env_v in env.items()
+            if env_v
+            for k in self.env_keys[env_k]
+        )
+
+    def export(self, fmt, names=None):
+        """Return the config written in the format registered as `fmt`.
+
+        Formats include "env", "json", "toml", "groovy", "dictstr", "yaml" and
+        "shell" (`export` lines), and more can be added with
+        `ffurf.exporters.register_exporter`. `names` yields (name to write,
+        config key) pairs, and defaults to every key under its own name.
+        """
+        from ffurf.exporters import export
+
+        return export(self, fmt, names)
 
     # TODO test
     def to_toml(self, default=""):
-        return toml.dumps({k: self.get(k, default="") for k in self})
+        return self.export("toml")
 
     # TODO test
     def to_json(self, default=""):
-        return json.dumps({k: self.get(k, default="") for k in self})
+        return self.export("json")
 
     # TODO test
     def to_env(self, default=""):
-        env_lines = []
-        for k in self:
-            v = self[k]
-            if isinstance(v, list):
-                v = self.config[k]["separator"].join(str(i) for i in v)
-            env_lines.append('%s="%s"' % (self.key_to_envkey(k), str(v)))
-        return "\n".join(env_lines)
+        return self.export("env")
+
+    def to_yaml(self):
+        return self.export("yaml")
+
+    def to_shell(self):
+        return self.export("shell")
+
+    def to_env_dict(self):
+        """Return the config as a dict of environment variables.
+
+        Values are written as for `to_env`, with lists joined by their
+        separator, and unset keys as empty strings (which `from_env` skips).
+        The dict is cached until a key is next written or added, so calling
+        this for every subprocess costs a copy rather than formatting.
+        Secret references are resolved again on every call, so rotated
+        secrets are picked up once the resolver's cache expires.
+        """
+        layers = _override_layers.get()
+        if layers is not None and layers.get(self):
+            # overrides are only seen by this context, so are never cached
+            return self._env_dict()
+        cache = self.env_cache
+        if cache is None or cache["state"] != self._state():
+            references = [
+                (k, k)
+                for k in self
+                if self._is_secret_reference(
+                    self.config[k]["secret"], self.config[k]["value"]
+                )
+            ]
+            cache = self.env_cache = {
+                "state": self._state(),
+                "env": self._env_dict(),
+                "references": references,
+            }
+        env = dict(cache["env"])
+        if cache["references"]:
+            env.update(self._env_dict(cache["references"]))
+        return env
+
+    def _env_dict(self, names=None):
+        from ffurf.exporters import EnvDictExporter, export
+
+        return export(self, EnvDictExporter(), names)
+
+    def env_for_subprocess(self, base=os.environ):
+        """Return `base` with the config's environment variables added, for
+        passing as `env=` to `subprocess`.
+        """
+        env = dict(base)
+        env.update(self.to_env_dict())
+        return env
+
+    def _state(self):
+        # changes whenever any key is written or added
+        return self.version
 
     # TODO test
     def to_dictstr(self, default=""):
-        return str({k: self.get(k, default="") for k in self})
+        return self.export("dictstr")
 
     # TODO test
     def to_groovy(self, default=""):
-        head = "params {"
-        tail = "}"
-        lines = [head]
-        for k in self:
-            v = self.get(k, default="")
-            if isinstance(v, list):
-                v = "[%s]" % ", ".join(
-                    f'"{i}"' if isinstance(i, str) else str(i) for i in v
-                )
-            elif type(v) == str:
-                if v == "":
-                    # empty strings to null
-                    v = "null"
-                else:
-                    v = f'"{v}"'
-            elif type(v) == None:
-                v = "null"
-            elif type(v) == bool:
-                if v:
-                    v = "true"
-                else:
-                    v = "false"
-            lines.append(f"    {k} = {v}")
-
-        lines.append(tail)
-        return '\n'.join(lines)
+        return self.export("groovy")
 
     # TODO test
     def to_argparse(self, default=""):
+        """Return an `ArgumentParser` with an option for each key.
+
+        The parser is built once and kept until keys are added, with only
+        the defaults of keys set since the last call brought up to date.
+        As it is shared, use it as a parent (`parents=[...]`) rather than
+        adding your own arguments to it.
+        """
+        cache = self.argparse_cache
+        if cache is None or cache["schema"] != len(self.config_keys):
+            cache = self._build_argparse()
+        else:
+            versions = cache["versions"]
+            for k, action in cache["actions"].items():
+                keyconf = self.config[k]
+                if versions[k] != keyconf["version"]:
+                    self._set_argparse_default(action, keyconf)
+                    versions[k] = keyconf["version"]
+        return cache["parser"]
+
+    def _build_argparse(self):
         parser = argparse.ArgumentParser(add_help=False)
+        actions = {}
         for k, v in self.config.items():
-            default_str = f" [default: {v['value']}]" if v["value"] is not None else ""
             is_list, elem_type = list_elem_type(v["type"])
             type_kwargs = (
                 {"type": elem_type or str, "nargs": "*"}
                 if is_list
                 else {"type": v["type"]}
             )
-            parser.add_argument(
-                f"--{k}",
-                required=not v["optional"] and v["value"] is None,
-                default=v["value"],
-                help="" + default_str,
-                **type_kwargs,
+            actions[k] = parser.add_argument(f"--{k}", **type_kwargs)
+            self._set_argparse_default(actions[k], v)
+
+        self.argparse_cache = {
+            "parser": parser,
+            "schema": len(self.config_keys),
+            "actions": actions,
+            "versions": {k: self.config[k]["version"] for k in actions},
+            "dests": {action.dest: k for k, action in actions.items()},
+        }
+        return self.argparse_cache
+
+    @staticmethod
+    def _set_argparse_default(action, v):
+        default_str = f" [default: {v['value']}]" if v["value"] is not None else ""
+        action.required = not v["optional"] and v["value"] is None
+        action.default = v["value"]
+        action.help = "" + default_str
+
+    def from_argparse(self, namespace_or_argv=None):
+        """Apply the options given on the command line, in one batch.
+
+        Takes a list of arguments (or None, for `sys.argv`) to parse with
+        `to_argparse`, or a namespace already parsed by a parser built on
+        it, in which case options still holding their default are taken as
+        not given. Only given options are set, with a source of
+        "cli:--key". If any fails to coerce, none are set.
+        """
+        parser = self.to_argparse()
+        dests = self.argparse_cache["dests"]
+        if isinstance(namespace_or_argv, argparse.Namespace):
+            given = (
+                (dest, getattr(namespace_or_argv, dest))
+                for dest in dests
+                if hasattr(namespace_or_argv, dest)
             )
-        return parser
+            given = [
+                (dest, v) for dest, v in given if v != self.config[dests[dest]]["value"]
+            ]
+        else:
+            # argparse only fills in defaults for options missing from the
+            # namespace, so anything still unset was not given
+            namespace = argparse.Namespace(**dict.fromkeys(dests, _UNSET))
+            parser.parse_args(namespace_or_argv, namespace=namespace)
+            given = [
+                (dest, v) for dest, v in vars(namespace).items() if v is not _UNSET
+            ]
+
+        self._apply_batch(
+            (dests[dest], v, "cli:--%s" % dests[dest]) for dest, v in given
+        )
 
-    def from_toml(self, toml_fp, profile=None):
+    def from_toml(self, toml_fp, profile=None, selective=False):
         if not os.path.exists(toml_fp):
             sys.stderr.write("Could not open toml: %s\n" % toml_fp)
             raise OSError()
 
-        toml_config = toml.load(toml_fp)
-        self._from_dict(toml_config, source=toml_fp, profile=profile)
+        if selective:
+            from ffurf.selective import filter_toml, read_toml_profile_extends
 
-    def from_json(self, json_fp, profile=None):
+            with open(toml_fp) as toml_fh:
+                chain = self._selective_chain(
+                    profile, lambda: read_toml_profile_extends(toml_fh)
+                )
+                toml_fh.seek(0)
+                select = self._selector(chain)
+                toml_config = toml.loads("".join(filter_toml(toml_fh, select)))
+            self._from_dict(toml_config, source=toml_fp, profile=profile)
+        else:
+            self._apply_resolved(self._load_document(toml_fp, toml.load, profile))
+
+    def from_json(self, json_fp, profile=None, selective=False):
         if not os.path.exists(json_fp):
             sys.stderr.write("Could not open json: %s\n" % json_fp)
             raise OSError()
 
-        with open(json_fp) as json_fh:
-            json_config = json.load(json_fh)
-        self._from_dict(json_config, source=json_fp, profile=profile)
+        if selective:
+            from ffurf.selective import load_json, read_json_profile_extends
+
+            chain = self._selective_chain(
+                profile, lambda: read_json_profile_extends(json_fp)
+            )
+            json_config = load_json(json_fp, self._selector(chain))
+            self._from_dict(json_config, source=json_fp, profile=profile)
+        else:
+            self._apply_resolved(self._load_document(json_fp, read_json, profile))
+
+    def from_url(self, url, profile=None, timeout=10, pool=None):
+        """Fetch a json or toml document over http(s) and apply it.
+
+        Requests are conditional on the ETag and Last-Modified of the last
+        document applied from `url`, over a shared pool of keep-alive
+        connections. Only keys whose value or source differs from that
+        document are set, and an unchanged document is resolved again if
+        `profile` differs. If the fetch fails after a document has been
+        applied, the config is left as it was and a warning is written.
+        Returns True if any key was set.
+        """
+        import http.client
+
+        from ffurf.remote import fetch_document
+
+        state = self.url_state.setdefault(url, {})
+        try:
+            document, validators = fetch_document(url, state, timeout, pool)
+            if document is None:
+                if profile == state.get("profile"):
+                    return False
+                # unchanged, but the last document is resolved for this profile
+                document, validators = state["document"], {}
+            resolved = self._resolve_dict(document, source=url, profile=profile)
+            last = state.get("resolved", {})
+            self._apply_batch(
+                (k, v, key_source)
+                for k, (v, key_source) in resolved.items()
+                if last.get(k) != (v, key_source)
+            )
+        except (OSError, ValueError, TypeError, http.client.HTTPException) as e:
+            if "resolved" not in state:
+                raise
+            sys.stderr.write(
+                "Could not load %s, keeping last good config: %s\n" % (url, e)
+            )
+            return False
+
+        changed = resolved != state.get("resolved")
+        state.update(validators, resolved=resolved, document=document, profile=profile)
+        return changed
+
+    def _selective_chain(self, profile, read_extends):
+        # Names of the profiles in profile's chain, from a first pass over the
+        # document that reads only the extends key of each profile
+        if not profile or "profile" in self.config_keys:
+            return set()
+        return {name for name, _ in self._profile_chain(read_extends(), profile)}
+
+    def _selector(self, chain=()):
+        # Returns a select(path) callback for ffurf.selective, choosing the
+        # same values from a document that _resolve_dict would use, given
+        # the names of the profiles in the chain of the profile asked for
+        sections = {"default", "profile"} - self.config_keys
+        extends = {"extends"} - self.config_keys
+
+        def select(path):
+            if path[0] in sections:
+                if path[0] == "profile":
+                    if not chain or (len(path) > 1 and path[1] not in chain):
+                        return None
+                    path = path[1:]
+                    if len(path) == 2 and path[1] in extends:
+                        return "take"
+                path = path[1:]
+                if not path:
+                    return "descend"
+
+            k = ".".join(path)
+            if k in self.config_keys:
+                return "take"
+            if self._find_node(k) is not None:
+                return "descend"
+            return None
+
+        return select
+
+
+class FfurfOverlay(FfurfConfig):
+    """A copy-on-write layer over a parent config.
+
+    Keys written to the overlay are copied into it; everything else is read
+    from the parent, including later changes to the parent. Keys cannot be
+    added to an overlay.
+    """
+
+    def __init__(self, parent, overrides=None):
+        super().__init__(parent.secret_resolver)
+        self.parent = parent
+        self.version = parent.version
+        # the schema is the parent's, and its values, errors and dependents
+        # are read through until they are written here
+        self.config = ChainMap({}, parent.config)
+        self.config_keys = parent.config_keys
+        self.key_tree = parent.key_tree
+        self.env_keys = parent.env_keys
+        self.checks = parent.checks
+        self.kinds = parent.kinds
+        self.key_errors = ChainMap({}, parent.key_errors)
+        self.rules = parent.rules
+        self.rules_by_key = parent.rules_by_key
+        self.rule_errors = ChainMap({}, parent.rule_errors)
+        # copied by _commit if a write here changes an interpolated key's inputs
+        self.dependents = parent.dependents
+        if overrides:
+            self._apply_batch((k, v, "ffurf:overlay") for k, v in overrides.items())
+
+    def add_config_key(self, key, *args, **kwargs):
+        raise TypeError("Cannot add %s to an overlay, add it to the parent" % key)
+
+    def _state(self):
+        # writes to the parent show through, so its version counts too
+        return (self.version, self.parent._state())
+
+    def _commit(self, key, value, source, cascade=True):
+        layer = self.config.maps[0]
+        if key not in layer:
+            layer[key] = dict(self.config[key])
+        if self.dependents is self.parent.dependents and layer[key].get("interpolate"):
+            inputs = template_inputs(value) if is_template(value) else ()
+            if inputs != layer[key]["inputs"]:
+                self.dependents = {k: set(v) for k, v in self.dependents.items()}
+        super()._commit(key, value, source, cascade)
@@ -0,0 +1,52 @@
+import argparse
+import sys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m ffurf")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    check_parser = commands.add_parser(
+        "check", help="validate config files against a schema"
+    )
+    check_parser.add_argument(
+        "schema",
+        help="module:attr (or path/to/file.py:attr) of a FfurfConfig, or a function returning one; attr defaults to ffurf",
+    )
+    check_parser.add_argument(
+        "files", nargs="+", help="toml, json or .env files to check"
+    )
+    check_parser.add_argument(
+        "--profile", help="profile to load from each toml or json file"
+    )
+    check_parser.add_argument(
+        "-j", "--jobs", type=int, help="worker processes (default: one per cpu)"
+    )
+    check_parser.add_argument(
+        "--json",
+        dest="json_fp",
+        metavar="PATH",
+        help="also write results as json to PATH (- for stdout, instead of the tables)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "check":
+        from ffurf.check import check, load_schema
+
+        try:
+            # fail early, rather than in every worker
+            load_schema(args.schema)
+        except Exception as e:
+            # a missing or broken schema file, or a function that failed
+            parser.error("could not load schema %s: %s" % (args.schema, e))
+        return check(
+            args.schema,
+            args.files,
+            profile=args.profile,
+            jobs=args.jobs,
+            json_fp=args.json_fp,
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Validate many config files against a schema, for `python -m ffurf check`."""
+import importlib
+import importlib.util
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from ffurf import FfurfConfig
+
+# The schema each worker process loads once, and checks every file against
+_schema = None
+
+
+def load_schema(spec):
+    """Load the `FfurfConfig` named by "module:attr" or "path/to/file.py:attr".
+
+    `attr` defaults to "ffurf", and may be a function returning the config.
+    """
+    module_name, _, attr = spec.partition(":")
+    if module_name.endswith(".py"):
+        module_spec = importlib.util.spec_from_file_location(
+            "ffurf_schema", module_name
+        )
+        if module_spec is None:
+            raise ImportError("Could not import schema from %s" % module_name)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(module_name)
+
+    schema = getattr(module, attr or "ffurf")
+    if callable(schema) and not isinstance(schema, FfurfConfig):
+        schema = schema()
+    if not isinstance(schema, FfurfConfig):
+        raise TypeError("%s is not a FfurfConfig" % spec)
+    return schema
+
+
+def init_worker(spec):
+    global _schema
+    _schema = load_schema(spec)
+
+
+def check_file(path, profile=None):
+    """Load `path` over the schema and return its validation result.
+
+    Each file is loaded into an overlay, so the schema is never changed and
+    is shared by every file a worker checks.
+    """
+    result = {"path": path, "valid": False, "error": None, "keys": {}, "rules": []}
+    config = _schema.overlay()
+    try:
+        if profile is not None and not path.endswith(".env"):
+            # dotenv files have no profiles, so are loaded whole
+            config.load(path, profile=profile)
+        else:
+            config.load(path)
+    except (OSError, ValueError, TypeError, KeyError) as e:
+        result["error"] = "%s: %s" % (
+            type(e).__name__,
+            str(e) or "could not read %s" % path,
+        )
+        return result
+
+    report = config.validation_report()
+    result.update(report)
+    if not report["valid"]:
+        table = io.StringIO()
+        config.print_table(file=table, invalid=True)
+        result["table"] = table.getvalue()
+    return result
+
+
+def _check_all(spec, paths, profile, jobs):
+    if jobs == 1 or len(paths) == 1:
+        init_worker(spec)
+        return [check_file(path, profile) for path in paths]
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=init_worker, initargs=(spec,)
+    ) as pool:
+        chunksize = max(1, len(paths) // (jobs * 4))
+        return list(
+            pool.map(check_file, paths, [profile] * len(paths), chunksize=chunksize)
+        )
+
+
+def write_results(results, out):
+    for result in results:
+        if result["valid"]:
+            continue
+        print("== %s" % result["path"], file=out)
+        if result["error"]:
+            print(result["error"], file=out)
+            continue
+        out.write(result["table"])
+        for k, failure in result["keys"].items():
+            print("%s: %s" % (k, "; ".join(failure["errors"])), file=out)
+        for failure in result["rules"]:
+            print("%s: %s" % (", ".join(failure["keys"]), failure["error"]), file=out)
+        print(file=out)
+
+    n_valid = sum(result["valid"] for result in results)
+    print("%d of %d files valid" % (n_valid, len(results)), file=out)
+
+
+def check(spec, paths, profile=None, jobs=None, json_fp=None, out=None):
+    """Check each file in `paths` against the schema `spec`.
+
+    Failures are written to `out` (stdout) in the style of `print_table`,
+    and all results to `json_fp` as json ("-" for stdout). Returns 0 if
+    every file is valid, or `os.EX_CONFIG`, as `FfurfConfig.validate` does.
+    """
+    out = out or sys.stdout
+    jobs = jobs or os.cpu_count() or 1
+    results = _check_all(spec, list(paths), profile, jobs)
+    valid = all(result["valid"] for result in results)
+    summary = {
+        "valid": valid,
+        "files": [{k: v for k, v in r.items() if k != "table"} for r in results],
+    }
+
+    if json_fp == "-":
+        json.dump(summary, out)
+        out.write("\n")
+    else:
+        write_results(results, out)
+        if json_fp:
+            with open(json_fp, "w") as json_fh:
+                json.dump(summary, json_fh)
+    return 0 if valid else os.EX_CONFIG
@@ -0,0 +1,239 @@
+"""Generate a python module with a typed class for a schema, for `FfurfConfig.to_module`."""
+import array
+import builtins
+import json
+import keyword
+import math
+import re
+
+from ffurf import COMPACT_TYPECODES, list_elem_type
+
+# Names the generated class uses itself
+_RESERVED = frozenset(("from_env", "to_env", "to_json", "is_valid", "KEYS"))
+
+_LITERAL_TYPES = (str, int, float, bool, type(None))
+
+
+def attr_name(key):
+    name = re.sub(r"\W", "_", key)
+    if name[:1].isdigit():
+        name = "_" + name
+    if keyword.iskeyword(name) or name in _RESERVED:
+        name += "_"
+    return name
+
+
+def type_expr(key_type, imports):
+    # A python expression naming key_type, adding any import it needs
+    if getattr(builtins, key_type.__name__, None) is key_type:
+        return key_type.__name__
+    imports.add(key_type.__module__)
+    return "%s.%s" % (key_type.__module__, key_type.__qualname__)
+
+
+def literal(v, key):
+    # Python source for a default value
+    if isinstance(v, float) and not math.isfinite(v):
+        return "float(%r)" % repr(v)
+    if isinstance(v, _LITERAL_TYPES):
+        return repr(v)
+    if isinstance(v, array.array):
+        return "array.array(%r, %r)" % (v.typecode, v.tolist())
+    if isinstance(v, list) and all(isinstance(i, _LITERAL_TYPES) for i in v):
+        return "[%s]" % ", ".join(literal(i, key) for i in v)
+    raise ValueError("Cannot generate a default for %s from %r" % (key, v))
+
+
+def coerce_expr(keyconf, imports):
+    # An expression coercing the string v as coerce_value would
+    is_list, elem_type = list_elem_type(keyconf["type"])
+    if not is_list:
+        if keyconf["type"] is str:
+            return "v"
+        return "%s(v)" % type_expr(keyconf["type"], imports)
+
+    sep = repr(keyconf["separator"])
+    if keyconf["compact"]:
+        typecode = repr(COMPACT_TYPECODES[elem_type])
+        return "array.array(%s, map(%s, v.split(%s)) if v.strip() else ())" % (
+            typecode,
+            elem_type.__name__,
+            sep,
+        )
+    item = "x.strip()"
+    if elem_type is not None and elem_type is not str:
+        item = "%s(x.strip())" % type_expr(elem_type, imports)
+    return "[%s for x in v.split(%s)] if v.strip() else []" % (item, sep)
+
+
+def annotation(keyconf, imports):
+    is_list, elem_type = list_elem_type(keyconf["type"])
+    if keyconf["compact"]:
+        return "array.array | None"
+    if is_list:
+        if elem_type is None:
+            return "list | None"
+        return "list[%s] | None" % type_expr(elem_type, imports)
+    return "%s | None" % type_expr(keyconf["type"], imports)
+
+
+def _check_lines(attr, keyconf, patterns):
+    # Lines returning False if v fails its constraints; unset values pass
+    is_list, _ = list_elem_type(keyconf["type"])
+    x = "x" if is_list else "v"
+    conditions = []
+    if keyconf.get("min_value") is not None:
+        conditions.append("%s < %s" % (x, literal(keyconf["min_value"], attr)))
+    if keyconf.get("max_value") is not None:
+        conditions.append("%s > %s" % (x, literal(keyconf["max_value"], attr)))
+    if keyconf.get("pattern") is not None:
+        patterns.append((attr, keyconf["pattern"]))
+        conditions.append("_PATTERN_%s.fullmatch(str(%s)) is None" % (attr, x))
+    if keyconf.get("choices") is not None:
+        choices = "".join("%s, " % literal(c, attr) for c in keyconf["choices"])
+        conditions.append("%s not in (%s)" % (x, choices.rstrip()))
+    if not conditions:
+        return []
+    failed = " or ".join(conditions)
+    if is_list:
+        failed = "any(%s for x in v)" % failed
+    if keyconf["optional"]:
+        failed = "v is not None and (%s)" % failed
+    return ["if %s:" % failed, "    return False"]
+
+
+def generate_module(config, class_name="FfurfSettings"):
+    """Return the source of a module holding a `__slots__` class for `config`.
+
+    Each key becomes a typed attribute, defaulting to the key's current
+    value, or None for secrets and partial secrets. The class has a
+    `from_env` with each key's variable name and coercion written out,
+    `to_env` and `to_json` matching `FfurfConfig`'s, an `is_valid`
+    including min/max, pattern and choices constraints, and `[]` by key
+    name. Custom checks, rules and interpolated keys can't be written out,
+    and raise `ValueError`.
+    """
+    if config.rules:
+        raise ValueError(
+            "Cannot generate a module for a config with add_constraint rules"
+        )
+    if config.secret_resolver is not None:
+        raise ValueError("Cannot generate a module for a config with a secret resolver")
+
+    keys = sorted(config.config_keys)
+    attrs = {}
+    for k in keys:
+        keyconf = config.config[k]
+        if keyconf.get("check") is not None:
+            raise ValueError(
+                "Cannot generate a module for %s, it has a custom check" % k
+            )
+        if keyconf.get("interpolate"):
+            raise ValueError("Cannot generate a module for %s, it is interpolated" % k)
+        attr = attr_name(k)
+        if attr in attrs.values():
+            raise ValueError("%s and another key are both written as %s" % (k, attr))
+        attrs[k] = attr
+
+    imports = set()
+    patterns = []
+    body = []
+    for k in keys:
+        body.append("    %s: %s" % (attrs[k], annotation(config.config[k], imports)))
+    body.append("")
+    body.append("    __slots__ = %r" % (tuple(attrs[k] for k in keys),))
+    body.append("")
+    body.append("    # attribute for each key")
+    body.append("    KEYS = {%s}" % ", ".join("%r: %r" % (k, attrs[k]) for k in keys))
+
+    body.append("")
+    body.append("    def __init__(self):")
+    for k in keys:
+        keyconf = config.config[k]
+        # secrets are left for from_env, rather than written into the source
+        v = None if keyconf["secret"] or keyconf["partial_secret"] else keyconf["value"]
+        body.append("        self.%s = %s" % (attrs[k], literal(v, k)))
+    if not keys:
+        body.append("        pass")
+
+    body.append("")
+    body.append("    @classmethod")
+    body.append("    def from_env(cls, environ=os.environ):")
+    body.append("        self = cls()")
+    for k in keys:
+        keyconf = config.config[k]
+        body.append("        v = environ.get(%r)" % keyconf["envkey"])
+        body.append("        if v:")
+        body.append(
+            "            self.%s = %s" % (attrs[k], coerce_expr(keyconf, imports))
+        )
+    body.append("        return self")
+
+    body.append("")
+    body.append("    def __getitem__(self, key):")
+    body.append("        return getattr(self, self.KEYS[key])")
+
+    body.append("")
+    body.append("    def is_valid(self):")
+    for k in keys:
+        keyconf = config.config[k]
+        is_list, _ = list_elem_type(keyconf["type"])
+        lines = ["v = self.%s" % attrs[k]]
+        if not keyconf["optional"]:
+            blank = "v is None"
+            if keyconf["type"] is str:
+                blank += ' or v == ""'
+            elif is_list:
+                blank += " or not len(v)"
+            lines += ["if %s:" % blank, "    return False"]
+        lines += _check_lines(attrs[k], keyconf, patterns)
+        if len(lines) > 1:
+            body.extend("        " + line for line in lines)
+    body.append("        return True")
+
+    body.append("")
+    body.append("    def to_env(self):")
+    body.append('        return "\\n".join((')
+    for k in keys:
+        keyconf = config.config[k]
+        is_list, _ = list_elem_type(keyconf["type"])
+        v = "self.%s" % attrs[k]
+        if is_list:
+            written = "join_list(%s, %r)" % (v, keyconf["separator"])
+        else:
+            written = "str(%s)" % v
+        # unset keys are written empty, so from_env skips them
+        body.append(
+            '            \'%s="%%s"\' %% escape_env_value("" if %s is None else %s),'
+            % (keyconf["envkey"], v, written)
+        )
+    body.append("        ))")
+
+    body.append("")
+    body.append("    def to_json(self):")
+    body.append('        return "{%s}" % ", ".join((')
+    for k in keys:
+        v = "self.%s" % attrs[k]
+        body.append(
+            '            %r %% dump_json_value("" if %s is None else %s),'
+            % (json_name(k), v, v)
+        )
+    body.append("        ))")
+
+    head = [
+        '"""Generated by ffurf from a schema, do not edit."""',
+        "import array",
+        "import os",
+        "import re",
+    ]
+    head += ["import %s" % module for module in sorted(imports)]
+    head += ["", "from ffurf import dump_json_value, escape_env_value, join_list", ""]
+    for attr, pattern in patterns:
+        head.append("_PATTERN_%s = re.compile(%r)" % (attr, pattern))
+    head += ["", "", "class %s:" % class_name]
+    return "\n".join(head + body) + "\n"
+
+
+def json_name(k):
+    # "name": %s, with the name escaped as json.dumps would, and % doubled
+    return "%s: %%s" % json.dumps(k).replace("%", "%%")
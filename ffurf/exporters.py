@@ -0,0 +1,290 @@
+"""Formats for `FfurfConfig.export`, rendered through a table of formatters.
+
+Each key's kind (see `ffurf.value_kind`) is worked out once, when the key
+is added. An exporter's `formats` maps each kind to a function taking the
+value and keyconf, and returning the value as written, so exporting a key
+is a lookup rather than a chain of type checks. `render` then joins the
+(name, keyconf, written) rows into the document.
+
+New formats are registered with `register_exporter`, or by installing a
+package with an entry point in the "ffurf.exporters" group.
+"""
+import json
+import math
+import shlex
+from importlib.metadata import entry_points
+
+import toml
+
+from ffurf import _json_float, dump_json_value, escape_env_value, join_list
+
+# json.dumps for a single string, without going through the encoder
+_json_str = json.encoder.encode_basestring_ascii
+
+_exporters = {}
+
+
+def register_exporter(name, exporter):
+    """Make `exporter` (a `FfurfExporter`) available as `FfurfConfig.export(name)`."""
+    if not isinstance(exporter, FfurfExporter):
+        raise TypeError("%s is not a FfurfExporter" % name)
+    _exporters[name] = exporter
+
+
+def get_exporter(name):
+    exporter = _exporters.get(name)
+    if exporter is None:
+        for plugin in entry_points(group="ffurf.exporters", name=name):
+            register_exporter(name, plugin.load()())
+            exporter = _exporters[name]
+    if exporter is None:
+        raise KeyError(name)
+    return exporter
+
+
+def export_rows(config, exporter, names):
+    # Yield (name, keyconf, written) for each (name to write, config key)
+    formats = exporter.formats
+    other = formats["other"]
+    kinds = config.kinds
+    keyconf_of = config._keyconf_getter()
+    resolve = config.secret_resolver is not None
+    for name, k in names:
+        keyconf = keyconf_of(k)
+        v = keyconf["value"]
+        if resolve and keyconf["secret"]:
+            v = config._value(keyconf)
+        if v is None:
+            yield name, keyconf, exporter.unset
+        else:
+            yield name, keyconf, formats.get(kinds[k], other)(v, keyconf)
+
+
+def export(config, exporter, names=None):
+    """Render `config` with `exporter`, or the exporter registered under that name.
+
+    `names` yields (name to write, config key) pairs, and defaults to every
+    key under its own name.
+    """
+    if isinstance(exporter, str):
+        exporter = get_exporter(exporter)
+    if names is None:
+        names = ((k, k) for k in config)
+    return exporter.render(export_rows(config, exporter, names))
+
+
+class FfurfExporter:
+    """A format for `FfurfConfig.export`.
+
+    `formats` maps value kinds ("str", "int", "float", "bool", "list",
+    "array" and "other", which every table must have) to formatters, and
+    `unset` is written for keys without a value.
+    """
+
+    formats = {}
+    unset = ""
+
+    def render(self, rows):
+        raise NotImplementedError
+
+
+def _identity(v, keyconf):
+    return v
+
+
+def _str(v, keyconf):
+    return str(v)
+
+
+def _joined(v, keyconf):
+    return join_list(v, keyconf["separator"])
+
+
+# Values as written to environment variables
+ENV_FORMATS = {
+    "str": _identity,
+    "int": _str,
+    "float": _str,
+    "bool": _str,
+    "list": _joined,
+    "array": _joined,
+    "other": _str,
+}
+
+
+class EnvExporter(FfurfExporter):
+    # unset keys are written empty, so from_env and from_dotenv skip them
+    formats = ENV_FORMATS
+    unset = ""
+
+    def render(self, rows):
+        return "\n".join(
+            '%s="%s"' % (keyconf["envkey"], escape_env_value(v))
+            for _, keyconf, v in rows
+        )
+
+
+class EnvDictExporter(FfurfExporter):
+    formats = ENV_FORMATS
+    unset = ""
+
+    def render(self, rows):
+        return {keyconf["envkey"]: v for _, keyconf, v in rows}
+
+
+class ShellExporter(FfurfExporter):
+    formats = ENV_FORMATS
+    unset = ""
+
+    def render(self, rows):
+        return "\n".join(
+            "export %s=%s" % (keyconf["envkey"], shlex.quote(v))
+            for _, keyconf, v in rows
+        )
+
+
+def _json(v, keyconf):
+    return json.dumps(v)
+
+
+def _json_bool(v, keyconf):
+    return "true" if v else "false"
+
+
+def _json_string(v, keyconf):
+    return _json_str(v)
+
+
+def _json_number(v, keyconf):
+    return _json_float(v)
+
+
+def _json_array(v, keyconf):
+    return dump_json_value(v)
+
+
+class JsonExporter(FfurfExporter):
+    formats = {
+        "str": _json_string,
+        "int": _str,
+        "float": _json_number,
+        "bool": _json_bool,
+        "list": _json,
+        "array": _json_array,
+        "other": _json,
+    }
+    unset = '""'
+
+    def render(self, rows):
+        return "{%s}" % ", ".join(
+            "%s: %s" % (_json_str(name), v) for name, _, v in rows
+        )
+
+
+def _tolist(v, keyconf):
+    # toml cannot write arrays, only lists
+    return v.tolist()
+
+
+class TomlExporter(FfurfExporter):
+    formats = {
+        "str": _identity,
+        "int": _identity,
+        "float": _identity,
+        "bool": _identity,
+        "list": _identity,
+        "array": _tolist,
+        "other": _identity,
+    }
+
+    def render(self, rows):
+        return toml.dumps({name: v for name, _, v in rows})
+
+
+class DictstrExporter(FfurfExporter):
+    formats = TomlExporter.formats | {"array": _identity}
+
+    def render(self, rows):
+        return str({name: v for name, _, v in rows})
+
+
+def _groovy_str(v, keyconf):
+    # empty strings to null
+    return '"%s"' % v if v != "" else "null"
+
+
+def _groovy_list(v, keyconf):
+    return "[%s]" % ", ".join('"%s"' % i if isinstance(i, str) else str(i) for i in v)
+
+
+def _groovy_array(v, keyconf):
+    return "[%s]" % ", ".join(map(str, v))
+
+
+class GroovyExporter(FfurfExporter):
+    formats = {
+        "str": _groovy_str,
+        "int": _str,
+        "float": _str,
+        "bool": _json_bool,
+        "list": _groovy_list,
+        "array": _groovy_array,
+        "other": _str,
+    }
+    unset = "null"
+
+    def render(self, rows):
+        lines = ["params {"]
+        lines.extend("    %s = %s" % (name, v) for name, _, v in rows)
+        lines.append("}")
+        return "\n".join(lines)
+
+
+def _yaml_scalar(v):
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    if isinstance(v, float):
+        if math.isnan(v):
+            return ".nan"
+        if math.isinf(v):
+            return ".inf" if v > 0 else "-.inf"
+        return repr(v)
+    if isinstance(v, int):
+        return str(v)
+    if v is None:
+        return "null"
+    # json strings (and lists and dicts) are yaml flow scalars
+    return json.dumps(v, default=str)
+
+
+def _yaml_value(v, keyconf):
+    return _yaml_scalar(v)
+
+
+def _yaml_list(v, keyconf):
+    return "[%s]" % ", ".join(map(_yaml_scalar, v))
+
+
+class YamlExporter(FfurfExporter):
+    formats = {
+        "str": _json_string,
+        "int": _str,
+        "float": _yaml_value,
+        "bool": _json_bool,
+        "list": _yaml_list,
+        "array": _yaml_list,
+        "other": _yaml_value,
+    }
+    unset = "null"
+
+    def render(self, rows):
+        return "\n".join("%s: %s" % (_json_str(name), v) for name, _, v in rows)
+
+
+register_exporter("env", EnvExporter())
+register_exporter("json", JsonExporter())
+register_exporter("toml", TomlExporter())
+register_exporter("dictstr", DictstrExporter())
+register_exporter("groovy", GroovyExporter())
+register_exporter("yaml", YamlExporter())
+register_exporter("shell", ShellExporter())
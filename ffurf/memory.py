@@ -0,0 +1,183 @@
+"""Measure how much memory a config holds, for `FfurfConfig.memory_report`."""
+import sys
+import tracemalloc
+
+from ffurf import print_rows
+
+
+def deep_sizeof(obj, seen):
+    # Size of obj and the items of containers, not counting objects in seen.
+    # Types and functions belong to the program rather than the config.
+    if id(obj) in seen or isinstance(obj, type) or callable(obj):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += deep_sizeof(k, seen) + deep_sizeof(v, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for v in obj:
+            size += deep_sizeof(v, seen)
+    return size
+
+
+def _keyconf_strings(key, keyconf):
+    yield key
+    yield keyconf["name"]
+    yield keyconf.get("envkey")
+    yield keyconf["source"]
+    v = keyconf["value"]
+    if isinstance(v, str):
+        yield v
+    elif isinstance(v, list):
+        yield from (i for i in v if isinstance(i, str))
+
+
+def profile_allocations(load, config, top=10):
+    """Run `load(config)` under tracemalloc and return its top allocation sites."""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        load(config)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    # Leave out tracemalloc's own bookkeeping
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(filters).compare_to(
+        before.filter_traces(filters), "lineno"
+    )
+    allocations = []
+    for stat in stats:
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        allocations.append(
+            {
+                "location": "%s:%d" % (frame.filename, frame.lineno),
+                "size": stat.size_diff,
+                "count": stat.count_diff,
+            }
+        )
+        if len(allocations) == top:
+            break
+    return allocations
+
+
+class FfurfMemoryReport:
+    """Bytes held by each key of a config, and how its strings are shared.
+
+    `keys` lists each key's value, metadata (keyconf) and source sizes,
+    largest first. A key's sizes include anything it shares with other
+    keys, while `total` counts each object once. `strings` counts the
+    references to strings in the config, how many reuse an object already
+    referenced elsewhere ("shared") and how many are separate copies of an
+    equal string ("duplicated"), with the bytes those copies take.
+    """
+
+    def __init__(self, config, allocations=None):
+        self.keys = []
+        self.allocations = allocations
+        refs = {}
+        objects = {}
+
+        for k in sorted(config.config):
+            keyconf = config.config[k]
+            value = deep_sizeof(keyconf["value"], set())
+            source = sys.getsizeof(keyconf["source"])
+            metadata = sys.getsizeof(keyconf) + sys.getsizeof(k)
+            meta_seen = {id(keyconf["value"]), id(keyconf["source"])}
+            for field, v in keyconf.items():
+                if field not in ("value", "source"):
+                    metadata += deep_sizeof(v, meta_seen)
+            self.keys.append(
+                {
+                    "key": k,
+                    "value": value,
+                    "metadata": metadata,
+                    "source": source,
+                    "total": value + metadata + source,
+                }
+            )
+
+            for s in _keyconf_strings(k, keyconf):
+                if isinstance(s, str):
+                    refs[id(s)] = refs.get(id(s), 0) + 1
+                    objects.setdefault(s, {})[id(s)] = s
+
+        self.total = deep_sizeof(config.config, set())
+        self.keys.sort(key=lambda r: r["total"], reverse=True)
+
+        duplicated = 0
+        duplicated_bytes = 0
+        for copies in objects.values():
+            for s in list(copies.values())[1:]:
+                duplicated += 1
+                duplicated_bytes += sys.getsizeof(s)
+        self.strings = {
+            "count": sum(refs.values()),
+            "unique": len(objects),
+            "shared": sum(refs.values()) - len(refs),
+            "duplicated": duplicated,
+            "duplicated_bytes": duplicated_bytes,
+        }
+
+    def as_dict(self):
+        return {
+            "total": self.total,
+            "keys": self.keys,
+            "strings": self.strings,
+            "allocations": self.allocations,
+        }
+
+    def _key_rows(self):
+        for r in self.keys:
+            yield (r["key"], r["value"], r["metadata"], r["source"], r["total"])
+
+    def __rich_console__(self, console, options):
+        try:
+            from rich.table import Table
+        except ImportError:
+            raise RuntimeError(
+                "Optional dependency 'rich' is required for pretty-printing. Install with: pip install rich"
+            )
+        table = Table(title="Memory (%d bytes)" % self.total, show_lines=False)
+        for header in ("Key", "Value", "Metadata", "Source", "Total"):
+            table.add_column(header, justify="left" if header == "Key" else "right")
+        for row in self._key_rows():
+            table.add_row(*map(str, row))
+        yield table
+
+        strings = Table(title="Strings", show_lines=False)
+        strings.add_column("Strings")
+        strings.add_column("Count", justify="right")
+        for name, count in self.strings.items():
+            strings.add_row(name, str(count))
+        yield strings
+
+        if self.allocations:
+            allocations = Table(title="Allocations", show_lines=False)
+            allocations.add_column("Location")
+            allocations.add_column("Size", justify="right")
+            allocations.add_column("Count", justify="right")
+            for a in self.allocations:
+                allocations.add_row(a["location"], str(a["size"]), str(a["count"]))
+            yield allocations
+
+    def print_table(self):
+        print("Memory: %d bytes" % self.total)
+        print_rows(
+            ("Key", "Value", "Metadata", "Source", "Total"), list(self._key_rows())
+        )
+        print()
+        print_rows(("Strings", "Count"), list(self.strings.items()))
+        if self.allocations:
+            print()
+            print_rows(
+                ("Allocated at", "Size", "Count"),
+                [(a["location"], a["size"], a["count"]) for a in self.allocations],
+            )
@@ -0,0 +1,118 @@
+"""Fetch configuration documents over http(s) for `FfurfConfig.from_url`."""
+import gzip
+import http.client
+import json
+import threading
+from urllib.parse import urlsplit
+
+import toml
+
+
+class FfurfHTTPPool:
+    """Keeps idle keep-alive connections to reuse, per scheme and host."""
+
+    def __init__(self, max_idle=4):
+        self.max_idle = max_idle
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    def _connect(self, scheme, netloc, timeout):
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=timeout)
+        if scheme == "http":
+            return http.client.HTTPConnection(netloc, timeout=timeout)
+        raise ValueError("Unsupported url scheme: %s" % scheme)
+
+    def _acquire(self, key):
+        with self.lock:
+            conns = self.idle.get(key)
+            return conns.pop() if conns else None
+
+    def _release(self, key, conn):
+        with self.lock:
+            conns = self.idle.setdefault(key, [])
+            if len(conns) < self.max_idle:
+                conns.append(conn)
+                return
+        conn.close()
+
+    def get(self, url, headers=None, timeout=10):
+        """GET `url`, returning (status, headers, body)."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = (parts.path or "/") + ("?%s" % parts.query if parts.query else "")
+
+        conn = self._acquire(key)
+        reused = conn is not None
+        while True:
+            if conn is None:
+                conn = self._connect(parts.scheme, parts.netloc, timeout)
+            conn.timeout = timeout
+            try:
+                conn.request("GET", path, headers=headers or {})
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if not reused:
+                    raise
+                # the server may have dropped an idle connection, try a new one
+                conn, reused = None, False
+                continue
+            break
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        return response.status, response.headers, body
+
+    def close(self):
+        with self.lock:
+            for conns in self.idle.values():
+                for conn in conns:
+                    conn.close()
+            self.idle.clear()
+
+
+default_pool = FfurfHTTPPool()
+
+
+def parse_document(url, content_type, body):
+    # Use the content type to pick a parser, then the url, then assume json
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if "toml" in content_type or (
+        "json" not in content_type and urlsplit(url).path.endswith(".toml")
+    ):
+        return toml.loads(body.decode("utf-8"))
+    return json.loads(body)
+
+
+def fetch_document(url, state, timeout=10, pool=None):
+    """Conditionally fetch the document at `url`.
+
+    `state` holds the ETag and Last-Modified of the last document that was
+    applied. Returns (document, validators), or (None, None) if the server
+    says the document has not changed. Raises OSError for other statuses.
+    """
+    headers = {"Accept-Encoding": "gzip"}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+
+    status, response_headers, body = (pool or default_pool).get(
+        url, headers=headers, timeout=timeout
+    )
+    if status == 304:
+        return None, None
+    if status != 200:
+        raise OSError("Could not fetch %s: HTTP %d" % (url, status))
+
+    if response_headers.get("Content-Encoding", "").lower() == "gzip":
+        body = gzip.decompress(body)
+    validators = {
+        "etag": response_headers.get("ETag"),
+        "last_modified": response_headers.get("Last-Modified"),
+    }
+    return parse_document(url, response_headers.get("Content-Type"), body), validators
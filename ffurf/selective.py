@@ -0,0 +1,311 @@
+"""Read only the parts of large json and toml documents that a config uses.
+
+Both readers are driven by a `select(path)` callback, which is given the
+tuple of table names leading to a value and returns "take" to load the
+value, "descend" to look inside a table, or None to skip it. The result is
+the document pruned to the selected values, in the same shape as the
+original, so it can be handed to `FfurfConfig._from_dict` as usual.
+"""
+import json
+import mmap
+import re
+
+import toml
+
+_JSON_WS = re.compile(rb"[ \t\n\r]*")
+_JSON_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+# Runs up to the next bracket outside a string, so only brackets are visited
+_JSON_BRACKET = re.compile(
+    rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*[\[\]{}]', re.S
+)
+_JSON_SCALAR = re.compile(rb"[^,\]}\s]+")
+
+_OPEN = frozenset(b"[{")
+# Large values are skipped a chunk at a time with bytes methods, which run
+# in C, falling back to visiting each bracket only in the chunk holding the
+# end of the value, or in chunks with escapes
+_JSON_CHUNK = 1 << 16
+_JSON_SMALL = 1 << 12
+_JSON_CHUNK_DEPTH = 32
+_NOT_BRACKETS = bytes(c for c in range(256) if c not in b"[]{}")
+
+
+def _json_error(msg, pos):
+    return ValueError("Malformed json at byte %d: %s" % (pos, msg))
+
+
+def _skip_ws(buf, pos):
+    return _JSON_WS.match(buf, pos).end()
+
+
+def skip_json_value(buf, pos):
+    """Return the position just past the json value starting at `pos`.
+
+    Nested values are skipped by matching brackets (and strings, so that
+    brackets inside them are ignored) without decoding anything.
+    """
+    if pos >= len(buf):
+        raise _json_error("expected a value", pos)
+    c = buf[pos]
+    if c == ord('"'):
+        m = _JSON_STRING.match(buf, pos)
+        if m is None:
+            raise _json_error("unterminated string", pos)
+        return m.end()
+    if c in _OPEN:
+        depth = 0
+        end = pos
+        # small values are skipped bracket by bracket
+        chunk_end = pos + _JSON_SMALL
+        while True:
+            # matched in place (not searched for) to stay linear on bad input
+            m = _JSON_BRACKET.match(buf, end)
+            if m is None:
+                raise _json_error("unterminated value", pos)
+            end = m.end()
+            if buf[end - 1] in _OPEN:
+                depth += 1
+            else:
+                depth -= 1
+                if not depth:
+                    return end
+            if end >= chunk_end:
+                # skip whole chunks until the one holding the end of the value
+                chunk_end = _skip_json_chunk(buf, end, depth)
+                while chunk_end is not None:
+                    end, depth = chunk_end
+                    chunk_end = _skip_json_chunk(buf, end, depth)
+                chunk_end = end + _JSON_CHUNK
+    m = _JSON_SCALAR.match(buf, pos)
+    if m is None:
+        raise _json_error("expected a value", pos)
+    return m.end()
+
+
+def _skip_json_chunk(buf, pos, depth):
+    # Returns (end, depth) past the chunk of brackets at pos, outside any
+    # string, or None if the value may end within it, or it has escapes
+    end = min(pos + _JSON_CHUNK, len(buf))
+    chunk = buf[pos:end]
+    if b"\\" in chunk:
+        return None
+    parts = chunk.split(b'"')
+    if len(parts) % 2 == 0:
+        # the chunk ends inside a string, so end it before the string
+        end = pos + chunk.rfind(b'"')
+        parts.pop()
+    if end == pos:
+        return None
+    # without escapes, every other part is inside a string
+    brackets = b"".join(parts[::2]).translate(None, _NOT_BRACKETS)
+    # drop matched pairs, one level of nesting at a time
+    for _ in range(_JSON_CHUNK_DEPTH):
+        reduced = brackets.replace(b"{}", b"").replace(b"[]", b"")
+        if len(reduced) == len(brackets):
+            break
+        brackets = reduced
+    else:
+        return None
+    # what is left of well formed json is "]}]" closing outer values, then
+    # "[{" opening values that carry on past the chunk
+    opens = brackets.lstrip(b"]}")
+    closes = len(brackets) - len(opens)
+    if closes >= depth or b"]" in opens or b"}" in opens:
+        return None
+    return end, depth + len(opens) - closes
+
+
+def _expect(buf, pos, char):
+    pos = _skip_ws(buf, pos)
+    if buf[pos : pos + 1] != char:
+        raise _json_error("expected %r" % char.decode(), pos)
+    return pos + 1
+
+
+def scan_json_object(buf, pos, select, path=()):
+    """Return (pruned object, end position) for the json object at `pos`."""
+    pos = _expect(buf, pos, b"{")
+    out = {}
+    pos = _skip_ws(buf, pos)
+    if buf[pos : pos + 1] == b"}":
+        return out, pos + 1
+
+    while True:
+        pos = _skip_ws(buf, pos)
+        m = _JSON_STRING.match(buf, pos)
+        if m is None:
+            raise _json_error("expected a name", pos)
+        name = m.group()
+        name = json.loads(name) if b"\\" in name else name[1:-1].decode()
+        pos = _skip_ws(buf, _expect(buf, m.end(), b":"))
+
+        action = select(path + (name,))
+        if action == "descend" and buf[pos : pos + 1] == b"{":
+            out[name], pos = scan_json_object(buf, pos, select, path + (name,))
+        else:
+            end = skip_json_value(buf, pos)
+            if action == "take":
+                out[name] = json.loads(buf[pos:end])
+            pos = end
+
+        pos = _skip_ws(buf, pos)
+        c = buf[pos : pos + 1]
+        pos += 1
+        if c == b"}":
+            return out, pos
+        if c != b",":
+            raise _json_error("expected ',' or '}'", pos - 1)
+
+
+def load_json(json_fp, select):
+    """Read the selected values from a json file, mapped rather than read.
+
+    Memory use follows the size of the selected values, not the document.
+    """
+    with open(json_fp, "rb") as json_fh:
+        if not json_fh.seek(0, 2):
+            raise ValueError("Malformed json: %s is empty" % json_fp)
+        with mmap.mmap(json_fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            out, pos = scan_json_object(buf, 0, select)
+            if _skip_ws(buf, pos) != len(buf):
+                raise _json_error("trailing data", pos)
+    return out
+
+
+def _select_profile_extends(path):
+    if path[0] != "profile" or len(path) > 3:
+        return None
+    if len(path) == 3:
+        return "take" if path[2] == "extends" else None
+    return "descend"
+
+
+def read_json_profile_extends(json_fp):
+    """Return {"profile": {name: {"extends": parent}}} for the profiles of a
+    json file, skipping over everything else.
+    """
+    return load_json(json_fp, _select_profile_extends)
+
+
+_TOML_HEADER = re.compile(r"\s*\[\[?\s*([^\[\]]+?)\s*\]\]?\s*(?:#.*)?$")
+_TOML_KEY_PART = re.compile(
+    r"""\s*("(?:[^"\\]|\\.)*"|'[^']*'|[A-Za-z0-9_-]+)\s*(\.|$)"""
+)
+_TOML_TOKEN = re.compile(r'''"""|\'\'\'|"(?:[^"\\]|\\.)*"|'[^']*'|#|[\[\]{}]''')
+
+
+def split_toml_key(key):
+    """Split a dotted toml key into its (unquoted) parts."""
+    parts = []
+    pos = 0
+    while pos < len(key):
+        m = _TOML_KEY_PART.match(key, pos)
+        if m is None:
+            raise ValueError("Malformed toml key: %s" % key)
+        part = m.group(1)
+        if part[0] == '"':
+            part = json.loads(part)
+        elif part[0] == "'":
+            part = part[1:-1]
+        parts.append(part)
+        pos = m.end()
+    return tuple(parts)
+
+
+def _toml_lines(lines):
+    # Yield (line, header, top) for each line, where header is the parsed
+    # name of a table header, and top is whether the line starts outside any
+    # multi-line string or array, so its contents can't be mistaken for one
+    depth = 0
+    multiline = None
+    for line in lines:
+        top = multiline is None and not depth
+        if top:
+            m = _TOML_HEADER.match(line)
+            if m:
+                yield line, split_toml_key(m.group(1)), top
+                continue
+        yield line, None, top
+
+        pos = 0
+        while True:
+            if multiline:
+                end = line.find(multiline, pos)
+                if end < 0:
+                    break
+                multiline = None
+                pos = end + 3
+                continue
+            m = _TOML_TOKEN.search(line, pos)
+            if m is None:
+                break
+            token = m.group()
+            pos = m.end()
+            if token in ('"""', "'''"):
+                multiline = token
+            elif token == "#":
+                break
+            elif token in "[{":
+                depth += 1
+            elif token in "]}":
+                depth -= 1
+
+
+def filter_toml(lines, select):
+    """Yield the toml lines belonging to tables that `select` is interested in.
+
+    Tables are dropped whole. Multi-line strings and arrays are tracked so
+    their contents are never mistaken for table headers.
+    """
+    keep = True
+    for line, header, _ in _toml_lines(lines):
+        if header is not None:
+            keep = _keep_table(header, select)
+        if keep:
+            yield line
+
+
+_TOML_EXTENDS = re.compile(
+    r"""\s*(?:("(?:[^"\\]|\\.)*"|'[^']*'|[A-Za-z0-9_-]+)\s*\.\s*)?extends\s*="""
+)
+
+
+def read_toml_profile_extends(lines):
+    """Return {"profile": {name: {"extends": parent}}} for the profile tables
+    of a toml document, parsing only their headers and `extends` lines.
+
+    Profiles without an `extends` are included with an empty table, so the
+    chain can tell a missing profile from one that ends the chain.
+    """
+    profiles = {}
+    table = None
+    for line, header, top in _toml_lines(lines):
+        if header is not None:
+            table = header if header[0] == "profile" else None
+            if table is not None and len(table) == 2:
+                profiles.setdefault(table[1], {})
+            continue
+        m = _TOML_EXTENDS.match(line) if top and table else None
+        if m is None:
+            continue
+        if len(table) == 2 and m.group(1) is None:
+            name = table[1]
+        elif len(table) == 1 and m.group(1) is not None:
+            # extends set with a dotted key, as in `prod.extends = "base"`
+            name = split_toml_key(m.group(1))[0]
+        else:
+            continue
+        value = toml.loads("extends = " + line.split("=", 1)[1])["extends"]
+        profiles.setdefault(name, {})["extends"] = value
+    return {"profile": profiles}
+
+
+def _keep_table(parts, select):
+    for i in range(1, len(parts) + 1):
+        action = select(parts[:i])
+        if action is None:
+            return False
+        if action == "take":
+            # the table is (inside) the value of a key
+            return True
+    return True
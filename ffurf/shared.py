@@ -0,0 +1,221 @@
+"""Publish a frozen configuration to worker processes through shared memory.
+
+The publisher writes a `dump_snapshot` blob into a shared memory segment, and
+workers attach a read-only `FfurfSharedView` that loads the snapshot straight
+out of the segment, rather than each receiving a pickled copy of the config.
+"""
+import mmap
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+
+from ffurf import FfurfConfig
+
+# Segment header: generation and payload length. The generation is odd while
+# a snapshot is being written, so readers can tell when to wait and retry.
+SHARED_HEADER = struct.Struct(">QQ")
+SHARED_GENERATION = struct.Struct(">Q")
+
+# How long a reader waits for a publish to finish, in seconds, before
+# deciding the publisher died part way through
+SHARED_PUBLISH_TIMEOUT = 5.0
+
+
+class FfurfAttachedSegment:
+    """A shared memory segment mapped read-only, without a resource tracker.
+
+    Stands in for `SharedMemory` on python < 3.13, which registers every
+    segment it opens on posix, so workers would unregister (or unlink) the
+    publisher's segment when they exit.
+    """
+
+    def __init__(self, name):
+        import _posixshmem
+
+        self.name = name
+        fd = _posixshmem.shm_open("/" + name, os.O_RDONLY)
+        try:
+            self.size = os.fstat(fd).st_size
+            self._mmap = mmap.mmap(fd, self.size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        self.buf = memoryview(self._mmap)
+
+    def close(self):
+        self.buf.release()
+        self._mmap.close()
+
+
+def attach_segment(name):
+    # Attach without registering the segment with a resource tracker, which
+    # would otherwise unlink it when the attaching process exits
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # python < 3.13 has no track argument, and always registers on posix
+        pass
+    if os.name != "posix":
+        return shared_memory.SharedMemory(name=name)
+    return FfurfAttachedSegment(name)
+
+
+class FfurfSharedConfig:
+    """Owns a shared memory segment holding a published configuration.
+
+    `size` is the space reserved for snapshots, defaulting to twice the
+    first one so that a reloaded config can be republished into it.
+    """
+
+    def __init__(self, config, name=None, size=None):
+        blob = config.dump_snapshot()
+        if size is None:
+            size = max(2 * len(blob), 4096)
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=True, size=SHARED_HEADER.size + size
+        )
+        self.generation = 0
+        self.publish(config, blob)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def publish(self, config, blob=None):
+        """Write `config` into the segment, bumping the generation."""
+        if blob is None:
+            blob = config.dump_snapshot()
+        if SHARED_HEADER.size + len(blob) > self.shm.size:
+            raise ValueError(
+                "Snapshot of %d bytes does not fit the %d byte shared segment"
+                % (len(blob), self.shm.size - SHARED_HEADER.size)
+            )
+
+        buf = self.shm.buf
+        SHARED_HEADER.pack_into(buf, 0, self.generation + 1, len(blob))
+        buf[SHARED_HEADER.size : SHARED_HEADER.size + len(blob)] = blob
+        self.generation += 2
+        SHARED_HEADER.pack_into(buf, 0, self.generation, len(blob))
+        return self.generation
+
+    def close(self):
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        self.unlink()
+
+
+class FfurfSharedView:
+    """A read-only view of a configuration published by `FfurfSharedConfig`.
+
+    With `auto_refresh`, every read checks the segment's generation and
+    reloads the snapshot if it has been republished since. Secret references
+    are resolved with `secret_resolver`.
+    """
+
+    def __init__(self, name, auto_refresh=True, secret_resolver=None):
+        self.shm = attach_segment(name)
+        self.auto_refresh = auto_refresh
+        self.secret_resolver = secret_resolver
+        self.generation = None
+        self.config = None
+        self.refresh()
+
+    def _read_generation(self):
+        return SHARED_GENERATION.unpack_from(self.shm.buf)[0]
+
+    @property
+    def stale(self):
+        return self._read_generation() != self.generation
+
+    def refresh(self, timeout=SHARED_PUBLISH_TIMEOUT):
+        """Load the current snapshot from the segment if it has changed.
+
+        Waits up to `timeout` seconds for a publish in progress to finish,
+        then raises `TimeoutError`.
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.0005
+        while True:
+            generation, length = SHARED_HEADER.unpack_from(self.shm.buf)
+            if generation == self.generation:
+                return False
+            if generation % 2:
+                # the publisher is part way through a write
+                if time.monotonic() > deadline:
+                    raise TimeoutError(
+                        "Shared config %s is still being published after %ss"
+                        % (self.shm.name, timeout)
+                    )
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+                continue
+            payload = self.shm.buf[SHARED_HEADER.size : SHARED_HEADER.size + length]
+            try:
+                config = FfurfConfig.load_snapshot(payload, self.secret_resolver)
+            except ValueError:
+                # torn by a concurrent publish, which the generation will show
+                if self._read_generation() == generation:
+                    raise
+                continue
+            finally:
+                payload.release()
+            if self._read_generation() == generation:
+                self.config = config
+                self.generation = generation
+                return True
+
+    def _config(self):
+        if self.auto_refresh and self._read_generation() != self.generation:
+            self.refresh()
+        return self.config
+
+    def __getitem__(self, k):
+        return self._config()[k]
+
+    def __setitem__(self, k, v):
+        raise TypeError("FfurfSharedView is read-only")
+
+    def __contains__(self, k):
+        return k in self._config()
+
+    def __iter__(self):
+        return iter(self._config())
+
+    def __len__(self):
+        return len(self._config())
+
+    def __str__(self):
+        return str(self._config())
+
+    def get(self, k, default=None):
+        return self._config().get(k, default)
+
+    def get_clean(self, k):
+        return self._config().get_clean(k)
+
+    def get_source(self, k):
+        return self._config().get_source(k)
+
+    def key_is_valid(self, k):
+        return self._config().key_is_valid(k)
+
+    def is_valid(self):
+        return self._config().is_valid()
+
+    def close(self):
+        self.config = None
+        self.shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from ffurf import FfurfConfig
+
+
+@pytest.fixture
+def access_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("hot")
+    ffurf.add_config_key("cold", default_value="brr")
+    ffurf.add_config_key("dead")
+    ffurf.add_config_key("masked", secret=True)
+    ffurf.set_config_key("hot", "hoot", source="test")
+    ffurf.set_config_key("dead", "meow", source="test")
+    ffurf.set_config_key("masked", "hunter2", source="test")
+    return ffurf
+
+
+def test_access_off_by_default(access_ffurf):
+    access_ffurf["hot"]
+    assert access_ffurf.access is None
+    with pytest.raises(ValueError):
+        access_ffurf.access_report()
+
+
+def test_access_counts(access_ffurf):
+    access_ffurf.track_access()
+    for _ in range(3):
+        access_ffurf["hot"]
+    access_ffurf.get("masked")
+    access_ffurf.get_clean("masked")
+    access_ffurf.get("not-a-key")
+
+    report = access_ffurf.access_report()
+    assert report["keys"]["hot"]["count"] == 3
+    assert report["keys"]["hot"]["first"] <= report["keys"]["hot"]["last"]
+    assert report["keys"]["masked"]["count"] == 2
+    assert "not-a-key" not in report["keys"]
+    assert report["unread"] == ["cold", "dead"]
+    assert report["set_unread"] == ["dead"]
+
+
+def test_exports_are_not_reads(access_ffurf):
+    access_ffurf.track_access()
+    access_ffurf.to_json()
+    access_ffurf.to_env()
+    access_ffurf.to_toml()
+    str(access_ffurf)
+    list(access_ffurf.table_rows())
+    assert access_ffurf.access_report()["keys"] == {}
+
+
+def test_access_sampling(access_ffurf):
+    random.seed(1)
+    access_ffurf.track_access(sample_rate=0.1)
+    for _ in range(10000):
+        access_ffurf["hot"]
+        access_ffurf["cold"]
+    keys = access_ffurf.access_report()["keys"]
+    assert 8000 < keys["hot"]["count"] < 12000
+    assert 8000 < keys["cold"]["count"] < 12000
+    assert len(access_ffurf.access["hot"]) == 3
+
+
+@pytest.mark.parametrize("rate", [0, -1, 1.5])
+def test_access_bad_rate(access_ffurf, rate):
+    with pytest.raises(ValueError):
+        access_ffurf.track_access(sample_rate=rate)
+
+
+def test_stop_tracking_access(access_ffurf):
+    access_ffurf.track_access()
+    access_ffurf.stop_tracking_access()
+    access_ffurf["hot"]
+    assert access_ffurf.access is None
@@ -0,0 +1,81 @@
+import argparse
+
+import pytest
+
+from ffurf import FfurfConfig
+
+
+@pytest.fixture
+def cli_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-str", default_value="hoot")
+    ffurf.add_config_key("my-int", key_type=int, default_value=1)
+    ffurf.add_config_key("db.host", optional=True)
+    ffurf.add_config_key("my-ints", key_type=list[int], optional=True)
+    return ffurf
+
+
+def test_to_argparse_is_cached(cli_ffurf):
+    parser = cli_ffurf.to_argparse()
+    assert cli_ffurf.to_argparse() is parser
+
+
+def test_to_argparse_updates_defaults(cli_ffurf):
+    parser = cli_ffurf.to_argparse()
+    cli_ffurf.set_config_key("my-int", 5)
+    assert cli_ffurf.to_argparse() is parser
+    assert parser.parse_args([]).my_int == 5
+
+
+def test_to_argparse_rebuilds_for_new_keys(cli_ffurf):
+    parser = cli_ffurf.to_argparse()
+    cli_ffurf.add_config_key("new-key")
+    new_parser = cli_ffurf.to_argparse()
+    assert new_parser is not parser
+    with pytest.raises(SystemExit):
+        new_parser.parse_args([])
+    assert new_parser.parse_args(["--new-key", "meow"]).new_key == "meow"
+
+
+def test_to_argparse_as_parent(cli_ffurf):
+    parser = argparse.ArgumentParser(parents=[cli_ffurf.to_argparse()])
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(["--my-int", "3", "--verbose"])
+    assert args.my_int == 3
+    assert args.verbose
+
+
+def test_from_argparse_argv(cli_ffurf):
+    cli_ffurf.from_argparse(
+        ["--my-int", "3", "--db.host", "localhost", "--my-ints", "1", "2"]
+    )
+    assert cli_ffurf["my-int"] == 3
+    assert cli_ffurf["db.host"] == "localhost"
+    assert cli_ffurf["my-ints"] == [1, 2]
+    assert cli_ffurf.get_source("my-int") == "cli:--my-int"
+    assert cli_ffurf.get_source("db.host") == "cli:--db.host"
+    assert cli_ffurf["my-str"] == "hoot"
+    assert cli_ffurf.get_source("my-str") != "cli:--my-str"
+
+
+def test_from_argparse_explicit_default(cli_ffurf):
+    # given on the command line, even though it matches the default
+    cli_ffurf.from_argparse(["--my-str", "hoot"])
+    assert cli_ffurf.get_source("my-str") == "cli:--my-str"
+
+
+def test_from_argparse_namespace(cli_ffurf):
+    parser = argparse.ArgumentParser(parents=[cli_ffurf.to_argparse()])
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(["--my-str", "meow", "--verbose"])
+    cli_ffurf.from_argparse(args)
+    assert cli_ffurf["my-str"] == "meow"
+    assert cli_ffurf.get_source("my-str") == "cli:--my-str"
+    assert cli_ffurf.get_source("my-int") != "cli:--my-int"
+
+
+def test_from_argparse_is_all_or_nothing(cli_ffurf):
+    args = argparse.Namespace(my_str="meow", my_int="not a number")
+    with pytest.raises(TypeError):
+        cli_ffurf.from_argparse(args)
+    assert cli_ffurf["my-str"] == "hoot"
@@ -0,0 +1,119 @@
+import json
+import os
+
+import pytest
+
+from ffurf.__main__ import main
+
+SCHEMA = """
+from ffurf import FfurfConfig
+
+ffurf = FfurfConfig()
+ffurf.add_config_key("port", key_type=int, min_value=1)
+ffurf.add_config_key("host")
+ffurf.add_config_key("password", secret=True, optional=True)
+
+
+def build():
+    return ffurf
+"""
+
+
+@pytest.fixture
+def check_dir(tmp_path):
+    (tmp_path / "schema.py").write_text(SCHEMA)
+    (tmp_path / "good.toml").write_text('port = 80\nhost = "localhost"\n')
+    (tmp_path / "good.json").write_text('{"port": 443, "host": "example.com"}')
+    (tmp_path / "bad.toml").write_text('port = 0\npassword = "hunter2"\n')
+    (tmp_path / "broken.json").write_text('{"port": "eighty", "host": "localhost"}')
+    (tmp_path / "profiled.toml").write_text(
+        'host = "localhost"\n[profile.prod]\nport = 80\n'
+    )
+    return tmp_path
+
+
+def test_check_valid(check_dir, capsys):
+    schema = str(check_dir / "schema.py")
+    files = [str(check_dir / f) for f in ("good.toml", "good.json")]
+    assert main(["check", schema, *files, "-j", "1"]) == 0
+    assert capsys.readouterr().out == "2 of 2 files valid\n"
+
+
+def test_check_failures(check_dir, capsys):
+    schema = str(check_dir / "schema.py") + ":build"
+    files = [
+        str(check_dir / f)
+        for f in ("good.toml", "bad.toml", "broken.json", "nope.toml")
+    ]
+    assert main(["check", schema, *files, "-j", "1"]) == os.EX_CONFIG
+    out = capsys.readouterr().out
+    assert "== %s" % files[1] in out
+    assert "port: must be at least 1" in out
+    assert "host: unset" in out
+    assert "hunter2" not in out
+    assert "== %s\nTypeError: port" % files[2] in out
+    assert "== %s\nOSError" % files[3] in out
+    assert out.endswith("1 of 4 files valid\n")
+
+
+def test_check_json(check_dir, capsys):
+    schema = str(check_dir / "schema.py")
+    files = [str(check_dir / f) for f in ("good.toml", "bad.toml")]
+    assert main(["check", schema, *files, "-j", "1", "--json", "-"]) == os.EX_CONFIG
+    report = json.loads(capsys.readouterr().out)
+    assert not report["valid"]
+    assert [f["valid"] for f in report["files"]] == [True, False]
+    assert report["files"][1]["keys"]["port"]["errors"] == ["must be at least 1"]
+    assert "table" not in report["files"][1]
+
+
+def test_check_json_file(check_dir, capsys):
+    schema = str(check_dir / "schema.py")
+    json_fp = str(check_dir / "report.json")
+    main(["check", schema, str(check_dir / "good.toml"), "--json", json_fp])
+    assert "1 of 1 files valid" in capsys.readouterr().out
+    with open(json_fp) as json_fh:
+        assert json.load(json_fh)["valid"]
+
+
+def test_check_profile(check_dir):
+    schema = str(check_dir / "schema.py")
+    fp = str(check_dir / "profiled.toml")
+    assert main(["check", schema, fp, "-j", "1"]) == os.EX_CONFIG
+    assert main(["check", schema, fp, "-j", "1", "--profile", "prod"]) == 0
+
+
+def test_check_profile_with_dotenv(check_dir):
+    schema = str(check_dir / "schema.py")
+    fp = str(check_dir / "good.env")
+    (check_dir / "good.env").write_text('PORT=80\nHOST="localhost"\n')
+    toml_fp = str(check_dir / "profiled.toml")
+    assert main(["check", schema, fp, toml_fp, "-j", "1", "--profile", "prod"]) == 0
+
+
+def test_check_in_parallel(check_dir, capsys):
+    schema = str(check_dir / "schema.py")
+    files = [str(check_dir / f) for f in ("good.toml", "bad.toml", "good.json")] * 4
+    assert main(["check", schema, *files, "-j", "2"]) == os.EX_CONFIG
+    assert capsys.readouterr().out.endswith("8 of 12 files valid\n")
+
+
+def test_check_bad_schema(check_dir):
+    with pytest.raises(SystemExit) as e:
+        main(
+            [
+                "check",
+                str(check_dir / "schema.py") + ":nope",
+                str(check_dir / "good.toml"),
+            ]
+        )
+    assert e.value.code == 2
+
+
+@pytest.mark.parametrize("schema", ["nosuch.py", "nosuch.module", "syntax.py"])
+def test_check_unloadable_schema(check_dir, schema, capsys):
+    (check_dir / "syntax.py").write_text("ffurf = (\n")
+    with pytest.raises(SystemExit) as e:
+        main(["check", str(check_dir / schema), str(check_dir / "good.toml")])
+    assert e.value.code == 2
+    assert "could not load schema" in capsys.readouterr().err
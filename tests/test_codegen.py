@@ -0,0 +1,145 @@
+import array
+
+import pytest
+
+from ffurf import FfurfConfig
+
+
+@pytest.fixture
+def gen_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-str")
+    ffurf.add_config_key(
+        "my-int", key_type=int, default_value=1, min_value=1, max_value=10
+    )
+    ffurf.add_config_key("my-float", key_type=float, optional=True)
+    ffurf.add_config_key("my-bool", key_type=bool, default_value=False)
+    ffurf.add_config_key("my-mode", default_value="fast", choices=["fast", "slow"])
+    ffurf.add_config_key("my-paths", key_type=list[str], separator=":")
+    ffurf.add_config_key("my-ids", key_type=list[int], compact=True, optional=True)
+    ffurf.add_config_key("db.primary.host", pattern=r"[a-z.]+")
+    ffurf.add_config_key("class", optional=True)
+    return ffurf
+
+
+class Hoot:
+    def __init__(self, v):
+        self.v = v
+
+
+def build(ffurf, **kwargs):
+    module = {}
+    exec(compile(ffurf.to_module(**kwargs), "generated", "exec"), module)
+    return module[kwargs.get("class_name", "FfurfSettings")]
+
+
+ENV = {
+    "MY_STR": 'say "hoot"',
+    "MY_INT": "5",
+    "MY_BOOL": "1",
+    "MY_PATHS": "a: b:c",
+    "MY_IDS": "1,2,3",
+    "DB_PRIMARY_HOST": "db.local",
+}
+
+
+def test_codegen_matches_dynamic_config(gen_ffurf, monkeypatch):
+    Settings = build(gen_ffurf)
+    for k, v in ENV.items():
+        monkeypatch.setenv(k, v)
+    gen_ffurf.from_env()
+    settings = Settings.from_env(ENV)
+
+    for k in gen_ffurf:
+        assert settings[k] == gen_ffurf[k]
+    assert isinstance(settings["my-ids"], array.array)
+    assert settings.db_primary_host == "db.local"
+    assert settings.class_ is None
+    assert settings.to_env() == gen_ffurf.to_env()
+    assert settings.to_json() == gen_ffurf.to_json()
+    assert settings.is_valid() == gen_ffurf.is_valid() is True
+
+
+def test_codegen_defaults_and_slots(gen_ffurf):
+    Settings = build(gen_ffurf, class_name="Settings")
+    settings = Settings()
+    assert settings.my_int == 1
+    assert settings.my_str is None
+    assert not settings.is_valid()
+    assert Settings.KEYS["my-int"] == "my_int"
+    assert Settings.__annotations__["my_ids"] == array.array | None
+    with pytest.raises(AttributeError):
+        settings.not_a_key = 1
+
+    # each instance gets its own list
+    gen_ffurf.set_config_key("my-paths", "a:b")
+    Settings = build(gen_ffurf)
+    Settings().my_paths.append("c")
+    assert Settings().my_paths == ["a", "b"]
+
+
+def test_codegen_is_valid_checks_constraints(gen_ffurf):
+    settings = build(gen_ffurf).from_env(ENV)
+    assert settings.is_valid()
+    for attr, v in (
+        ("my_int", 11),
+        ("my_mode", "medium"),
+        ("db_primary_host", "DB"),
+        ("my_paths", []),
+        ("my_str", ""),
+    ):
+        original = getattr(settings, attr)
+        setattr(settings, attr, v)
+        assert not settings.is_valid()
+        setattr(settings, attr, original)
+
+
+def test_codegen_leaves_out_secrets(gen_ffurf):
+    gen_ffurf.add_config_key("password", secret=True)
+    gen_ffurf.add_config_key("pin", key_type=int, partial_secret=2)
+    gen_ffurf.set_config_key("password", "hunter2")
+    gen_ffurf.set_config_key("pin", 1234)
+    source = gen_ffurf.to_module()
+    assert "hunter2" not in source
+    assert "1234" not in source
+    settings = build(gen_ffurf).from_env({"PASSWORD": "hunter2", "PIN": "1234"})
+    assert settings.password == "hunter2"
+    assert settings.pin == 1234
+
+
+def test_codegen_blank_env_is_ignored(gen_ffurf):
+    settings = build(gen_ffurf).from_env({"MY_INT": "", "MY_STR": ""})
+    assert settings.my_int == 1
+    assert settings.my_str is None
+
+
+def test_codegen_writes_file(gen_ffurf, tmp_path):
+    fp = tmp_path / "settings.py"
+    source = gen_ffurf.to_module(fp=str(fp))
+    assert fp.read_text() == source
+
+
+def test_codegen_rejects_what_it_cannot_write(gen_ffurf):
+    gen_ffurf.add_config_key("my-checked", check=lambda v: True)
+    with pytest.raises(ValueError):
+        gen_ffurf.to_module()
+
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("a-b")
+    ffurf.add_config_key("a_b")
+    with pytest.raises(ValueError):
+        ffurf.to_module()
+
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-obj", key_type=Hoot, default_value="hoot")
+    with pytest.raises(ValueError):
+        ffurf.to_module()
+
+
+def test_codegen_imports_key_types():
+    import pathlib
+
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-path", key_type=pathlib.Path)
+    settings = build(ffurf).from_env({"MY_PATH": "/tmp/hoot"})
+    assert settings.my_path == pathlib.Path("/tmp/hoot")
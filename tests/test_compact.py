@@ -0,0 +1,116 @@
+import array
+import json
+
+import pytest
+import toml
+
+from ffurf import FfurfConfig
+
+
+@pytest.fixture
+def compact_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-ids", key_type=list[int], compact=True)
+    ffurf.add_config_key("my-thresholds", key_type=list[float], compact=True)
+    return ffurf
+
+
+def test_compact_from_string(compact_ffurf):
+    compact_ffurf.set_config_key("my-ids", "1, 2,3")
+    v = compact_ffurf["my-ids"]
+    assert isinstance(v, array.array)
+    assert v.typecode == "q"
+    assert list(v) == [1, 2, 3]
+
+
+def test_compact_from_list(compact_ffurf):
+    compact_ffurf.set_config_key("my-thresholds", [0.5, "1.5", 2])
+    v = compact_ffurf["my-thresholds"]
+    assert v.typecode == "d"
+    assert list(v) == [0.5, 1.5, 2.0]
+
+
+def test_compact_scalar_and_empty(compact_ffurf):
+    compact_ffurf.set_config_key("my-ids", 5)
+    assert list(compact_ffurf["my-ids"]) == [5]
+    compact_ffurf.set_config_key("my-ids", "")
+    assert len(compact_ffurf["my-ids"]) == 0
+    assert not compact_ffurf.key_is_valid("my-ids")
+
+
+def test_compact_custom_separator():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-ids", key_type=list[int], separator=":", compact=True)
+    ffurf.set_config_key("my-ids", "1:2:3")
+    assert list(ffurf["my-ids"]) == [1, 2, 3]
+    assert 'MY_IDS="1:2:3"' in ffurf.to_env()
+
+
+def test_compact_default_value():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key(
+        "my-ids", key_type=list[int], default_value="1,2", compact=True
+    )
+    assert list(ffurf["my-ids"]) == [1, 2]
+
+
+def test_compact_bad_element_raises(compact_ffurf):
+    with pytest.raises(TypeError):
+        compact_ffurf.set_config_key("my-ids", "1,hoot")
+    with pytest.raises(TypeError):
+        compact_ffurf.set_config_key("my-ids", [2**64])
+
+
+def test_compact_on_non_numeric_key_raises():
+    ffurf = FfurfConfig()
+    with pytest.raises(ValueError):
+        ffurf.add_config_key("my-strs", key_type=list[str], compact=True)
+    with pytest.raises(ValueError):
+        ffurf.add_config_key("my-int", key_type=int, compact=True)
+
+
+def test_compact_from_env(compact_ffurf, monkeypatch):
+    monkeypatch.setenv("MY_IDS", "4,5,6")
+    compact_ffurf.from_env()
+    assert list(compact_ffurf["my-ids"]) == [4, 5, 6]
+
+
+def test_compact_exports(compact_ffurf):
+    compact_ffurf.set_config_key("my-ids", [1, 2, 3])
+    compact_ffurf.set_config_key("my-thresholds", [0.5, float("inf")])
+
+    assert 'MY_IDS="1,2,3"' in compact_ffurf.to_env()
+    assert json.loads(compact_ffurf.to_json()) == {
+        "my-ids": [1, 2, 3],
+        "my-thresholds": [0.5, float("inf")],
+    }
+    assert toml.loads(compact_ffurf.to_toml())["my-ids"] == [1, 2, 3]
+    assert "my-ids = [1, 2, 3]" in compact_ffurf.to_groovy()
+    assert compact_ffurf.get_clean("my-ids") == "1,2,3"
+
+
+def test_compact_to_json_matches_list_key():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-ids", key_type=list[int], compact=True)
+    ffurf.add_config_key("my-list", key_type=list[int])
+    ffurf.add_config_key("my-str")
+    ffurf.set_config_key("my-ids", [1, 2])
+    ffurf.set_config_key("my-list", [1, 2])
+    ffurf.set_config_key("my-str", 'h"oot')
+    expected = json.dumps({"my-ids": [1, 2], "my-list": [1, 2], "my-str": 'h"oot'})
+    assert ffurf.to_json() == expected
+
+
+def test_compact_env_round_trip(compact_ffurf, monkeypatch):
+    compact_ffurf.set_config_key("my-ids", [1, 2, 3])
+    compact_ffurf.set_config_key("my-thresholds", [0.25, 1.0])
+    for line in compact_ffurf.to_env().splitlines():
+        k, v = line.split("=", 1)
+        monkeypatch.setenv(k, v.strip('"'))
+
+    reloaded = FfurfConfig()
+    reloaded.add_config_key("my-ids", key_type=list[int], compact=True)
+    reloaded.add_config_key("my-thresholds", key_type=list[float], compact=True)
+    reloaded.from_env()
+    assert reloaded["my-ids"] == compact_ffurf["my-ids"]
+    assert reloaded["my-thresholds"] == compact_ffurf["my-thresholds"]
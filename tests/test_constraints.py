@@ -0,0 +1,155 @@
+import pytest
+
+from ffurf import FfurfConfig
+
+
+@pytest.fixture
+def checked_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("port", key_type=int, min_value=1, max_value=65535)
+    ffurf.add_config_key("name", pattern=r"[a-z][a-z0-9-]*")
+    ffurf.add_config_key("level", choices=["debug", "info", "warn"])
+    ffurf.add_config_key("ports", key_type=list[int], max_value=1024)
+    ffurf.add_config_key("even", key_type=int, check=lambda v: v % 2 == 0)
+    ffurf.add_config_key("low", key_type=int, default_value=1)
+    ffurf.add_config_key("high", key_type=int, default_value=10)
+    return ffurf
+
+
+def fill(ffurf):
+    ffurf.set_config_key("port", "8080")
+    ffurf.set_config_key("name", "hoot")
+    ffurf.set_config_key("level", "info")
+    ffurf.set_config_key("ports", "22,80")
+    ffurf.set_config_key("even", 2)
+
+
+def test_constraints_pass(checked_ffurf):
+    fill(checked_ffurf)
+    assert checked_ffurf.is_valid()
+    assert checked_ffurf.validation_report() == {"valid": True, "keys": {}, "rules": []}
+
+
+@pytest.mark.parametrize(
+    "key,value,error",
+    [
+        ("port", 0, "must be at least 1"),
+        ("port", 70000, "must be at most 65535"),
+        ("name", "Hoot", "must match [a-z][a-z0-9-]*"),
+        ("level", "trace", "must be one of debug, info, warn"),
+        ("ports", "22,8080", "must be at most 1024"),
+        ("even", 3, "failed <lambda>"),
+    ],
+)
+def test_constraint_failures(checked_ffurf, key, value, error):
+    fill(checked_ffurf)
+    checked_ffurf.set_config_key(key, value, source="test")
+    assert not checked_ffurf.key_is_valid(key)
+    assert not checked_ffurf.is_valid()
+
+    report = checked_ffurf.validation_report()
+    assert not report["valid"]
+    assert list(report["keys"]) == [key]
+    assert report["keys"][key]["errors"] == [error]
+    assert report["keys"][key]["source"] == "test"
+
+
+def test_constraints_are_incremental(checked_ffurf):
+    fill(checked_ffurf)
+    checked_ffurf.set_config_key("port", 0)
+    assert not checked_ffurf.key_is_valid("port")
+    checked_ffurf.set_config_key("port", 80)
+    assert checked_ffurf.key_is_valid("port")
+    assert checked_ffurf.key_errors["port"] == []
+
+
+def test_report_collects_everything(checked_ffurf):
+    checked_ffurf.set_config_key("port", 0)
+    checked_ffurf.set_config_key("level", "trace")
+    report = checked_ffurf.validation_report()
+    assert report["keys"]["port"]["errors"] == ["must be at least 1"]
+    assert report["keys"]["level"]["errors"] == ["must be one of debug, info, warn"]
+    assert report["keys"]["name"]["errors"] == ["unset"]
+    assert set(report["keys"]) == {"port", "level", "name", "ports", "even"}
+
+
+def test_report_masks_secrets():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("token", secret=True, pattern=r"tok-\w+")
+    ffurf.set_config_key("token", "hunter2")
+    report = ffurf.validation_report()
+    assert "hunter2" not in report["keys"]["token"]["value"]
+
+
+def test_check_exceptions_are_failures():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("limit", min_value=5)
+    ffurf.set_config_key("limit", "ten")
+    errors = ffurf.validation_report()["keys"]["limit"]["errors"]
+    assert errors[0].startswith("must be at least 5 (")
+
+
+def test_cross_key_rule(checked_ffurf):
+    fill(checked_ffurf)
+    checked_ffurf.add_constraint(
+        ["low", "high"], lambda lo, hi: lo < hi, "low must be below high"
+    )
+    assert checked_ffurf.is_valid()
+
+    checked_ffurf.set_config_key("low", 20)
+    assert not checked_ffurf.key_is_valid("low")
+    assert not checked_ffurf.key_is_valid("high")
+    assert checked_ffurf.key_is_valid("port")
+    report = checked_ffurf.validation_report()
+    assert report["rules"] == [
+        {"keys": ["low", "high"], "error": "low must be below high"}
+    ]
+    assert report["keys"]["low"]["errors"] == ["low must be below high"]
+
+    checked_ffurf.set_config_key("high", 30)
+    assert checked_ffurf.is_valid()
+
+
+def test_cross_key_rule_unknown_key(checked_ffurf):
+    with pytest.raises(KeyError):
+        checked_ffurf.add_constraint(["low", "hoot"], lambda lo, hi: True)
+
+
+def test_constraints_with_override(checked_ffurf):
+    fill(checked_ffurf)
+    checked_ffurf.add_constraint(["low", "high"], lambda lo, hi: lo < hi)
+    with checked_ffurf.override(port=0, low=50):
+        report = checked_ffurf.validation_report()
+        assert report["keys"]["port"]["errors"] == ["must be at least 1"]
+        assert report["rules"][0]["keys"] == ["low", "high"]
+    assert checked_ffurf.is_valid()
+
+
+def test_constraints_with_overlay(checked_ffurf):
+    fill(checked_ffurf)
+    overlay = checked_ffurf.overlay(port=0)
+    assert not overlay.key_is_valid("port")
+    assert checked_ffurf.key_is_valid("port")
+
+
+def test_validate_prints_errors(checked_ffurf, capsys):
+    fill(checked_ffurf)
+    checked_ffurf.set_config_key("port", 0)
+    with pytest.raises(SystemExit):
+        checked_ffurf.validate()
+    assert "port: must be at least 1" in capsys.readouterr().out
+
+
+def test_snapshot_refuses_custom_checks(checked_ffurf):
+    with pytest.raises(ValueError):
+        checked_ffurf.dump_snapshot()
+
+
+def test_snapshot_keeps_declared_constraints():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("port", key_type=int, min_value=1, choices=[80, 443])
+    ffurf.set_config_key("port", 8080)
+    loaded = FfurfConfig.load_snapshot(ffurf.dump_snapshot())
+    assert loaded.validation_report()["keys"]["port"]["errors"] == [
+        "must be one of 80, 443"
+    ]
@@ -0,0 +1,82 @@
+import pytest
+
+from ffurf import FfurfConfig
+
+
+@pytest.fixture
+def diff_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-str")
+    ffurf.add_config_key("my-int", key_type=int, default_value=1)
+    ffurf.add_config_key("my-secret", secret=True)
+    ffurf.set_config_key("my-str", "hoot", source="hoot")
+    ffurf.set_config_key("my-secret", "hunter2", source="hoot")
+    return ffurf
+
+
+def test_diff_unchanged_is_empty(diff_ffurf):
+    snap = diff_ffurf.snapshot()
+    assert diff_ffurf.diff(snap) == {"added": {}, "removed": {}, "changed": {}}
+
+
+def test_diff_changed(diff_ffurf):
+    snap = diff_ffurf.snapshot()
+    diff_ffurf.set_config_key("my-str", "meow", source="meow")
+    diff_ffurf.set_config_key("my-int", 1, source="meow")
+
+    d = diff_ffurf.diff(snap)
+    # rewriting a key with the same value is not a change
+    assert d["changed"] == {
+        "my-str": {
+            "old": "hoot",
+            "new": "meow",
+            "old_source": "hoot",
+            "new_source": "meow",
+        }
+    }
+
+
+def test_diff_masks_secrets(diff_ffurf):
+    snap = diff_ffurf.snapshot()
+    diff_ffurf.set_config_key("my-secret", "hunter3", source="meow")
+    d = diff_ffurf.diff(snap)
+    assert d["changed"]["my-secret"]["old"] == "********"
+    assert d["changed"]["my-secret"]["new"] == "********"
+    assert "hunter" not in str(d)
+
+
+def test_diff_added_and_removed(diff_ffurf):
+    snap = diff_ffurf.snapshot()
+    diff_ffurf.add_config_key("my-new", default_value="new")
+    d = diff_ffurf.diff(snap)
+    assert d["added"] == {"my-new": {"value": "new", "source": "ffurf:default"}}
+
+    other = FfurfConfig()
+    other.add_config_key("my-str")
+    other.add_config_key("my-old")
+    other.set_config_key("my-str", "hoot", source="other")
+    d = other.diff(diff_ffurf)
+    assert set(d["removed"]) == {"my-int", "my-secret", "my-new"}
+    assert set(d["added"]) == {"my-old"}
+    assert d["changed"] == {}
+
+
+def test_diff_skips_unwritten_keys_without_comparing():
+    class NoCompare(str):
+        def __eq__(self, other):
+            raise AssertionError("values were compared")
+
+        __hash__ = str.__hash__
+
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-key", key_type=NoCompare, default_value="hoot")
+    ffurf.add_config_key("my-other")
+    snap = ffurf.snapshot()
+    ffurf.set_config_key("my-other", "meow")
+    assert list(ffurf.diff(snap)["changed"]) == ["my-other"]
+
+
+def test_snapshot_is_a_copy(diff_ffurf):
+    snap = diff_ffurf.snapshot()
+    diff_ffurf.set_config_key("my-str", "meow")
+    assert snap["my-str"]["value"] == "hoot"
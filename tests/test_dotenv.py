@@ -0,0 +1,163 @@
+import io
+import subprocess
+
+import pytest
+
+from ffurf import FfurfConfig, iter_dotenv
+from .test_list import list_ffurf, list_config, _assert_list_values
+
+
+@pytest.fixture
+def dotenv_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-str")
+    ffurf.add_config_key("my-int", key_type=int)
+    ffurf.add_config_key("my-quoted", optional=True)
+    ffurf.add_config_key("my-literal", optional=True)
+    return ffurf
+
+
+@pytest.fixture
+def dotenv_fp(tmpdir_factory):
+    return str(tmpdir_factory.mktemp("test_data").join("myconf.env"))
+
+
+def _write(fp, text):
+    with open(fp, "w") as fh:
+        fh.write(text)
+    return fp
+
+
+def test_iter_dotenv_parsing():
+    text = (
+        "# a comment\n"
+        "\n"
+        "PLAIN=hoot # trailing comment\n"
+        "export EXPORTED = meow\n"
+        'DOUBLE="a \\"quoted\\" \\\\ value\\n" # comment\n'
+        "SINGLE='no \\n escapes'\n"
+        'MULTI="first\n'
+        'second"\n'
+        "HASH=a#b\n"
+        "NOT A PAIR\n"
+        "EMPTY=\n"
+    )
+    assert dict(iter_dotenv(io.StringIO(text))) == {
+        "PLAIN": "hoot",
+        "EXPORTED": "meow",
+        "DOUBLE": 'a "quoted" \\ value\n',
+        "SINGLE": "no \\n escapes",
+        "MULTI": "first\nsecond",
+        "HASH": "a#b",
+        "EMPTY": "",
+    }
+
+
+def test_iter_dotenv_skips_unwanted():
+    text = 'SKIP="over\nlines"\nKEEP=hoot\n'
+    assert list(iter_dotenv(io.StringIO(text), wanted={"KEEP"})) == [("KEEP", "hoot")]
+
+
+def test_iter_dotenv_unterminated_raises():
+    with pytest.raises(ValueError):
+        list(iter_dotenv(io.StringIO('BAD="hoot\n')))
+
+
+def test_from_dotenv(dotenv_ffurf, dotenv_fp):
+    _write(
+        dotenv_fp,
+        'MY_STR="hoot"\nMY_INT=100\nMY_QUOTED="a \\"b\\""\nUNKNOWN=1\nMY_LITERAL=\n',
+    )
+    dotenv_ffurf.from_dotenv(dotenv_fp)
+    assert dotenv_ffurf["my-str"] == "hoot"
+    assert dotenv_ffurf["my-int"] == 100
+    assert dotenv_ffurf["my-quoted"] == 'a "b"'
+    assert dotenv_ffurf["my-literal"] is None
+    assert dotenv_ffurf.get_source("my-str") == "%s:MY_STR" % dotenv_fp
+
+
+def test_from_dotenv_via_load(dotenv_ffurf, dotenv_fp):
+    _write(dotenv_fp, "MY_STR=hoot\nMY_INT=1\n")
+    dotenv_ffurf.load(dotenv_fp)
+    assert dotenv_ffurf["my-str"] == "hoot"
+
+
+def test_from_dotenv_is_all_or_nothing(dotenv_ffurf, dotenv_fp):
+    _write(dotenv_fp, "MY_STR=hoot\nMY_INT=hoot\n")
+    with pytest.raises(TypeError):
+        dotenv_ffurf.from_dotenv(dotenv_fp)
+    assert dotenv_ffurf["my-str"] is None
+
+
+def test_exception_from_missing_dotenv(dotenv_ffurf):
+    with pytest.raises(OSError):
+        dotenv_ffurf.from_dotenv("missing.env")
+
+
+def test_to_env_round_trips_through_dotenv(dotenv_ffurf, dotenv_fp):
+    dotenv_ffurf.set_config_key("my-str", 'C:\\new "path"')
+    dotenv_ffurf.set_config_key("my-int", 1)
+    dotenv_ffurf.set_config_key("my-quoted", "two\nlines")
+    dotenv_ffurf.set_config_key("my-literal", "it's")
+    _write(dotenv_fp, dotenv_ffurf.to_env())
+
+    reloaded = FfurfConfig()
+    for k in dotenv_ffurf:
+        reloaded.add_config_key(k, key_type=dotenv_ffurf.get_keyconf(k)["type"])
+    reloaded.from_dotenv(dotenv_fp)
+    for k in dotenv_ffurf:
+        assert reloaded[k] == dotenv_ffurf[k]
+
+
+def test_to_env_round_trip_skips_unset_keys(dotenv_ffurf, dotenv_fp):
+    dotenv_ffurf.add_config_key("my-port", key_type=int, optional=True)
+    dotenv_ffurf.set_config_key("my-str", "x  \n  y  ")
+    dotenv_ffurf.set_config_key("my-int", 1)
+    _write(dotenv_fp, dotenv_ffurf.to_env())
+
+    reloaded = FfurfConfig()
+    reloaded.add_config_key("my-str")
+    reloaded.add_config_key("my-int", key_type=int)
+    reloaded.add_config_key("my-quoted", optional=True)
+    reloaded.add_config_key("my-port", key_type=int, optional=True)
+    reloaded.from_dotenv(dotenv_fp)
+    assert reloaded["my-str"] == "x  \n  y  "
+    assert reloaded["my-int"] == 1
+    assert reloaded["my-quoted"] is None
+    assert reloaded["my-port"] is None
+
+
+def test_to_env_is_safe_for_a_shell(dotenv_ffurf, dotenv_fp):
+    value = 'cost $HOME `id` "q" \\'
+    dotenv_ffurf.set_config_key("my-str", value)
+    dotenv_ffurf.set_config_key("my-int", 1)
+    out = subprocess.run(
+        ["sh", "-c", dotenv_ffurf.to_env() + '\nprintf %s "$MY_STR"'],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert out == value
+    with open(_write(dotenv_fp, dotenv_ffurf.to_env())) as fh:
+        assert dict(iter_dotenv(fh))["MY_STR"] == value
+
+
+def test_list_dotenv_round_trip(list_ffurf, list_config, dotenv_fp):
+    list_ffurf.from_dict(list_config)
+    _write(dotenv_fp, list_ffurf.to_env())
+
+    reloaded = FfurfConfig()
+    reloaded.add_config_key("my-strs", key_type=list[str])
+    reloaded.add_config_key("my-ints", key_type=list[int])
+    reloaded.add_config_key("my-bare", key_type=list)
+    reloaded.from_dotenv(dotenv_fp)
+    _assert_list_values(reloaded, list_config)
+
+
+def test_env_name_shared_by_two_keys(monkeypatch):
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-str")
+    ffurf.add_config_key("my_str")
+    monkeypatch.setenv("MY_STR", "hoot")
+    ffurf.from_env()
+    assert ffurf["my-str"] == ffurf["my_str"] == "hoot"
@@ -0,0 +1,101 @@
+import pytest
+
+from ffurf import FfurfConfig, FfurfSecretResolver
+
+
+@pytest.fixture
+def env_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-str", default_value='say "hoot"')
+    ffurf.add_config_key("my-int", key_type=int, default_value=1)
+    ffurf.add_config_key("my-optional", optional=True)
+    ffurf.add_config_key(
+        "my-paths", key_type=list[str], separator=":", default_value=["a", "b"]
+    )
+    ffurf.add_config_key(
+        "my-ids", key_type=list[int], compact=True, default_value="1,2"
+    )
+    return ffurf
+
+
+def test_to_env_dict(env_ffurf):
+    assert env_ffurf.to_env_dict() == {
+        "MY_STR": 'say "hoot"',
+        "MY_INT": "1",
+        "MY_OPTIONAL": "",
+        "MY_PATHS": "a:b",
+        "MY_IDS": "1,2",
+    }
+
+
+def test_to_env_dict_round_trips(env_ffurf, monkeypatch):
+    env_ffurf.set_config_key("my-int", 2)
+    for k, v in env_ffurf.to_env_dict().items():
+        monkeypatch.setenv(k, v)
+
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-str")
+    ffurf.add_config_key("my-int", key_type=int)
+    ffurf.add_config_key("my-optional", optional=True)
+    ffurf.add_config_key("my-paths", key_type=list[str], separator=":")
+    ffurf.add_config_key("my-ids", key_type=list[int], compact=True)
+    ffurf.from_env()
+    for k in ffurf:
+        assert ffurf[k] == env_ffurf[k]
+
+
+def test_to_env_dict_is_cached_until_written(env_ffurf, monkeypatch):
+    calls = []
+    env_dict = env_ffurf._env_dict
+    monkeypatch.setattr(env_ffurf, "_env_dict", lambda: calls.append(1) or env_dict())
+
+    env = env_ffurf.to_env_dict()
+    env["MY_INT"] = "hoot"
+    assert env_ffurf.to_env_dict()["MY_INT"] == "1"
+    assert len(calls) == 1
+
+    env_ffurf.set_config_key("my-int", 3)
+    assert env_ffurf.to_env_dict()["MY_INT"] == "3"
+    env_ffurf.add_config_key("my-new", default_value="new")
+    assert env_ffurf.to_env_dict()["MY_NEW"] == "new"
+    assert len(calls) == 3
+
+
+def test_to_env_dict_overrides_are_not_cached(env_ffurf):
+    env_ffurf.to_env_dict()
+    with env_ffurf.override({"my-int": 5}):
+        assert env_ffurf.to_env_dict()["MY_INT"] == "5"
+    assert env_ffurf.to_env_dict()["MY_INT"] == "1"
+
+
+def test_to_env_dict_overlay_sees_parent(env_ffurf):
+    overlay = env_ffurf.overlay({"my-str": "overlay"})
+    assert overlay.to_env_dict()["MY_STR"] == "overlay"
+    env_ffurf.set_config_key("my-int", 4)
+    assert overlay.to_env_dict()["MY_INT"] == "4"
+    assert env_ffurf.to_env_dict()["MY_STR"] == 'say "hoot"'
+
+
+def test_env_for_subprocess(env_ffurf):
+    env = env_ffurf.env_for_subprocess({"PATH": "/bin", "MY_INT": "9"})
+    assert env["PATH"] == "/bin"
+    assert env["MY_INT"] == "1"
+    assert env["MY_PATHS"] == "a:b"
+
+
+def test_to_env_dict_picks_up_rotated_secrets(tmp_path):
+    now = [0.0]
+    secret_fp = tmp_path / "pw"
+    secret_fp.write_text("hunter2\n")
+    ffurf = FfurfConfig(
+        secret_resolver=FfurfSecretResolver(ttl=60, clock=lambda: now[0])
+    )
+    ffurf.add_config_key("my-pw", secret=True)
+    ffurf.add_config_key("my-str", default_value="hoot")
+    ffurf.set_config_key("my-pw", "file:%s" % secret_fp)
+    assert ffurf.to_env_dict() == {"MY_PW": "hunter2", "MY_STR": "hoot"}
+
+    secret_fp.write_text("hunter3\n")
+    now[0] = 61
+    assert ffurf["my-pw"] == "hunter3"
+    assert ffurf.to_env_dict()["MY_PW"] == "hunter3"
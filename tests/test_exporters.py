@@ -0,0 +1,82 @@
+import shlex
+import subprocess
+
+import pytest
+
+from ffurf import FfurfConfig
+from ffurf.exporters import FfurfExporter, JsonExporter, register_exporter
+
+
+@pytest.fixture
+def export_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-str", default_value='it\'s "hoot"')
+    ffurf.add_config_key("my-int", key_type=int, default_value=1)
+    ffurf.add_config_key("my-float", key_type=float, default_value=float("inf"))
+    ffurf.add_config_key("my-bool", key_type=bool, default_value=False)
+    ffurf.add_config_key("my-optional", optional=True)
+    ffurf.add_config_key(
+        "my-paths", key_type=list[str], separator=":", default_value="a:b"
+    )
+    ffurf.add_config_key(
+        "my-ids", key_type=list[int], compact=True, default_value="1,2"
+    )
+    return ffurf
+
+
+def test_to_yaml(export_ffurf):
+    assert export_ffurf.to_yaml() == "\n".join(
+        [
+            '"my-bool": false',
+            '"my-float": .inf',
+            '"my-ids": [1, 2]',
+            '"my-int": 1',
+            '"my-optional": null',
+            '"my-paths": ["a", "b"]',
+            '"my-str": "it\'s \\"hoot\\""',
+        ]
+    )
+
+
+def test_to_shell(export_ffurf):
+    shell = export_ffurf.to_shell()
+    assert "export MY_PATHS=a:b" in shell.splitlines()
+    assert "export MY_OPTIONAL=''" in shell.splitlines()
+
+    out = subprocess.run(
+        ["sh", "-c", shell + '\nprintf %s "$MY_STR"'],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert out == export_ffurf["my-str"]
+    assert shlex.split(shell.splitlines()[-1]) == ["export", "MY_STR=" + out]
+
+
+def test_export_names_and_overrides(export_ffurf):
+    assert export_ffurf.export("json", [("n", "my-int")]) == '{"n": 1}'
+    with export_ffurf.override({"my-int": 2}):
+        assert export_ffurf.export("json", [("n", "my-int")]) == '{"n": 2}'
+
+
+def test_export_follows_redefined_key(export_ffurf):
+    export_ffurf.add_config_key("my-int", key_type=list[int], default_value="1,2")
+    assert 'MY_INT="1,2"' in export_ffurf.to_env()
+
+
+class CsvExporter(FfurfExporter):
+    formats = JsonExporter.formats
+    unset = "null"
+
+    def render(self, rows):
+        return "\n".join("%s,%s" % (name, v) for name, _, v in rows)
+
+
+def test_register_exporter(export_ffurf):
+    register_exporter("csv", CsvExporter())
+    assert export_ffurf.export("csv").splitlines()[0] == "my-bool,false"
+
+    with pytest.raises(KeyError):
+        export_ffurf.export("not-a-format")
+    with pytest.raises(TypeError):
+        register_exporter("bad", object())
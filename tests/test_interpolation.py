@@ -0,0 +1,157 @@
+import pytest
+
+from ffurf import FfurfConfig
+
+
+@pytest.fixture
+def paths_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("base_dir")
+    ffurf.add_config_key("log_dir", interpolate=True, default_value="${base_dir}/logs")
+    ffurf.add_config_key(
+        "log_file", interpolate=True, default_value="${log_dir}/app.log"
+    )
+    ffurf.add_config_key("port", key_type=int, default_value=8000)
+    ffurf.add_config_key(
+        "admin_port", key_type=int, interpolate=True, default_value="1${port}"
+    )
+    return ffurf
+
+
+def test_interpolation(paths_ffurf):
+    assert paths_ffurf["log_dir"] is None
+    paths_ffurf.set_config_key("base_dir", "/srv", source="test")
+    assert paths_ffurf["log_dir"] == "/srv/logs"
+    assert paths_ffurf["log_file"] == "/srv/logs/app.log"
+    assert paths_ffurf["admin_port"] == 18000
+    assert paths_ffurf.is_valid()
+
+
+def test_interpolation_recomputes_dependents_only(paths_ffurf):
+    paths_ffurf.set_config_key("base_dir", "/srv", source="test")
+    port_version = paths_ffurf.config["admin_port"]["version"]
+    log_version = paths_ffurf.config["log_file"]["version"]
+
+    paths_ffurf.set_config_key("base_dir", "/opt", source="test")
+    assert paths_ffurf["log_file"] == "/opt/logs/app.log"
+    assert paths_ffurf.config["log_file"]["version"] > log_version
+    assert paths_ffurf.config["admin_port"]["version"] == port_version
+
+
+def test_interpolation_replaced_template(paths_ffurf):
+    paths_ffurf.set_config_key("base_dir", "/srv", source="test")
+    paths_ffurf.set_config_key("log_dir", "/var/log", source="test")
+    assert paths_ffurf["log_file"] == "/var/log/app.log"
+    paths_ffurf.set_config_key("base_dir", "/opt", source="test")
+    assert paths_ffurf["log_dir"] == "/var/log"
+    assert "log_dir" not in paths_ffurf.dependents["base_dir"]
+
+
+def test_interpolation_from_dict(paths_ffurf):
+    paths_ffurf.from_dict(
+        {"base_dir": "/srv", "log_dir": "${base_dir}/log", "port": 9000}
+    )
+    assert paths_ffurf["log_file"] == "/srv/log/app.log"
+    assert paths_ffurf["admin_port"] == 19000
+
+
+def test_interpolation_batch_order():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("a")
+    ffurf.add_config_key("b", interpolate=True)
+    ffurf.add_config_key("c", interpolate=True)
+    # c is written before the b it depends on
+    ffurf.from_dict({"c": "${b}!", "b": "${a}?", "a": "hoot"})
+    assert ffurf["c"] == "hoot?!"
+
+
+def test_interpolation_cycle():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("a", interpolate=True, default_value="${b}")
+    ffurf.add_config_key("b", interpolate=True, default_value="${c}")
+    ffurf.add_config_key("c", interpolate=True)
+    with pytest.raises(ValueError, match="c -> a -> b -> c"):
+        ffurf.set_config_key("c", "${a}")
+    assert ffurf.config["c"]["template"] is None
+
+
+def test_interpolation_self_reference():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("a", interpolate=True)
+    with pytest.raises(ValueError):
+        ffurf.set_config_key("a", "${a}")
+
+
+def test_interpolation_bad_type(paths_ffurf):
+    paths_ffurf.set_config_key("base_dir", "/srv")
+    with pytest.raises(TypeError):
+        paths_ffurf.set_config_key("admin_port", "${base_dir}")
+
+
+def test_interpolation_escape():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("a", interpolate=True, default_value="$${a} costs $$5")
+    assert ffurf["a"] == "${a} costs $5"
+
+
+def test_interpolation_without_flag():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("a", default_value="${b}")
+    assert ffurf["a"] == "${b}"
+
+
+def test_interpolation_key_added_later():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("url", interpolate=True, default_value="http://${host}/")
+    assert ffurf["url"] is None
+    ffurf.add_config_key("host", default_value="localhost")
+    assert ffurf["url"] == "http://localhost/"
+
+
+def test_interpolation_masks_secrets():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("password", secret=True, default_value="hunter2")
+    ffurf.add_config_key(
+        "dsn", interpolate=True, default_value="pg://sam:${password}@db"
+    )
+    assert ffurf["dsn"] == "pg://sam:hunter2@db"
+    assert ffurf.get_clean("dsn") == "pg://sam:********@db"
+    assert "hunter2" not in str(ffurf)
+    assert "hunter2" not in str(list(ffurf.table_rows()))
+
+
+def test_interpolation_provenance(paths_ffurf):
+    paths_ffurf.set_config_key("base_dir", "/srv", source="env:BASE_DIR")
+    provenance = paths_ffurf.get_provenance("log_file")
+    assert provenance["template"] == "${log_dir}/app.log"
+    assert provenance["source"] == "ffurf:default"
+    assert provenance["inputs"][0]["key"] == "log_dir"
+    assert provenance["inputs"][0]["inputs"][0] == {
+        "key": "base_dir",
+        "source": "env:BASE_DIR",
+        "template": None,
+        "inputs": [],
+    }
+
+
+def test_interpolation_in_overlay(paths_ffurf):
+    paths_ffurf.set_config_key("base_dir", "/srv", source="test")
+    overlay = paths_ffurf.overlay(base_dir="/tmp")
+    assert overlay["log_file"] == "/tmp/logs/app.log"
+    assert paths_ffurf["log_file"] == "/srv/logs/app.log"
+
+
+def test_interpolation_snapshot(paths_ffurf):
+    paths_ffurf.set_config_key("base_dir", "/srv", source="test")
+    loaded = FfurfConfig.load_snapshot(paths_ffurf.dump_snapshot())
+    assert loaded["log_file"] == "/srv/logs/app.log"
+    loaded.set_config_key("base_dir", "/opt")
+    assert loaded["log_file"] == "/opt/logs/app.log"
+
+
+def test_interpolation_cycle_in_batch():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("a", interpolate=True)
+    ffurf.add_config_key("b", interpolate=True)
+    with pytest.raises(ValueError):
+        ffurf.from_dict({"a": "${b}", "b": "${a}"})
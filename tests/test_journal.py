@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from ffurf import FfurfConfig
+
+
+@pytest.fixture
+def journal_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("host", default_value="localhost")
+    ffurf.add_config_key("port", key_type=int)
+    ffurf.add_config_key("password", secret=True)
+    ffurf.add_config_key(
+        "url", interpolate=True, default_value="http://${host}:${port}"
+    )
+    ffurf.enable_journal(size=16)
+    return ffurf
+
+
+def test_journal_records_changes(journal_ffurf):
+    journal_ffurf.set_config_key("host", "example.com", source="test")
+    journal_ffurf.set_config_key("port", 80, source="test")
+    entries = journal_ffurf.export_journal()
+    assert [e["key"] for e in entries] == ["host", "url", "port", "url"]
+    assert entries[0]["old"] == "localhost"
+    assert entries[0]["new"] == "example.com"
+    assert entries[0]["old_source"] == "ffurf:default"
+    assert entries[0]["source"] == "test"
+    assert entries[0]["version"] < entries[2]["version"]
+    json.dumps(entries)
+
+
+def test_journal_renders_interpolated_keys(journal_ffurf):
+    journal_ffurf.set_config_key("port", 80, source="test")
+    journal_ffurf.set_config_key("password", "hunter2", source="test")
+    journal_ffurf.set_config_key("url", "http://${host}:${password}", source="test")
+    entries = journal_ffurf.export_journal()
+    assert entries[1]["key"] == "url"
+    assert entries[1]["old"] == ""
+    assert entries[1]["new"] == "http://localhost:80"
+    assert (
+        entries[1]["old_template"]
+        == entries[1]["new_template"]
+        == "http://${host}:${port}"
+    )
+    assert entries[3]["old"] == "http://localhost:80"
+    assert entries[3]["new"] == "http://localhost:********"
+    assert entries[3]["new_template"] == "http://${host}:${password}"
+    assert entries[0]["old_template"] is None
+    assert "hunter" not in json.dumps(entries)
+
+    journal_ffurf.rollback(entries[2]["version"])
+    assert journal_ffurf["url"] == "http://localhost:80"
+
+
+def test_journal_is_bounded(journal_ffurf):
+    for i in range(100):
+        journal_ffurf.set_config_key("port", i, source="test")
+    assert len(journal_ffurf.journal) == 16
+    port_entries = [e for e in journal_ffurf.export_journal() if e["key"] == "port"]
+    assert port_entries[-1]["new"] == "99"
+
+
+def test_journal_masks_secrets(journal_ffurf):
+    journal_ffurf.set_config_key("password", "hunter2", source="test")
+    journal_ffurf.set_config_key("password", "hunter3", source="test")
+    assert "hunter" not in json.dumps(journal_ffurf.export_journal())
+
+
+def test_rollback(journal_ffurf):
+    journal_ffurf.set_config_key("port", 80, source="good")
+    good = journal_ffurf.version
+    journal_ffurf.from_dict({"host": "bad.example.com", "port": 666})
+    journal_ffurf.set_config_key("password", "hunter2", source="bad")
+    assert journal_ffurf["url"] == "http://bad.example.com:666"
+
+    restored = journal_ffurf.rollback(good)
+    assert restored == ["host", "password", "port", "url"]
+    assert journal_ffurf["host"] == "localhost"
+    assert journal_ffurf.get_source("host") == "ffurf:default"
+    assert journal_ffurf["port"] == 80
+    assert journal_ffurf.get_source("port") == "good"
+    assert journal_ffurf["password"] is None
+    assert journal_ffurf["url"] == "http://localhost:80"
+
+
+def test_rollback_is_one_notification(journal_ffurf):
+    journal_ffurf.set_config_key("port", 80, source="good")
+    good = journal_ffurf.version
+    journal_ffurf.set_config_key("port", 666, source="bad")
+    journal_ffurf.set_config_key("host", "bad.example.com", source="bad")
+    calls = []
+    journal_ffurf.subscribe(["host", "port"], calls.append)
+    journal_ffurf.rollback(good)
+    assert calls == [{"host": "localhost", "port": 80}]
+
+
+def test_rollback_too_far(journal_ffurf):
+    start = journal_ffurf.version
+    for i in range(20):
+        journal_ffurf.set_config_key("port", i, source="test")
+    with pytest.raises(ValueError):
+        journal_ffurf.rollback(start)
+    with pytest.raises(ValueError):
+        journal_ffurf.rollback(start - 1)
+
+
+def test_rollback_without_journal():
+    ffurf = FfurfConfig()
+    with pytest.raises(ValueError):
+        ffurf.rollback(0)
+    assert ffurf.export_journal() == []
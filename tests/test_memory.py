@@ -0,0 +1,62 @@
+import sys
+
+import pytest
+
+from ffurf import FfurfConfig
+
+
+@pytest.fixture
+def memory_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("small")
+    ffurf.add_config_key("big")
+    ffurf.add_config_key("many", key_type=list[str])
+    ffurf.add_config_key("unset", optional=True)
+    ffurf.set_config_key("small", "a", source="test")
+    ffurf.set_config_key("big", "x" * 10000, source="test")
+    ffurf.set_config_key("many", ["hoot", "meow"], source="test")
+    return ffurf
+
+
+def test_memory_report_keys(memory_ffurf):
+    report = memory_ffurf.memory_report()
+    assert [r["key"] for r in report.keys][0] == "big"
+    assert {r["key"] for r in report.keys} == {"small", "big", "many", "unset"}
+
+    big = report.keys[0]
+    assert big["value"] == sys.getsizeof("x" * 10000)
+    assert big["source"] == sys.getsizeof("test")
+    assert big["total"] == big["value"] + big["metadata"] + big["source"]
+    assert report.total >= big["value"]
+    assert report.allocations is None
+
+
+def test_memory_report_strings(memory_ffurf):
+    strings = memory_ffurf.memory_report().strings
+    # each key's name is the same object as its dict key
+    assert strings["shared"] >= 4
+    assert strings["duplicated"] == 0
+
+    # built at runtime, so an equal but separate copy of the "test" sources
+    memory_ffurf.set_config_key("small", "".join(["te", "st"]), source="test")
+    strings = memory_ffurf.memory_report().strings
+    assert strings["duplicated"] == 1
+    assert strings["duplicated_bytes"] == sys.getsizeof("test")
+
+
+def test_memory_report_profile(tmp_path, memory_ffurf):
+    toml_fp = tmp_path / "config.toml"
+    toml_fp.write_text('small = "%s"\n' % ("y" * 50000))
+    report = memory_ffurf.memory_report(load=lambda c: c.from_toml(str(toml_fp)), top=3)
+    assert memory_ffurf["small"] == "y" * 50000
+    assert 0 < len(report.allocations) <= 3
+    assert sum(a["size"] for a in report.allocations) >= 50000
+    assert report.as_dict()["allocations"] == report.allocations
+
+
+def test_memory_report_print_table(memory_ffurf, capsys):
+    memory_ffurf.memory_report().print_table()
+    out = capsys.readouterr().out
+    assert out.startswith("Memory: ")
+    assert "big" in out
+    assert "duplicated_bytes" in out
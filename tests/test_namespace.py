@@ -0,0 +1,150 @@
+import json
+
+import pytest
+import toml
+
+from ffurf import FfurfConfig
+
+
+@pytest.fixture
+def ns_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("db.primary.host")
+    ffurf.add_config_key("db.primary.port", key_type=int)
+    ffurf.add_config_key("db.replica.host")
+    ffurf.add_config_key("db.password", secret=True)
+    ffurf.add_config_key("name")
+    return ffurf
+
+
+def test_namespace_lookup(ns_ffurf):
+    ns_ffurf.set_config_key("db.primary.host", "primary")
+    ns = ns_ffurf.namespace("db.primary")
+    assert ns["host"] == "primary"
+    assert ns.get("port") is None
+    assert ns.get("port", 5432) == 5432
+    assert "host" in ns
+    assert "replica" not in ns
+    with pytest.raises(KeyError):
+        ns["nope"]
+
+
+def test_namespace_iter_and_len(ns_ffurf):
+    ns = ns_ffurf.namespace("db")
+    assert list(ns) == ["password", "primary.host", "primary.port", "replica.host"]
+    assert len(ns) == 4
+    assert len(ns_ffurf.namespace("db.primary")) == 2
+
+
+def test_namespace_len_skips_its_own_key(ns_ffurf):
+    ns_ffurf.add_config_key("db")
+    ns = ns_ffurf.namespace("db")
+    assert len(ns) == len(list(ns)) == 4
+
+
+def test_namespace_is_a_view(ns_ffurf):
+    ns = ns_ffurf.namespace("db.replica")
+    ns_ffurf.set_config_key("db.replica.host", "replica")
+    assert ns["host"] == "replica"
+
+
+def test_namespace_of_nested_namespace(ns_ffurf):
+    ns = ns_ffurf.namespace("db").namespace("primary")
+    assert ns.prefix == "db.primary"
+    assert list(ns) == ["host", "port"]
+
+
+def test_namespace_missing_prefix_raises(ns_ffurf):
+    with pytest.raises(KeyError):
+        ns_ffurf.namespace("cache")
+    with pytest.raises(KeyError):
+        # a key with nothing beneath it is not a namespace
+        ns_ffurf.namespace("name")
+    with pytest.raises(KeyError):
+        # prefixes are matched on whole segments
+        ns_ffurf.namespace("db.prim")
+
+
+def test_namespace_re_adding_key_does_not_double_count(ns_ffurf):
+    ns_ffurf.add_config_key("db.replica.host")
+    assert len(ns_ffurf.namespace("db")) == 4
+
+
+def test_namespace_to_json(ns_ffurf):
+    ns_ffurf.set_config_key("db.primary.host", "primary")
+    ns_ffurf.set_config_key("db.primary.port", 5432)
+    ns_ffurf.set_config_key("name", "hoot")
+    assert json.loads(ns_ffurf.namespace("db.primary").to_json()) == {
+        "host": "primary",
+        "port": 5432,
+    }
+
+
+def test_namespace_to_env(ns_ffurf):
+    ns_ffurf.set_config_key("db.primary.host", "primary")
+    ns_ffurf.set_config_key("name", "hoot")
+    env = ns_ffurf.namespace("db.primary").to_env()
+    assert 'DB_PRIMARY_HOST="primary"' in env
+    assert "NAME" not in env
+
+
+def test_namespace_masks_secrets(ns_ffurf):
+    ns_ffurf.set_config_key("db.password", "hunter2")
+    ns = ns_ffurf.namespace("db")
+    assert ns.get_clean("password") == "********"
+    assert "hunter2" not in str(ns)
+
+
+def test_nested_dict_maps_to_dotted_keys(ns_ffurf):
+    ns_ffurf.from_dict(
+        {
+            "name": "hoot",
+            "db": {
+                "primary": {"host": "primary", "port": "5432"},
+                "replica.host": "replica",
+                "unknown": {"x": 1},
+            },
+        }
+    )
+    assert ns_ffurf["db.primary.host"] == "primary"
+    assert ns_ffurf["db.primary.port"] == 5432
+    assert ns_ffurf["db.replica.host"] == "replica"
+    assert ns_ffurf["name"] == "hoot"
+
+
+def test_nested_dict_under_a_key(ns_ffurf):
+    ns_ffurf.add_config_key("db")
+    ns_ffurf.add_config_key("options", key_type=dict)
+    ns_ffurf.add_config_key("options.debug", key_type=bool)
+    ns_ffurf.from_dict({"db": {"primary": {"host": "H2"}}, "options": {"debug": True}})
+    assert ns_ffurf["db.primary.host"] == "H2"
+    assert ns_ffurf["db"] is None
+    # dict keys take the table whole
+    assert ns_ffurf["options"] == {"debug": True}
+    assert ns_ffurf["options.debug"] is None
+    ns_ffurf.from_dict({"db": "D"})
+    assert ns_ffurf["db"] == "D"
+
+
+def test_nested_dict_default_and_profile(ns_ffurf):
+    ns_ffurf.from_dict(
+        {
+            "db": {"primary": {"host": "root"}, "replica": {"host": "root"}},
+            "default": {"db": {"primary": {"host": "default"}}},
+            "profile": {"sam": {"db.primary": {"host": "sam"}}},
+        },
+        profile="sam",
+    )
+    assert ns_ffurf["db.primary.host"] == "sam"
+    assert "profile.sam" in ns_ffurf.get_source("db.primary.host")
+    assert ns_ffurf["db.replica.host"] == "root"
+
+
+def test_nested_toml_tables(ns_ffurf, tmpdir_factory):
+    toml_fp = str(tmpdir_factory.mktemp("test_data").join("myconf.toml"))
+    with open(toml_fp, "w") as fh:
+        fh.write('name = "hoot"\n[db.primary]\nhost = "primary"\nport = 5432\n')
+    ns_ffurf.from_toml(toml_fp)
+    assert ns_ffurf["db.primary.host"] == "primary"
+    assert ns_ffurf["db.primary.port"] == 5432
+    assert ns_ffurf.get_source("db.primary.host") == toml_fp
@@ -0,0 +1,182 @@
+import asyncio
+import threading
+
+import pytest
+
+from ffurf import FfurfConfig, FfurfOverlay
+
+
+@pytest.fixture
+def base_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-str")
+    ffurf.add_config_key("my-int", key_type=int)
+    ffurf.add_config_key("my-secret", secret=True)
+    ffurf.add_config_key("port", key_type=int, default_value=80)
+    ffurf.set_config_key("my-str", "hoot", source="base")
+    ffurf.set_config_key("my-int", 1, source="base")
+    ffurf.set_config_key("my-secret", "hunter2", source="base")
+    return ffurf
+
+
+def test_overlay_overrides_without_touching_parent(base_ffurf):
+    overlay = base_ffurf.overlay({"my-str": "meow", "my-int": "2"}, port=8080)
+    assert isinstance(overlay, FfurfOverlay)
+    assert overlay["my-str"] == "meow"
+    assert overlay["my-int"] == 2
+    assert overlay["port"] == 8080
+    assert overlay.get_source("my-str") == "ffurf:overlay"
+    assert overlay["my-secret"] == "hunter2"
+    assert base_ffurf["my-str"] == "hoot"
+    assert base_ffurf["my-int"] == 1
+
+
+def test_overlay_only_copies_changed_keys(base_ffurf):
+    overlay = base_ffurf.overlay({"my-str": "meow"})
+    assert list(overlay.config.maps[0]) == ["my-str"]
+
+
+def test_overlay_sees_parent_changes(base_ffurf):
+    overlay = base_ffurf.overlay({"my-str": "meow"})
+    base_ffurf.set_config_key("my-int", 3)
+    base_ffurf.set_config_key("my-str", "woof")
+    assert overlay["my-int"] == 3
+    assert overlay["my-str"] == "meow"
+
+
+def test_overlay_writes_are_copy_on_write(base_ffurf):
+    overlay = base_ffurf.overlay()
+    overlay["my-int"] = 5
+    assert overlay["my-int"] == 5
+    assert base_ffurf["my-int"] == 1
+
+
+def test_overlay_of_overlay(base_ffurf):
+    inner = base_ffurf.overlay({"my-str": "meow"})
+    outer = inner.overlay({"my-int": 9})
+    assert outer["my-str"] == "meow"
+    assert outer["my-int"] == 9
+    assert inner["my-int"] == 1
+
+
+def test_overlay_cannot_add_keys(base_ffurf):
+    with pytest.raises(TypeError):
+        base_ffurf.overlay().add_config_key("my-new")
+
+
+def test_overlay_bad_values(base_ffurf):
+    with pytest.raises(KeyError):
+        base_ffurf.overlay({"no-key": 1})
+    with pytest.raises(TypeError):
+        base_ffurf.overlay(port="hoot")
+
+
+def test_overlay_masks_secrets(base_ffurf):
+    overlay = base_ffurf.overlay({"my-secret": "hunter3"})
+    assert overlay.get_clean("my-secret") == "********"
+    assert "hunter3" not in str(overlay)
+
+
+def test_override_scope(base_ffurf):
+    with base_ffurf.override({"my-str": "meow"}, port="2") as cfg:
+        assert cfg is base_ffurf
+        assert base_ffurf["my-str"] == "meow"
+        assert base_ffurf.get("port") == 2
+        assert base_ffurf.get_source("my-str") == "ffurf:override"
+        assert base_ffurf.get_clean("port") == "2"
+        with base_ffurf.override(port=3):
+            assert base_ffurf["port"] == 3
+            assert base_ffurf["my-str"] == "meow"
+        assert base_ffurf["port"] == 2
+    assert base_ffurf["my-str"] == "hoot"
+    assert base_ffurf["port"] == 80
+    assert base_ffurf.get_source("my-str") == "base"
+
+
+def test_override_is_undone_on_error(base_ffurf):
+    with pytest.raises(RuntimeError):
+        with base_ffurf.override({"my-str": "meow"}):
+            raise RuntimeError()
+    assert base_ffurf["my-str"] == "hoot"
+
+
+def test_override_affects_validity(base_ffurf):
+    with base_ffurf.override({"my-str": ""}):
+        assert not base_ffurf.is_valid()
+    assert base_ffurf.is_valid()
+
+
+def test_override_is_per_config(base_ffurf):
+    other = base_ffurf.overlay()
+    with base_ffurf.override({"my-str": "meow"}):
+        assert other["my-str"] == "hoot"
+
+
+def test_override_is_per_thread(base_ffurf):
+    seen = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def reader():
+        started.set()
+        release.wait()
+        seen.append(base_ffurf["my-str"])
+
+    t = threading.Thread(target=reader)
+    t.start()
+    started.wait()
+    with base_ffurf.override({"my-str": "meow"}):
+        release.set()
+        t.join()
+        assert base_ffurf["my-str"] == "meow"
+    assert seen == ["hoot"]
+
+
+def test_override_is_per_task(base_ffurf):
+    async def worker(value):
+        with base_ffurf.override({"my-str": value}):
+            await asyncio.sleep(0)
+            return base_ffurf["my-str"]
+
+    async def main():
+        return await asyncio.gather(worker("a"), worker("b"), worker("c"))
+
+    assert asyncio.run(main()) == ["a", "b", "c"]
+    assert base_ffurf["my-str"] == "hoot"
+
+
+def test_overlay_has_its_own_state(base_ffurf):
+    overlay = base_ffurf.overlay()
+    assert set(vars(FfurfConfig())) <= set(vars(overlay))
+    for attr in (
+        "subscribers",
+        "documents",
+        "url_state",
+        "argparse_cache",
+        "env_cache",
+    ):
+        parent_v, overlay_v = getattr(base_ffurf, attr), getattr(overlay, attr)
+        assert parent_v is None or parent_v is not overlay_v
+
+
+def test_overlay_copies_dependents_on_change(base_ffurf):
+    base_ffurf.add_config_key("url", interpolate=True, default_value="h:${port}")
+    overlay = base_ffurf.overlay({"port": 8080})
+    assert overlay.dependents is base_ffurf.dependents
+    assert overlay["url"] == "h:8080"
+
+    overlay.set_config_key("url", "${my-str}:${port}")
+    assert overlay.dependents is not base_ffurf.dependents
+    assert overlay["url"] == "hoot:8080"
+    assert "url" not in base_ffurf.dependents.get("my-str", ())
+    assert base_ffurf["url"] == "h:80"
+
+
+def test_override_keeps_the_version(base_ffurf):
+    env = base_ffurf.to_env_dict()
+    version = base_ffurf.version
+    with base_ffurf.override(port=8080):
+        assert base_ffurf.version == version
+        assert base_ffurf.to_env_dict()["PORT"] == "8080"
+    assert base_ffurf.env_cache["state"] == base_ffurf._state()
+    assert base_ffurf.to_env_dict() == env
@@ -0,0 +1,194 @@
+import json
+
+import pytest
+import toml
+
+from ffurf import FfurfConfig
+from ffurf.selective import read_toml_profile_extends
+
+
+@pytest.fixture
+def profile_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("host")
+    ffurf.add_config_key("port", key_type=int)
+    ffurf.add_config_key("region")
+    ffurf.add_config_key("db.user")
+    return ffurf
+
+
+@pytest.fixture
+def profile_doc():
+    return {
+        "host": "localhost",
+        "port": 80,
+        "region": "none",
+        "db": {"user": "root"},
+        "default": {"port": 8080},
+        "profile": {
+            "prod": {"host": "prod.example.com", "db": {"user": "prod"}},
+            "prod-eu": {"extends": "prod", "region": "eu-west"},
+            "prod-eu-2": {"extends": "prod-eu", "port": 443},
+            "staging": {"extends": "default", "host": "staging.example.com"},
+        },
+    }
+
+
+def test_profile_chain(profile_ffurf, profile_doc):
+    profile_ffurf._from_dict(profile_doc, source="doc", profile="prod-eu-2")
+    assert profile_ffurf["host"] == "prod.example.com"
+    assert profile_ffurf["port"] == 443
+    assert profile_ffurf["region"] == "eu-west"
+    assert profile_ffurf["db.user"] == "prod"
+
+    assert profile_ffurf.get_source("host") == "doc:profile.prod"
+    assert profile_ffurf.get_source("port") == "doc:profile.prod-eu-2"
+    assert profile_ffurf.get_source("region") == "doc:profile.prod-eu"
+    assert profile_ffurf.get_source("db.user") == "doc:profile.prod"
+
+
+def test_profile_chain_middle(profile_ffurf, profile_doc):
+    profile_ffurf._from_dict(profile_doc, source="doc", profile="prod-eu")
+    assert profile_ffurf["port"] == 8080
+    assert profile_ffurf.get_source("port") == "doc:default"
+    assert profile_ffurf["region"] == "eu-west"
+
+
+def test_profile_extends_default(profile_ffurf, profile_doc):
+    profile_ffurf._from_dict(profile_doc, source="doc", profile="staging")
+    assert profile_ffurf["host"] == "staging.example.com"
+    assert profile_ffurf["port"] == 8080
+
+
+def test_profile_cycle(profile_ffurf, profile_doc):
+    profile_doc["profile"]["prod"]["extends"] = "prod-eu-2"
+    with pytest.raises(ValueError, match="prod-eu-2 -> prod-eu -> prod -> prod-eu-2"):
+        profile_ffurf._from_dict(profile_doc, source="doc", profile="prod-eu-2")
+    assert profile_ffurf["host"] is None
+
+
+def test_profile_extends_unknown(profile_ffurf, profile_doc):
+    profile_doc["profile"]["prod"]["extends"] = "hoot"
+    with pytest.raises(ValueError, match="prod extends unknown profile hoot"):
+        profile_ffurf._from_dict(profile_doc, source="doc", profile="prod-eu")
+
+
+def test_unknown_profile_is_ignored(profile_ffurf, profile_doc):
+    profile_ffurf._from_dict(profile_doc, source="doc", profile="hoot")
+    assert profile_ffurf["host"] == "localhost"
+
+
+def test_extends_can_be_a_key():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("extends")
+    ffurf.from_dict(
+        {"profile": {"a": {"extends": "b"}, "b": {"extends": "c"}}}, profile="a"
+    )
+    assert ffurf["extends"] == "b"
+
+
+@pytest.mark.parametrize("fmt", ["toml", "json"])
+def test_profile_chain_from_file(tmp_path, profile_ffurf, profile_doc, fmt):
+    fp = str(tmp_path / ("config.%s" % fmt))
+    with open(fp, "w") as fh:
+        (toml if fmt == "toml" else json).dump(profile_doc, fh)
+    profile_ffurf.load(fp, profile="prod-eu-2")
+    assert profile_ffurf["region"] == "eu-west"
+    assert profile_ffurf.get_source("region") == "%s:profile.prod-eu" % fp
+
+
+@pytest.mark.parametrize("fmt", ["toml", "json"])
+def test_profile_chain_selective(tmp_path, profile_ffurf, profile_doc, fmt):
+    fp = str(tmp_path / ("config.%s" % fmt))
+    with open(fp, "w") as fh:
+        (toml if fmt == "toml" else json).dump(profile_doc, fh)
+    profile_ffurf.load(fp, profile="prod-eu-2", selective=True)
+    assert profile_ffurf["host"] == "prod.example.com"
+    assert profile_ffurf["region"] == "eu-west"
+    assert profile_ffurf["port"] == 443
+
+
+@pytest.mark.parametrize("fmt", ["toml", "json"])
+def test_profile_chain_selective_skips_other_profiles(
+    tmp_path, profile_ffurf, profile_doc, fmt, monkeypatch
+):
+    fp = str(tmp_path / ("config.%s" % fmt))
+    with open(fp, "w") as fh:
+        (toml if fmt == "toml" else json).dump(profile_doc, fh)
+    loaded = []
+    from_dict = FfurfConfig._from_dict
+    monkeypatch.setattr(
+        FfurfConfig,
+        "_from_dict",
+        lambda self, d, **kwargs: loaded.append(d) or from_dict(self, d, **kwargs),
+    )
+    profile_ffurf.load(fp, profile="prod-eu", selective=True)
+    assert set(loaded[0]["profile"]) == {"prod", "prod-eu"}
+    assert profile_ffurf["region"] == "eu-west"
+
+
+def test_read_toml_profile_extends():
+    text = (
+        "[profile.prod]\n"
+        'extends = "base" # comment\n'
+        'notes = """\n'
+        "[profile.fake]\n"
+        'extends = "nope"\n'
+        '"""\n'
+        "[profile.base]\n"
+        "port = 1\n"
+        "[profile]\n"
+        "dev.extends = 'prod'\n"
+        "[other]\n"
+        "extends = 1\n"
+    )
+    assert read_toml_profile_extends(text.splitlines(True)) == {
+        "profile": {
+            "prod": {"extends": "base"},
+            "base": {},
+            "dev": {"extends": "prod"},
+        }
+    }
+
+
+def test_documents_are_cached(tmp_path, profile_ffurf, profile_doc, monkeypatch):
+    fp = str(tmp_path / "config.toml")
+    with open(fp, "w") as fh:
+        toml.dump(profile_doc, fh)
+
+    parses = []
+    real_load = toml.load
+    monkeypatch.setattr(toml, "load", lambda f: parses.append(f) or real_load(f))
+
+    profile_ffurf.from_toml(fp, profile="prod-eu-2")
+    resolved = profile_ffurf.documents[fp]["resolved"]["prod-eu-2"]
+    profile_ffurf.set_config_key("port", 1)
+    profile_ffurf.from_toml(fp, profile="prod-eu-2")
+    assert len(parses) == 1
+    assert profile_ffurf.documents[fp]["resolved"]["prod-eu-2"] is resolved
+    assert profile_ffurf["port"] == 443
+
+    # a different profile is resolved from the same parse
+    profile_ffurf.from_toml(fp, profile="prod")
+    assert len(parses) == 1
+    assert profile_ffurf["region"] == "none"
+
+    # changing the file is noticed
+    profile_doc["profile"]["prod"]["host"] = "new.example.com"
+    with open(fp, "w") as fh:
+        toml.dump(profile_doc, fh)
+        fh.write("# padding, so the size changes too\n")
+    profile_ffurf.from_toml(fp, profile="prod")
+    assert len(parses) == 2
+    assert profile_ffurf["host"] == "new.example.com"
+
+
+def test_document_cache_sees_new_keys(tmp_path, profile_ffurf, profile_doc):
+    fp = str(tmp_path / "config.json")
+    profile_doc["extra"] = "hoot"
+    with open(fp, "w") as fh:
+        json.dump(profile_doc, fh)
+    profile_ffurf.from_json(fp)
+    profile_ffurf.add_config_key("extra")
+    profile_ffurf.from_json(fp)
+    assert profile_ffurf["extra"] == "hoot"
@@ -0,0 +1,149 @@
+import time
+
+import pytest
+
+from ffurf import FfurfConfig, FfurfSecretResolver
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def resolver(clock):
+    return FfurfSecretResolver(ttl=60, max_entries=2, refresh_ahead=10, clock=clock)
+
+
+@pytest.fixture
+def secret_fp(tmpdir_factory):
+    fp = str(tmpdir_factory.mktemp("secrets").join("db"))
+    with open(fp, "w") as fh:
+        fh.write("hunter2\n")
+    return fp
+
+
+def _write(fp, text):
+    with open(fp, "w") as fh:
+        fh.write(text)
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_resolve_file_and_env(resolver, secret_fp, monkeypatch):
+    monkeypatch.setenv("OTHER_VAR", "meow")
+    assert resolver.resolve("file:%s" % secret_fp) == "hunter2"
+    assert resolver.resolve("env:OTHER_VAR") == "meow"
+    assert resolver.resolve("hunter3") == "hunter3"
+    assert resolver.resolve("http://hoot") == "http://hoot"
+
+
+def test_resolve_missing_env_raises(resolver):
+    with pytest.raises(KeyError):
+        resolver.resolve("env:FFURF_NOT_SET")
+
+
+def test_resolve_caches_until_ttl(resolver, clock, secret_fp):
+    ref = "file:%s" % secret_fp
+    assert resolver.resolve(ref) == "hunter2"
+    _write(secret_fp, "hunter3")
+    clock.now = 30
+    assert resolver.resolve(ref) == "hunter2"
+    clock.now = 61
+    assert resolver.resolve(ref) == "hunter3"
+
+
+def test_resolve_refreshes_ahead_of_expiry(resolver, clock, secret_fp):
+    ref = "file:%s" % secret_fp
+    resolver.resolve(ref)
+    _write(secret_fp, "hunter3")
+    clock.now = 55
+    # still served from cache while the refresh runs in the background
+    assert resolver.resolve(ref) == "hunter2"
+    _wait_for(lambda: resolver.cache[ref][0] == "hunter3")
+    assert resolver.cache[ref][1] == 115
+    assert not resolver.refreshing
+
+
+def test_resolve_evicts_least_recently_used(resolver, tmpdir_factory):
+    refs = []
+    for i in range(3):
+        fp = str(tmpdir_factory.mktemp("secrets").join("s%d" % i))
+        _write(fp, "s%d" % i)
+        refs.append("file:%s" % fp)
+
+    resolver.resolve(refs[0])
+    resolver.resolve(refs[1])
+    resolver.resolve(refs[0])
+    resolver.resolve(refs[2])
+    assert list(resolver.cache) == [refs[0], refs[2]]
+
+
+def test_invalidate(resolver, secret_fp):
+    ref = "file:%s" % secret_fp
+    resolver.resolve(ref)
+    _write(secret_fp, "hunter3")
+    resolver.invalidate(ref)
+    assert resolver.resolve(ref) == "hunter3"
+
+
+def test_config_resolves_secret_keys(resolver, secret_fp, monkeypatch):
+    monkeypatch.setenv("DB_PORT_SECRET", "5432")
+    ffurf = FfurfConfig(secret_resolver=resolver)
+    ffurf.add_config_key("db-password", secret=True)
+    ffurf.add_config_key("db-port", key_type=int, secret=True)
+    ffurf.add_config_key("db-host", default_value="file:/not/a/secret")
+    ffurf.add_config_key("db-literal", secret=True, default_value="hunter9")
+
+    ffurf.set_config_key("db-password", "file:%s" % secret_fp)
+    ffurf.set_config_key("db-port", "env:DB_PORT_SECRET")
+
+    assert ffurf["db-password"] == "hunter2"
+    assert ffurf.get("db-port") == 5432
+    assert ffurf["db-host"] == "file:/not/a/secret"
+    assert ffurf["db-literal"] == "hunter9"
+    # the reference itself is what is stored
+    assert ffurf.get_keyconf("db-password")["value"] == "file:%s" % secret_fp
+
+
+def test_config_resolution_keeps_masking(resolver, secret_fp, capfd):
+    ffurf = FfurfConfig(secret_resolver=resolver)
+    ffurf.add_config_key("db-password", secret=True)
+    ffurf.set_config_key("db-password", "file:%s" % secret_fp)
+
+    assert ffurf.get_clean("db-password") == "********"
+    assert "hunter2" not in str(ffurf)
+    ffurf.print_table()
+    out, err = capfd.readouterr()
+    assert "hunter2" not in out
+    assert "********" in out
+
+
+def test_config_resolved_secret_bad_type(resolver, tmpdir_factory):
+    fp = str(tmpdir_factory.mktemp("secrets").join("port"))
+    _write(fp, "hoot")
+    ffurf = FfurfConfig(secret_resolver=resolver)
+    ffurf.add_config_key("db-port", key_type=int, secret=True)
+    ffurf.set_config_key("db-port", "file:%s" % fp)
+    with pytest.raises(TypeError):
+        ffurf["db-port"]
+
+
+def test_config_without_resolver_keeps_references():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("db-password", secret=True)
+    ffurf.set_config_key("db-password", "file:/run/secrets/db")
+    assert ffurf["db-password"] == "file:/run/secrets/db"
@@ -0,0 +1,127 @@
+import json
+
+import pytest
+import toml
+
+from ffurf import FfurfConfig
+from ffurf.selective import skip_json_value, split_toml_key
+from .test_ffurf import tiered_ffurf, test_config_tiers, _assert_config_values
+
+
+@pytest.fixture
+def selective_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-str")
+    ffurf.add_config_key("my-ints", key_type=list[int])
+    ffurf.add_config_key("db.primary.host")
+    ffurf.add_config_key("db.primary.port", key_type=int)
+    return ffurf
+
+
+@pytest.fixture
+def big_config():
+    return {
+        "my-str": "root",
+        "unrelated": {"deep": [{"x": "]}{["}, [1, [2, [3]]], None, True, 1.5e3]},
+        "my-ints": [1, 2, 3],
+        "db": {"primary": {"host": "root", "extra": {"a": 1}}, "replica": {"b": 2}},
+        "default": {"my-str": "default", "db.primary.port": 5432, "other": "x"},
+        "profile": {
+            "sam": {"db": {"primary": {"host": "sam"}}, "unrelated": [1]},
+            "other": {"my-str": "other", "huge": list(range(1000))},
+        },
+    }
+
+
+def _assert_same_as_full(load, selective_ffurf, fp, profile):
+    full = FfurfConfig()
+    for k in selective_ffurf:
+        full.add_config_key(k, key_type=selective_ffurf.get_keyconf(k)["type"])
+    getattr(full, load)(fp, profile=profile)
+    getattr(selective_ffurf, load)(fp, profile=profile, selective=True)
+    for k in full:
+        assert selective_ffurf[k] == full[k]
+        assert selective_ffurf.get_source(k) == full.get_source(k)
+
+
+@pytest.mark.parametrize("profile", [None, "sam", "other", "missing"])
+def test_selective_json_matches_full(
+    selective_ffurf, big_config, tmpdir_factory, profile
+):
+    json_fp = str(tmpdir_factory.mktemp("test_data").join("myconf.json"))
+    with open(json_fp, "w") as fh:
+        json.dump(big_config, fh, indent=2)
+    _assert_same_as_full("from_json", selective_ffurf, json_fp, profile)
+
+
+@pytest.mark.parametrize("profile", [None, "sam", "other", "missing"])
+def test_selective_toml_matches_full(
+    selective_ffurf, big_config, tmpdir_factory, profile
+):
+    # toml has no null, nor mixed arrays
+    big_config["unrelated"] = {"deep": {"x": "]}{[", "y": [[1, 2], [3]]}}
+    toml_fp = str(tmpdir_factory.mktemp("test_data").join("myconf.toml"))
+    with open(toml_fp, "w") as fh:
+        toml.dump(big_config, fh)
+    _assert_same_as_full("from_toml", selective_ffurf, toml_fp, profile)
+
+
+def test_selective_tiers(tiered_ffurf, test_config_tiers, tmpdir_factory):
+    json_fp = str(tmpdir_factory.mktemp("test_data").join("myconf.json"))
+    with open(json_fp, "w") as fh:
+        json.dump(test_config_tiers[0], fh)
+    tiered_ffurf.from_json(json_fp, profile="sam", selective=True)
+    _assert_config_values(tiered_ffurf, test_config_tiers[1])
+
+
+def test_selective_toml_ignores_fake_headers(selective_ffurf, tmpdir_factory):
+    toml_fp = str(tmpdir_factory.mktemp("test_data").join("myconf.toml"))
+    with open(toml_fp, "w") as fh:
+        fh.write(
+            'my-str = """\n[profile.other]\n"""\n'
+            "my-ints = [\n  1,\n  2,\n]\n"
+            "[profile.other]\n"
+            'my-str = "other"\n'
+            "[db.primary] # the primary\n"
+            'host = "x"\n'
+        )
+    selective_ffurf.from_toml(toml_fp, selective=True)
+    assert selective_ffurf["my-str"] == "[profile.other]\n"
+    assert selective_ffurf["my-ints"] == [1, 2]
+    assert selective_ffurf["db.primary.host"] == "x"
+
+
+def test_skip_json_value():
+    buf = b'{"a": "}", "b": [1, {"c": "\\"]"}]} tail'
+    assert buf[: skip_json_value(buf, 0)] == buf[:-5]
+    assert skip_json_value(b"123, 4", 0) == 3
+    assert skip_json_value(b'"x\\"y" ', 0) == 6
+
+
+@pytest.mark.parametrize("tricky", ["a]b{", '"q"', "[[", "}}"])
+def test_skip_large_json_value(tricky):
+    # larger than a chunk, with brackets (and escapes) in strings across chunks
+    value = {
+        "rows": [{"id": i, "s": tricky * (i % 7), "t": [[i], {}]} for i in range(20000)]
+    }
+    text = json.dumps(value).encode()
+    buf = text + b', "next": [1]}'
+    assert skip_json_value(buf, 0) == len(text)
+    with pytest.raises(ValueError):
+        skip_json_value(text[:-1], 0)
+
+
+def test_split_toml_key():
+    assert split_toml_key('profile."prod.eu" . db') == ("profile", "prod.eu", "db")
+    assert split_toml_key("a.'b c'") == ("a", "b c")
+
+
+@pytest.mark.parametrize(
+    "text", ["", "{", '{"my-str": "x",}', '{"my-str" "x"}', "{} {}"]
+)
+def test_selective_json_malformed(selective_ffurf, tmpdir_factory, text):
+    json_fp = str(tmpdir_factory.mktemp("test_data").join("myconf.json"))
+    with open(json_fp, "w") as fh:
+        fh.write(text)
+    with pytest.raises(ValueError):
+        selective_ffurf.from_json(json_fp, selective=True)
@@ -0,0 +1,122 @@
+import multiprocessing
+import time
+from multiprocessing import resource_tracker
+
+import pytest
+
+from ffurf import FfurfConfig, FfurfSecretResolver
+from ffurf.shared import SHARED_HEADER
+
+
+@pytest.fixture
+def shared_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-str")
+    ffurf.add_config_key("my-secret", secret=True)
+    ffurf.add_config_key("my-ids", key_type=list[int], compact=True)
+    ffurf.set_config_key("my-str", "hoot", source="hoot")
+    ffurf.set_config_key("my-secret", "hunter2", source="hoot")
+    ffurf.set_config_key("my-ids", "1,2,3", source="hoot")
+    return ffurf
+
+
+def _read_in_worker(args):
+    name, key = args
+    with FfurfConfig.attach_shared(name) as view:
+        return view[key], view.get_clean("my-secret"), view.generation
+
+
+def test_attach_shared_reads_values(shared_ffurf):
+    with shared_ffurf.publish_shared() as published:
+        with FfurfConfig.attach_shared(published.name) as view:
+            assert view["my-str"] == "hoot"
+            assert view.get("my-missing", "meow") == "meow"
+            assert view.get_clean("my-secret") == "********"
+            assert view.get_source("my-str") == "hoot"
+            assert list(view["my-ids"]) == [1, 2, 3]
+            assert list(view) == list(shared_ffurf)
+            assert "my-str" in view
+            assert view.is_valid()
+
+
+def test_shared_view_is_read_only(shared_ffurf):
+    with shared_ffurf.publish_shared() as published:
+        with FfurfConfig.attach_shared(published.name) as view:
+            with pytest.raises(TypeError):
+                view["my-str"] = "meow"
+
+
+def test_shared_view_sees_republish(shared_ffurf):
+    with shared_ffurf.publish_shared() as published:
+        with FfurfConfig.attach_shared(published.name) as view:
+            first = view.generation
+            shared_ffurf.set_config_key("my-str", "meow")
+            published.publish(shared_ffurf)
+            assert view.stale
+            assert view["my-str"] == "meow"
+            assert view.generation > first
+            assert not view.stale
+
+
+def test_shared_view_without_auto_refresh(shared_ffurf):
+    with shared_ffurf.publish_shared() as published:
+        with FfurfConfig.attach_shared(published.name, auto_refresh=False) as view:
+            shared_ffurf.set_config_key("my-str", "meow")
+            published.publish(shared_ffurf)
+            assert view["my-str"] == "hoot"
+            assert view.refresh()
+            assert view["my-str"] == "meow"
+
+
+def test_republish_too_large_raises(shared_ffurf):
+    with shared_ffurf.publish_shared(size=1024) as published:
+        shared_ffurf.set_config_key("my-str", "hoot" * 1024)
+        with pytest.raises(ValueError):
+            published.publish(shared_ffurf)
+
+
+def test_shared_config_in_pool(shared_ffurf):
+    with shared_ffurf.publish_shared() as published:
+        with multiprocessing.Pool(2) as pool:
+            results = pool.map(_read_in_worker, [(published.name, "my-str")] * 4)
+    assert results == [("hoot", "********", published.generation)] * 4
+
+
+def test_attach_does_not_touch_resource_tracker(shared_ffurf, monkeypatch):
+    with shared_ffurf.publish_shared() as published:
+        calls = []
+        monkeypatch.setattr(resource_tracker, "register", lambda *a: calls.append(a))
+        monkeypatch.setattr(resource_tracker, "unregister", lambda *a: calls.append(a))
+        with multiprocessing.Pool(4) as pool:
+            results = pool.map(_read_in_worker, [(published.name, "my-str")] * 32)
+        with FfurfConfig.attach_shared(published.name) as view:
+            assert view["my-str"] == "hoot"
+        assert calls == []
+        monkeypatch.undo()
+    assert results == [("hoot", "********", published.generation)] * 32
+
+
+def test_shared_view_resolves_secret_references(tmp_path):
+    secret_fp = tmp_path / "pin"
+    secret_fp.write_text("1234\n")
+    resolver = FfurfSecretResolver()
+    ffurf = FfurfConfig(secret_resolver=resolver)
+    ffurf.add_config_key("my-pin", key_type=int, secret=True)
+    ffurf.set_config_key("my-pin", "file:%s" % secret_fp)
+
+    with ffurf.publish_shared() as published:
+        with FfurfConfig.attach_shared(
+            published.name, secret_resolver=resolver
+        ) as view:
+            assert view["my-pin"] == 1234
+
+
+def test_shared_view_times_out_on_abandoned_publish(shared_ffurf):
+    with shared_ffurf.publish_shared() as published:
+        with FfurfConfig.attach_shared(published.name, auto_refresh=False) as view:
+            # a publisher that died part way through leaves an odd generation
+            SHARED_HEADER.pack_into(published.shm.buf, 0, view.generation + 1, 0)
+            start = time.monotonic()
+            with pytest.raises(TimeoutError):
+                view.refresh(timeout=0.2)
+            assert time.monotonic() - start < 2
@@ -0,0 +1,94 @@
+import array
+
+import pytest
+
+from ffurf import FfurfConfig, FfurfSecretResolver, SNAPSHOT_HEADER
+
+
+@pytest.fixture
+def snap_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-str")
+    ffurf.add_config_key("my-int", key_type=int, default_value=1)
+    ffurf.add_config_key("my-optional", optional=True)
+    ffurf.add_config_key("my-secret", secret=True)
+    ffurf.add_config_key("my-partial", partial_secret=4)
+    ffurf.add_config_key("my-paths", key_type=list[str], separator=":")
+    ffurf.add_config_key("my-ids", key_type=list[int], compact=True)
+    ffurf.add_config_key("db.primary.host")
+    ffurf.set_config_key("my-str", "hoot", source="hoot")
+    ffurf.set_config_key("my-secret", "hunter2", source="hoot")
+    ffurf.set_config_key("my-partial", "thisisverysecrethoot", source="hoot")
+    ffurf.set_config_key("my-paths", "a:b", source="hoot")
+    ffurf.set_config_key("my-ids", "1,2,3", source="hoot")
+    return ffurf
+
+
+def test_snapshot_round_trip(snap_ffurf):
+    loaded = FfurfConfig.load_snapshot(snap_ffurf.dump_snapshot())
+
+    assert list(loaded) == list(snap_ffurf)
+    for k in snap_ffurf:
+        assert loaded[k] == snap_ffurf[k]
+        assert loaded.get_source(k) == snap_ffurf.get_source(k)
+        assert loaded.get_clean(k) == snap_ffurf.get_clean(k)
+        assert loaded.get_keyconf(k)["type"] == snap_ffurf.get_keyconf(k)["type"]
+        assert loaded.key_is_valid(k) == snap_ffurf.key_is_valid(k)
+
+    assert isinstance(loaded["my-ids"], array.array)
+    assert loaded.get_keyconf("my-paths")["separator"] == ":"
+    assert loaded.namespace("db")["primary.host"] is None
+
+
+def test_snapshot_loaded_config_is_live(snap_ffurf):
+    loaded = FfurfConfig.load_snapshot(snap_ffurf.dump_snapshot())
+    loaded.set_config_key("my-int", "2")
+    assert loaded["my-int"] == 2
+    assert snap_ffurf["my-int"] == 1
+
+
+def test_snapshot_rejects_corruption(snap_ffurf):
+    blob = bytearray(snap_ffurf.dump_snapshot())
+    blob[-1] ^= 0xFF
+    with pytest.raises(ValueError, match="corrupt"):
+        FfurfConfig.load_snapshot(bytes(blob))
+
+    with pytest.raises(ValueError, match="corrupt"):
+        FfurfConfig.load_snapshot(snap_ffurf.dump_snapshot()[:-1])
+
+    with pytest.raises(ValueError, match="truncated"):
+        FfurfConfig.load_snapshot(b"FF")
+
+    with pytest.raises(ValueError, match="Not an ffurf snapshot"):
+        FfurfConfig.load_snapshot(b"X" * 64)
+
+
+def test_snapshot_rejects_version_skew(snap_ffurf):
+    blob = snap_ffurf.dump_snapshot()
+    magic, version, length, crc = SNAPSHOT_HEADER.unpack_from(blob)
+    skewed = SNAPSHOT_HEADER.pack(magic, version + 1, length, crc)
+    with pytest.raises(ValueError, match="version"):
+        FfurfConfig.load_snapshot(skewed + blob[SNAPSHOT_HEADER.size :])
+
+
+def test_snapshot_rejects_custom_types():
+    class Hoot(str):
+        pass
+
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-hoot", key_type=Hoot)
+    with pytest.raises(ValueError):
+        ffurf.dump_snapshot()
+
+
+def test_snapshot_resolves_secret_references(tmp_path):
+    secret_fp = tmp_path / "pin"
+    secret_fp.write_text("1234\n")
+    resolver = FfurfSecretResolver()
+    ffurf = FfurfConfig(secret_resolver=resolver)
+    ffurf.add_config_key("my-pin", key_type=int, secret=True)
+    ffurf.set_config_key("my-pin", "file:%s" % secret_fp)
+
+    loaded = FfurfConfig.load_snapshot(ffurf.dump_snapshot(), secret_resolver=resolver)
+    assert loaded["my-pin"] == 1234
+    assert loaded.get_clean("my-pin") == ffurf.get_clean("my-pin")
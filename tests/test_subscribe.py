@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ffurf import FfurfConfig
+
+
+@pytest.fixture
+def sub_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("db.host")
+    ffurf.add_config_key("db.port", key_type=int, default_value=5432)
+    ffurf.add_config_key("name")
+    ffurf.add_config_key(
+        "url", interpolate=True, default_value="pg://${db.host}:${db.port}"
+    )
+    return ffurf
+
+
+def test_subscribe_keys(sub_ffurf):
+    calls = []
+    sub_ffurf.subscribe(["name"], calls.append)
+    sub_ffurf.set_config_key("name", "hoot")
+    sub_ffurf.set_config_key("db.port", 1)
+    assert calls == [{"name": "hoot"}]
+
+
+def test_subscribe_prefix(sub_ffurf):
+    calls = []
+    sub_ffurf.subscribe("db", calls.append)
+    sub_ffurf.set_config_key("db.port", 1)
+    sub_ffurf.set_config_key("name", "hoot")
+    assert calls == [{"db.port": 1}]
+
+
+def test_subscribe_unknown(sub_ffurf):
+    with pytest.raises(KeyError):
+        sub_ffurf.subscribe(["hoot"], print)
+    with pytest.raises(KeyError):
+        sub_ffurf.subscribe("hoot", print)
+
+
+def test_subscribe_coalesces_loads(sub_ffurf, monkeypatch):
+    calls = []
+    sub_ffurf.subscribe("db", calls.append)
+    sub_ffurf.from_dict({"db": {"host": "localhost", "port": 1}, "name": "hoot"})
+    assert calls == [{"db.host": "localhost", "db.port": 1}]
+
+    monkeypatch.setenv("DB_HOST", "remote")
+    monkeypatch.setenv("DB_PORT", "2")
+    calls.clear()
+    sub_ffurf.from_env()
+    assert calls == [{"db.host": "remote", "db.port": 2}]
+
+
+def test_subscribe_batch_is_one_call(sub_ffurf):
+    sub_ffurf.set_config_key("db.host", "localhost")
+    calls = []
+    sub_ffurf.subscribe(["name", "db.port"], calls.append)
+    sub_ffurf.from_argparse(["--name", "hoot", "--db.port", "3"])
+    assert calls == [{"name": "hoot", "db.port": 3}]
+
+
+def test_subscribe_interpolated(sub_ffurf):
+    calls = []
+    sub_ffurf.subscribe(["db.host", "url"], calls.append)
+    sub_ffurf.set_config_key("db.host", "localhost")
+    assert calls == [{"db.host": "localhost", "url": "pg://localhost:5432"}]
+
+
+def test_unsubscribe(sub_ffurf):
+    calls = []
+    subscription = sub_ffurf.subscribe(["name"], calls.append)
+    prefix_subscription = sub_ffurf.subscribe("db", calls.append)
+    sub_ffurf.unsubscribe(subscription)
+    sub_ffurf.unsubscribe(prefix_subscription)
+    sub_ffurf.set_config_key("name", "hoot")
+    sub_ffurf.set_config_key("db.port", 1)
+    assert calls == []
+    assert not sub_ffurf.subscribers
+    assert not sub_ffurf.prefix_subscribers
+
+
+def test_subscriber_errors_are_reported(sub_ffurf, capsys):
+    calls = []
+
+    def broken(changes):
+        raise RuntimeError("meow")
+
+    sub_ffurf.subscribe(["name"], broken)
+    sub_ffurf.subscribe(["name"], calls.append)
+    sub_ffurf.set_config_key("name", "hoot")
+    assert sub_ffurf["name"] == "hoot"
+    assert calls == [{"name": "hoot"}]
+    assert "meow" in capsys.readouterr().err
+
+
+def test_subscribe_executor(sub_ffurf):
+    calls = []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        sub_ffurf.subscribe(["name"], calls.append, executor=executor)
+        sub_ffurf.set_config_key("name", "hoot")
+    assert calls == [{"name": "hoot"}]
+
+
+def test_overlay_does_not_notify_parent(sub_ffurf):
+    calls = []
+    sub_ffurf.subscribe(["name"], calls.append)
+    sub_ffurf.overlay(name="meow")
+    assert calls == []
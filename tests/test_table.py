@@ -0,0 +1,103 @@
+import io
+
+import pytest
+
+from ffurf import FfurfConfig
+
+
+@pytest.fixture
+def table_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("db.host")
+    ffurf.add_config_key("db.port", key_type=int, default_value=5432)
+    ffurf.add_config_key("db.password", secret=True)
+    ffurf.add_config_key("name", default_value="")
+    ffurf.add_config_key("motd", optional=True)
+    ffurf.set_config_key("db.host", "localhost", source="env:DB_HOST")
+    ffurf.set_config_key("motd", "x" * 100, source="motd.toml")
+    return ffurf
+
+
+def test_table_rows(table_ffurf):
+    assert list(table_ffurf.table_rows()) == [
+        ("db.host", "localhost", "env:DB_HOST", "O"),
+        ("db.password", "--------", "unset", "X"),
+        ("db.port", "5432", "ffurf:default", "O"),
+        ("motd", "x" * 100, "motd.toml", "O"),
+        ("name", "--------", "ffurf:default (blank)", "X"),
+    ]
+
+
+def test_table_rows_masks_secrets(table_ffurf):
+    table_ffurf.set_config_key("db.password", "hunter2", source="env:DB_PASSWORD")
+    row = dict((r[0], r) for r in table_ffurf.table_rows())["db.password"]
+    assert row == ("db.password", "********", "env:DB_PASSWORD", "O")
+
+
+def test_table_rows_filters(table_ffurf):
+    assert [r[0] for r in table_ffurf.table_rows(invalid=True)] == [
+        "db.password",
+        "name",
+    ]
+    assert [r[0] for r in table_ffurf.table_rows(prefix="db")] == [
+        "db.host",
+        "db.password",
+        "db.port",
+    ]
+    assert [r[0] for r in table_ffurf.table_rows(prefix="nope")] == []
+    assert [r[0] for r in table_ffurf.table_rows(source="env:")] == ["db.host"]
+    assert [r[0] for r in table_ffurf.table_rows(prefix="db", invalid=True)] == [
+        "db.password"
+    ]
+
+
+def test_table_rows_prefix_includes_key():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("db", optional=True)
+    ffurf.add_config_key("db.host", optional=True)
+    assert [r[0] for r in ffurf.table_rows(prefix="db")] == ["db", "db.host"]
+
+
+def test_table_rows_pages(table_ffurf):
+    keys = [r[0] for r in table_ffurf.table_rows()]
+    assert [r[0] for r in table_ffurf.table_rows(limit=2)] == keys[:2]
+    assert [r[0] for r in table_ffurf.table_rows(offset=2, limit=2)] == keys[2:4]
+    assert [r[0] for r in table_ffurf.table_rows(offset=4)] == keys[4:]
+
+
+def test_print_table_to_file(table_ffurf, capfd):
+    out = io.StringIO()
+    table_ffurf.print_table(file=out, invalid=True)
+    assert capfd.readouterr().out == ""
+    assert out.getvalue() == (
+        "Key          Value     Source                 Valid\n"
+        "===========  ========  =====================  =====\n"
+        "db.password  --------  unset                  X\n"
+        "name         --------  ffurf:default (blank)  X\n"
+    )
+
+
+def test_print_table_max_width(table_ffurf):
+    out = io.StringIO()
+    table_ffurf.print_table(file=out, max_width=10, prefix="motd")
+    assert out.getvalue() == (
+        "Key         Value       Source      Valid\n"
+        "==========  ==========  ==========  =====\n"
+        "motd        xxxxxxx...  motd.toml   O\n"
+    )
+
+
+def test_print_table_streams(table_ffurf):
+    # with fixed widths, each row is written before the next is read
+    out = io.StringIO()
+    rows = table_ffurf.table_rows()
+    seen = []
+
+    def watch():
+        for row in rows:
+            seen.append(out.getvalue().count("\n"))
+            yield row
+
+    table_ffurf.table_rows = lambda *args: watch()
+    table_ffurf.print_table(file=out, max_width=20)
+    assert seen == [2, 3, 4, 5, 6]
@@ -0,0 +1,168 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ffurf import FfurfConfig
+from ffurf.remote import FfurfHTTPPool
+
+
+class ConfigHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, dict(self.headers), self.client_address))
+        if server.status != 200:
+            self._send(server.status, b"")
+            return
+
+        etag = '"%d"' % server.revision
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"")
+            return
+
+        body = server.body.encode()
+        headers = {"ETag": etag, "Content-Type": server.content_type}
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        self._send(200, body, headers)
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ConfigHandler)
+    server.requests = []
+    server.status = 200
+    server.content_type = "application/json"
+
+    def publish(doc, content_type="application/json"):
+        server.body = doc if isinstance(doc, str) else json.dumps(doc)
+        server.content_type = content_type
+        server.revision = getattr(server, "revision", 0) + 1
+
+    server.publish = publish
+    server.url = "http://127.0.0.1:%d/config.json" % server.server_address[1]
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool():
+    pool = FfurfHTTPPool()
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def url_ffurf():
+    ffurf = FfurfConfig()
+    ffurf.add_config_key("my-str")
+    ffurf.add_config_key("my-int", key_type=int)
+    return ffurf
+
+
+def test_from_url(url_ffurf, server, pool):
+    server.publish({"my-str": "hoot", "default": {"my-int": 1}})
+    assert url_ffurf.from_url(server.url, pool=pool)
+    assert url_ffurf["my-str"] == "hoot"
+    assert url_ffurf["my-int"] == 1
+    assert url_ffurf.get_source("my-int") == "%s:default" % server.url
+    assert server.requests[0][1]["Accept-Encoding"] == "gzip"
+
+
+def test_from_url_via_load(url_ffurf, server):
+    server.publish({"my-str": "hoot"})
+    url_ffurf.load(server.url, profile="sam")
+    assert url_ffurf["my-str"] == "hoot"
+
+
+def test_from_url_toml(url_ffurf, server, pool):
+    server.publish('my-str = "hoot"\n', content_type="application/toml")
+    url_ffurf.from_url(server.url, pool=pool)
+    assert url_ffurf["my-str"] == "hoot"
+
+
+def test_from_url_conditional_and_reused(url_ffurf, server, pool):
+    server.publish({"my-str": "hoot", "my-int": 1})
+    assert url_ffurf.from_url(server.url, pool=pool)
+    assert not url_ffurf.from_url(server.url, pool=pool)
+    assert server.requests[1][1]["If-None-Match"] == '"1"'
+    # one keep-alive connection served both requests
+    assert server.requests[0][2] == server.requests[1][2]
+
+
+def test_from_url_unchanged_with_another_profile(url_ffurf, server, pool):
+    server.publish({"my-str": "root", "profile": {"p": {"my-str": "prof"}}})
+    assert url_ffurf.from_url(server.url, pool=pool)
+    assert url_ffurf.from_url(server.url, profile="p", pool=pool)
+    assert url_ffurf["my-str"] == "prof"
+    assert url_ffurf.get_source("my-str") == "%s:profile.p" % server.url
+    assert not url_ffurf.from_url(server.url, profile="p", pool=pool)
+    assert url_ffurf.from_url(server.url, pool=pool)
+    assert url_ffurf["my-str"] == "root"
+    # the document was only sent once
+    assert [r[1].get("If-None-Match") for r in server.requests] == [None] + ['"1"'] * 3
+
+
+def test_from_url_applies_only_changed_keys(url_ffurf, server, pool):
+    server.publish({"my-str": "hoot", "my-int": 1})
+    url_ffurf.from_url(server.url, pool=pool)
+    versions = {k: url_ffurf.get_keyconf(k)["version"] for k in url_ffurf}
+
+    server.publish({"my-str": "hoot", "my-int": 2})
+    assert url_ffurf.from_url(server.url, pool=pool)
+    assert url_ffurf["my-int"] == 2
+    assert url_ffurf.get_keyconf("my-str")["version"] == versions["my-str"]
+    assert url_ffurf.get_keyconf("my-int")["version"] != versions["my-int"]
+
+
+def test_from_url_keeps_last_good(url_ffurf, server, pool, capfd):
+    server.publish({"my-str": "hoot", "my-int": 1})
+    url_ffurf.from_url(server.url, pool=pool)
+
+    server.status = 500
+    assert not url_ffurf.from_url(server.url, pool=pool)
+    assert url_ffurf["my-str"] == "hoot"
+
+    server.status = 200
+    server.publish({"my-str": "meow", "my-int": "hoot"})
+    assert not url_ffurf.from_url(server.url, pool=pool)
+    assert url_ffurf["my-str"] == "hoot"
+    assert "keeping last good config" in capfd.readouterr().err
+
+    # the bad document was never applied, so it is fetched again in full
+    server.publish({"my-str": "meow", "my-int": 2})
+    assert url_ffurf.from_url(server.url, pool=pool)
+    assert url_ffurf["my-str"] == "meow"
+
+
+def test_from_url_without_last_good_raises(url_ffurf, server, pool):
+    server.status = 404
+    with pytest.raises(OSError):
+        url_ffurf.from_url(server.url, pool=pool)
+
+
+def test_from_url_timeout(url_ffurf, pool):
+    # nothing is listening, so the connection is refused
+    with pytest.raises(OSError):
+        url_ffurf.from_url("http://127.0.0.1:1/config.json", pool=pool, timeout=1)